@@ -1,32 +1,53 @@
--- 1. Create queue table (holds the actual messages) for VECTOR_PENDING_CHUNK
+-- Queue payload: RAW (binary messages) or JSON, must match ORACLE_QUEUE_PAYLOAD of the services.
+-- Queues created with another payload type are converted by sql/upgrade_queue_payload.sql.
+--
+-- VECTOR_PENDING_DOCUMENT and VECTOR_PENDING_CHUNK are sharded Transactional Event Queues. Messages are
+-- enqueued with their document id as correlation, the key that places all messages of a document in the
+-- same shard (event stream). Each consuming service dequeues as one consumer group (subscriber); the
+-- shards of a group are spread over the sessions dequeuing as it and rebalanced as replicas start and
+-- stop, so the chunks of a document stay with one consumer. Classic single-table queues of an earlier
+-- setup are converted by sql/upgrade_sharded_queues.sql.
+set verify off
+define queue_payload_type = 'RAW'
+-- Shards per queue, at least the number of consumer sessions expected per consumer group
+define queue_shards = 8
+-- Redelivery after a consumer's rollback (it stopped or lost its connection while processing): AQ waits
+-- queue_retry_delay seconds, and moves a message to its own exception queue only after queue_max_retries
+-- rollbacks. The services route messages to VECTOR_EXCEPTION after ORACLE_QUEUE_MAX_RETRIES failures first.
+define queue_max_retries = 100
+define queue_retry_delay = 10
+
+-- 1. Create the sharded queue (and its queue table) for VECTOR_PENDING_CHUNK
 declare
    table_exists exception;
    pragma exception_init(table_exists, -24001);
+   queue_exists exception;
+   pragma exception_init(queue_exists, -24006);
 begin
-   dbms_aqadm.create_queue_table(
-      queue_table        => 'PDBADMIN.VECTOR_PENDING_CHUNK_TABLE',
-      queue_payload_type => 'SYS.AQ$_JMS_TEXT_MESSAGE'
+   dbms_aqadm.create_transactional_event_queue(
+      queue_name         => 'PDBADMIN.VECTOR_PENDING_CHUNK',
+      multiple_consumers => true,
+      max_retries        => &queue_max_retries,
+      queue_payload_type => '&queue_payload_type'
    );
-   dbms_output.put_line('Created queue table: VECTOR_PENDING_CHUNK_TABLE');
+   dbms_output.put_line('Created sharded queue: VECTOR_PENDING_CHUNK');
 exception
-   when table_exists then
-      dbms_output.put_line('Queue table VECTOR_PENDING_CHUNK_TABLE already exists, skipping creation');
+   when table_exists or queue_exists then
+      dbms_output.put_line('Queue VECTOR_PENDING_CHUNK already exists, skipping creation');
 end;
 /
 
--- 2. Create the queue for VECTOR_PENDING_CHUNK
-declare
-   queue_exists exception;
-   pragma exception_init(queue_exists, -24006);
+-- 2. Shards, key based enqueue and redelivery settings (also for a queue created by an earlier run) for VECTOR_PENDING_CHUNK
 begin
-   dbms_aqadm.create_queue(
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_CHUNK', 'SHARD_NUM', &queue_shards);
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_CHUNK', 'KEY_BASED_ENQUEUE', 1);
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_CHUNK', 'STICKY_DEQUEUE', 1);
+   dbms_aqadm.alter_transactional_event_queue(
       queue_name  => 'PDBADMIN.VECTOR_PENDING_CHUNK',
-      queue_table => 'PDBADMIN.VECTOR_PENDING_CHUNK_TABLE'
+      max_retries => &queue_max_retries,
+      retry_delay => &queue_retry_delay
    );
-   dbms_output.put_line('Created queue: VECTOR_PENDING_CHUNK');
-exception
-   when queue_exists then
-      dbms_output.put_line('Queue VECTOR_PENDING_CHUNK already exists, skipping creation');
+   dbms_output.put_line('Set VECTOR_PENDING_CHUNK: &queue_shards shards keyed by correlation, &queue_max_retries retries, &queue_retry_delay s apart');
 end;
 /
 
@@ -42,48 +63,129 @@ exception
       dbms_output.put_line('Queue VECTOR_PENDING_CHUNK already started');
 end;
 /
--- 1. Create queue table (holds the actual messages) for VECTOR_PENDING_DOCUMENT
+
+-- 4. Consumer group of the consuming service (ORACLE_QUEUE_CONSUMER_GROUP) for VECTOR_PENDING_CHUNK
+declare
+   already_subscribed exception;
+   pragma exception_init(already_subscribed, -24034);
+begin
+   dbms_aqadm.add_subscriber(
+      queue_name => 'PDBADMIN.VECTOR_PENDING_CHUNK',
+      subscriber => sys.aq$_agent('VECTOR_MAKER', null, null)
+   );
+   dbms_output.put_line('Added consumer group VECTOR_MAKER to queue VECTOR_PENDING_CHUNK');
+exception
+   when already_subscribed then
+      dbms_output.put_line('Consumer group VECTOR_MAKER of queue VECTOR_PENDING_CHUNK already exists');
+end;
+/
+
+-- 1. Create the sharded queue (and its queue table) for VECTOR_PENDING_DOCUMENT
+declare
+   table_exists exception;
+   pragma exception_init(table_exists, -24001);
+   queue_exists exception;
+   pragma exception_init(queue_exists, -24006);
+begin
+   dbms_aqadm.create_transactional_event_queue(
+      queue_name         => 'PDBADMIN.VECTOR_PENDING_DOCUMENT',
+      multiple_consumers => true,
+      max_retries        => &queue_max_retries,
+      queue_payload_type => '&queue_payload_type'
+   );
+   dbms_output.put_line('Created sharded queue: VECTOR_PENDING_DOCUMENT');
+exception
+   when table_exists or queue_exists then
+      dbms_output.put_line('Queue VECTOR_PENDING_DOCUMENT already exists, skipping creation');
+end;
+/
+
+-- 2. Shards, key based enqueue and redelivery settings (also for a queue created by an earlier run) for VECTOR_PENDING_DOCUMENT
+begin
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_DOCUMENT', 'SHARD_NUM', &queue_shards);
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_DOCUMENT', 'KEY_BASED_ENQUEUE', 1);
+   dbms_aqadm.set_queue_parameter('PDBADMIN.VECTOR_PENDING_DOCUMENT', 'STICKY_DEQUEUE', 1);
+   dbms_aqadm.alter_transactional_event_queue(
+      queue_name  => 'PDBADMIN.VECTOR_PENDING_DOCUMENT',
+      max_retries => &queue_max_retries,
+      retry_delay => &queue_retry_delay
+   );
+   dbms_output.put_line('Set VECTOR_PENDING_DOCUMENT: &queue_shards shards keyed by correlation, &queue_max_retries retries, &queue_retry_delay s apart');
+end;
+/
+
+-- 3. Start the queue (enables enqueue/dequeue) for VECTOR_PENDING_DOCUMENT
+declare
+   already_enabled exception;
+   pragma exception_init(already_enabled, -24010);
+begin
+   dbms_aqadm.start_queue(queue_name => 'PDBADMIN.VECTOR_PENDING_DOCUMENT');
+   dbms_output.put_line('Started queue: VECTOR_PENDING_DOCUMENT');
+exception
+   when already_enabled then
+      dbms_output.put_line('Queue VECTOR_PENDING_DOCUMENT already started');
+end;
+/
+
+-- 4. Consumer group of the consuming service (ORACLE_QUEUE_CONSUMER_GROUP) for VECTOR_PENDING_DOCUMENT
+declare
+   already_subscribed exception;
+   pragma exception_init(already_subscribed, -24034);
+begin
+   dbms_aqadm.add_subscriber(
+      queue_name => 'PDBADMIN.VECTOR_PENDING_DOCUMENT',
+      subscriber => sys.aq$_agent('CHUNKER', null, null)
+   );
+   dbms_output.put_line('Added consumer group CHUNKER to queue VECTOR_PENDING_DOCUMENT');
+exception
+   when already_subscribed then
+      dbms_output.put_line('Consumer group CHUNKER of queue VECTOR_PENDING_DOCUMENT already exists');
+end;
+/
+
+-- 1. Create queue table for VECTOR_EXCEPTION, messages that failed more than ORACLE_QUEUE_MAX_RETRIES times
+--    (always JSON: the failed message with its queue, attempts and last error)
 declare
    table_exists exception;
    pragma exception_init(table_exists, -24001);
 begin
    dbms_aqadm.create_queue_table(
-      queue_table        => 'PDBADMIN.VECTOR_PENDING_DOCUMENT_TABLE',
-      queue_payload_type => 'SYS.AQ$_JMS_TEXT_MESSAGE'
+      queue_table        => 'PDBADMIN.VECTOR_EXCEPTION_TABLE',
+      queue_payload_type => 'JSON'
    );
-   dbms_output.put_line('Created queue table: VECTOR_PENDING_DOCUMENT_TABLE');
+   dbms_output.put_line('Created queue table: VECTOR_EXCEPTION_TABLE');
 exception
    when table_exists then
-      dbms_output.put_line('Queue table VECTOR_PENDING_DOCUMENT_TABLE already exists, skipping creation');
+      dbms_output.put_line('Queue table VECTOR_EXCEPTION_TABLE already exists, skipping creation');
 end;
 /
 
--- 2. Create the queue for VECTOR_PENDING_DOCUMENT
+-- 2. Create the queue for VECTOR_EXCEPTION
 declare
    queue_exists exception;
    pragma exception_init(queue_exists, -24006);
 begin
    dbms_aqadm.create_queue(
-      queue_name  => 'PDBADMIN.VECTOR_PENDING_DOCUMENT',
-      queue_table => 'PDBADMIN.VECTOR_PENDING_DOCUMENT_TABLE'
+      queue_name  => 'PDBADMIN.VECTOR_EXCEPTION',
+      queue_table => 'PDBADMIN.VECTOR_EXCEPTION_TABLE'
    );
-   dbms_output.put_line('Created queue: VECTOR_PENDING_DOCUMENT');
+   dbms_output.put_line('Created queue: VECTOR_EXCEPTION');
 exception
    when queue_exists then
-      dbms_output.put_line('Queue VECTOR_PENDING_DOCUMENT already exists, skipping creation');
+      dbms_output.put_line('Queue VECTOR_EXCEPTION already exists, skipping creation');
 end;
 /
 
--- 3. Start the queue (enables enqueue/dequeue) for VECTOR_PENDING_DOCUMENT
+-- 3. Start the queue for VECTOR_EXCEPTION
 declare
    already_enabled exception;
    pragma exception_init(already_enabled, -24010);
 begin
-   dbms_aqadm.start_queue(queue_name => 'PDBADMIN.VECTOR_PENDING_DOCUMENT');
-   dbms_output.put_line('Started queue: VECTOR_PENDING_DOCUMENT');
+   dbms_aqadm.start_queue(queue_name => 'PDBADMIN.VECTOR_EXCEPTION');
+   dbms_output.put_line('Started queue: VECTOR_EXCEPTION');
 exception
    when already_enabled then
-      dbms_output.put_line('Queue VECTOR_PENDING_DOCUMENT already started');
+      dbms_output.put_line('Queue VECTOR_EXCEPTION already started');
 end;
 /
 
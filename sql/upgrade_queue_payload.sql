@@ -0,0 +1,49 @@
+-- Convert the queues to the payload type of pdb_queues.sql (RAW unless changed there).
+-- Queue tables of another payload type (the former SYS.AQ$_JMS_TEXT_MESSAGE queues) are dropped, then
+-- pdb_queues.sql recreates them. Stop the services and let the queues drain first: a queue table
+-- still holding READY messages is left in place and reported.
+-- Classic queues are converted to the sharded queues of pdb_queues.sql, whatever their payload type, by
+-- sql/upgrade_sharded_queues.sql instead.
+--
+--    sql pdbadmin/<password>@localhost:1521/FREEPDB1 @sql/upgrade_queue_payload.sql
+--    sql pdbadmin/<password>@localhost:1521/FREEPDB1 @pdb_queues.sql
+set serveroutput on
+set verify off
+define queue_payload_type = 'RAW'
+
+declare
+   ready_messages number;
+begin
+   for queue_table in (
+      select queue_table, type
+        from user_queue_tables
+       where queue_table in ( 'VECTOR_PENDING_CHUNK_TABLE', 'VECTOR_PENDING_DOCUMENT_TABLE' )
+         and type != '&queue_payload_type'
+   ) loop
+      execute immediate 'select count(*) from ' || queue_table.queue_table || ' where state = 0'
+        into ready_messages;
+      if ready_messages > 0 then
+         dbms_output.put_line('Queue table ' || queue_table.queue_table || ' still holds ' || ready_messages
+                              || ' ready messages, drain it and run this script again');
+      else
+         dbms_aqadm.drop_queue_table(queue_table => queue_table.queue_table, force => true);
+         dbms_output.put_line('Dropped ' || queue_table.type || ' queue table: ' || queue_table.queue_table);
+      end if;
+   end loop;
+end;
+/
+
+-- Payload array type of the former DBMS_AQ.ENQUEUE_ARRAY enqueue, no longer used
+declare
+   type_missing exception;
+   pragma exception_init(type_missing, -4043);
+begin
+   execute immediate 'drop type PDBADMIN.JMS_TEXT_MESSAGE_ARRAY';
+   dbms_output.put_line('Dropped type: JMS_TEXT_MESSAGE_ARRAY');
+exception
+   when type_missing then
+      null;
+end;
+/
+
+exit;
@@ -0,0 +1,35 @@
+-- Convert the classic single-table queues VECTOR_PENDING_DOCUMENT and VECTOR_PENDING_CHUNK of an earlier
+-- setup to the sharded Transactional Event Queues of pdb_queues.sql, whatever their payload type.
+-- The classic queue tables are dropped, then pdb_queues.sql creates the sharded queues with the same names.
+--
+-- Stop the api_service first and let the chunker_service and vector_maker_service drain both queues, then
+-- stop them too: a queue table still holding READY or WAITING (delayed retry) messages is left in place and
+-- reported. Start the services again (ORACLE_QUEUE_CONSUMER_GROUP set) once pdb_queues.sql has run.
+--
+--    sql pdbadmin/<password>@localhost:1521/FREEPDB1 @sql/upgrade_sharded_queues.sql
+--    sql pdbadmin/<password>@localhost:1521/FREEPDB1 @pdb_queues.sql
+set serveroutput on
+
+declare
+   pending_messages number;
+begin
+   for queue_table in (
+      select queue_table
+        from user_queue_tables
+       where queue_table in ( 'VECTOR_PENDING_CHUNK_TABLE', 'VECTOR_PENDING_DOCUMENT_TABLE' )
+   ) loop
+      -- state 0: READY, 1: WAITING
+      execute immediate 'select count(*) from ' || queue_table.queue_table || ' where state in (0, 1)'
+        into pending_messages;
+      if pending_messages > 0 then
+         dbms_output.put_line('Queue table ' || queue_table.queue_table || ' still holds ' || pending_messages
+                              || ' pending messages, drain it and run this script again');
+      else
+         dbms_aqadm.drop_queue_table(queue_table => queue_table.queue_table, force => true);
+         dbms_output.put_line('Dropped classic queue table: ' || queue_table.queue_table);
+      end if;
+   end loop;
+end;
+/
+
+exit;
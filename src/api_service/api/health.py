@@ -5,6 +5,7 @@ from flask import Blueprint, jsonify
 from database import get_db_pool, is_db_ready
 from database.operations import get_document_counts_by_status, get_chunks_by_embedding_status
 from services.queue import get_all_queue_depths
+from services.admission import get_admission_state
 from config import VECTOR_SERVICE_URL, CHUNKER_SERVICE_URL
 
 health_bp = Blueprint('health', __name__)
@@ -94,6 +95,7 @@ def status_check():
         status_response = {
             'timestamp': timestamp,
             'queues': queue_depths,
+            'admission': get_admission_state(),
             'documents': document_stats,
             'chunks': chunk_stats
         }
@@ -104,4 +106,9 @@ def status_check():
         return jsonify({
             'error': f'Failed to get status: {str(e)}',
             'timestamp': datetime.utcnow().isoformat() + 'Z'
-        }), 500
\ No newline at end of file
+        }), 500
+
+@health_bp.route('/admission', methods=['GET'])
+def admission_status():
+    """Whether uploads are admitted, with the queue samples the decision was made on"""
+    return jsonify(get_admission_state()), 200
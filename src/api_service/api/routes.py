@@ -1,7 +1,7 @@
 import logging
 from flask import Blueprint, request, jsonify
 from database import is_db_ready
-from services import process_document, search_documents
+from services import process_document, search_documents, check_admission, get_admission_state
 from config import MAX_FILE_SIZE
 
 logger = logging.getLogger(__name__)
@@ -14,6 +14,17 @@ def upload_file():
         if not is_db_ready():
             return jsonify({'error': 'Database not ready'}), 503
         
+        # Refuse new documents while the chunker and embedder are too far behind
+        retry_after = check_admission()
+        if retry_after is not None:
+            response = jsonify({
+                'error': 'Ingestion is behind, retry later',
+                'retry_after_s': retry_after,
+                'admission': get_admission_state()
+            })
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
         
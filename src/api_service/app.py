@@ -7,6 +7,7 @@ from flask_cors import CORS
 from config import HOST, PORT, DEBUG, MAX_FILE_SIZE, CORS_ORIGINS
 from database import init_database, cleanup_database
 from api import health_bp, api_bp
+from services import start_admission_sampler, stop_admission_sampler
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,6 +27,7 @@ app.register_blueprint(api_bp)
 def cleanup_resources():
     """Clean up resources on shutdown."""
     logger.info("Shutting down gracefully...")
+    stop_admission_sampler()
     cleanup_database()
     logger.info("Graceful shutdown completed")
 
@@ -47,6 +49,7 @@ def initialize_services():
     """Initialize all services."""
     logger.info("Initializing services...")
     init_database()
+    start_admission_sampler()
     logger.info("Services initialization completed")
 
 # Initialize services when module is imported (works with both direct run and gunicorn)
@@ -13,6 +13,12 @@ CORS_ORIGINS = os.getenv('API_CORS_ORIGINS', '*').split(',')
 # Document Storage Configuration
 DOCUMENTS_STORAGE_PATH = os.getenv('DOCUMENTS_STORAGE_PATH', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'shared', 'documents'))
 
+# Embedding Storage Configuration (must match in api_service and vector_maker_service)
+EMBEDDING_STORAGE_FORMAT = os.getenv('EMBEDDING_STORAGE_FORMAT', 'FLOAT32').upper()  # FLOAT32, FLOAT16 or INT8
+EMBEDDING_STORAGE_DIMENSION = int(os.getenv('EMBEDDING_STORAGE_DIMENSION', '0'))  # 0 keeps the model dimension
+EMBEDDING_STORAGE_PROJECTION = os.getenv('EMBEDDING_STORAGE_PROJECTION', 'truncate').lower()  # truncate or pca
+EMBEDDING_PCA_PATH = os.getenv('EMBEDDING_PCA_PATH', './cache/embedding_pca.npz')
+EMBEDDING_NORMALIZED_CHECK_TTL = int(os.getenv('EMBEDDING_NORMALIZED_CHECK_TTL', '60'))  # Seconds between checks for un-normalized rows
 
 # Oracle Database Configuration
 ORACLE_USER = os.getenv('ORACLE_USER', 'SYSTEM')
@@ -28,6 +34,24 @@ ORACLE_POOL_MAX = int(os.getenv('ORACLE_POOL_MAX', '10'))
 ORACLE_POOL_INCREMENT = int(os.getenv('ORACLE_POOL_INCREMENT', '1'))
 ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', '60'))
 
+# Queue Configuration (must match in all services and the queue tables of pdb_queues.sql)
+QUEUE_PAYLOAD = os.getenv('ORACLE_QUEUE_PAYLOAD', 'raw').lower()  # raw (binary layout) or json
+QUEUE_SHARDED = os.getenv('ORACLE_QUEUE_SHARDED', 'True').lower() in ('true', '1', 'yes')  # Sharded queues (thick mode), false for classic queues
+ORACLE_CLIENT_LIB_DIR = os.getenv('ORACLE_CLIENT_LIB_DIR', '')  # Oracle Client libraries for thick mode, empty searches the system path
+QUEUE_BACKEND = os.getenv('QUEUE_BACKEND', 'aq').lower()  # aq, memory (in-process) or sqlite (a file shared by the services of one host)
+QUEUE_SQLITE_PATH = os.getenv('QUEUE_SQLITE_PATH', '../cache/queues.sqlite3')  # SQLite file of the sqlite backend, the same for every service
+
+# Ingestion Admission Control (uploads get 429 while the queues are above a high watermark)
+ADMISSION_ENABLED = os.getenv('API_ADMISSION_ENABLED', 'True').lower() in ('true', '1', 'yes')
+ADMISSION_SAMPLE_INTERVAL_S = float(os.getenv('API_ADMISSION_SAMPLE_INTERVAL_S', '5'))  # Seconds between queue depth and lag samples
+ADMISSION_MAX_PENDING_DOCUMENTS = int(os.getenv('API_ADMISSION_MAX_PENDING_DOCUMENTS', '200'))  # High watermark of vector_pending_document, 0 disables it
+ADMISSION_MAX_PENDING_CHUNK_MESSAGES = int(os.getenv('API_ADMISSION_MAX_PENDING_CHUNK_MESSAGES', '1250'))  # High watermark of vector_pending_chunk messages (of up to CHUNKER_CHUNKS_PER_MESSAGE chunks each), 0 disables it
+ADMISSION_MAX_LAG_S = float(os.getenv('API_ADMISSION_MAX_LAG_S', '900'))  # High watermark of the oldest pending message's age in either queue, 0 disables it
+ADMISSION_RESUME_RATIO = float(os.getenv('API_ADMISSION_RESUME_RATIO', '0.8'))  # Uploads resume once every measure is below this fraction of its watermark
+ADMISSION_RETRY_AFTER_MIN_S = int(os.getenv('API_ADMISSION_RETRY_AFTER_MIN_S', '5'))
+ADMISSION_RETRY_AFTER_MAX_S = int(os.getenv('API_ADMISSION_RETRY_AFTER_MAX_S', '300'))
+
 # Dependent Services Configuration
 VECTOR_SERVICE_URL = os.getenv('VECTOR_SERVICE_URL', 'http://localhost:8001')
+VECTOR_SERVICE_FORMAT = os.getenv('VECTOR_SERVICE_FORMAT', 'binary')  # binary, npy, base64 or json
 CHUNKER_SERVICE_URL = os.getenv('CHUNKER_SERVICE_URL', 'http://localhost:8002')
\ No newline at end of file
@@ -3,7 +3,8 @@ import logging
 import oracledb
 from config import (
     ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
-    ORACLE_POOL_MIN, ORACLE_POOL_MAX, ORACLE_POOL_INCREMENT, ORACLE_POOL_PING_INTERVAL
+    ORACLE_POOL_MIN, ORACLE_POOL_MAX, ORACLE_POOL_INCREMENT, ORACLE_POOL_PING_INTERVAL,
+    QUEUE_BACKEND, QUEUE_SHARDED, ORACLE_CLIENT_LIB_DIR
 )
 
 logger = logging.getLogger(__name__)
@@ -20,13 +21,18 @@ def init_database():
         logger.info("Initializing Oracle database connection pool...")
         logger.info(f"Connecting to: {ORACLE_DSN} as user: {ORACLE_USER}")
         
-        # Check for Oracle client environment variables that might interfere with thin mode
-        if 'ORACLE_HOME' in os.environ:
-            logger.warning("ORACLE_HOME detected, this might cause issues with thin mode")
-        if 'TNS_ADMIN' in os.environ:
-            logger.warning("TNS_ADMIN detected, this might cause issues with thin mode")
+        # Enqueueing to sharded queues is only available in thick mode (Oracle Client libraries)
+        if QUEUE_BACKEND == 'aq' and QUEUE_SHARDED:
+            oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR or None)
+            logger.info(f"Using thick mode for sharded queues (Oracle Client {oracledb.clientversion()})")
+        else:
+            # Check for Oracle client environment variables that might interfere with thin mode
+            if 'ORACLE_HOME' in os.environ:
+                logger.warning("ORACLE_HOME detected, this might cause issues with thin mode")
+            if 'TNS_ADMIN' in os.environ:
+                logger.warning("TNS_ADMIN detected, this might cause issues with thin mode")
         
-        # Create connection pool using thin mode (no Oracle client installation required)
+        # Create connection pool, in thin mode (no Oracle client installation required) unless enabled above
         _db_pool = oracledb.create_pool(
             user=ORACLE_USER,
             password=ORACLE_PASSWORD,
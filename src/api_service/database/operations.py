@@ -1,10 +1,21 @@
 import logging
 import oracledb
 import array
+import time
+from config import EMBEDDING_NORMALIZED_CHECK_TTL
 from .connection import get_db_pool, is_db_ready
+from .vector_format import get_vector_storage
 
 logger = logging.getLogger(__name__)
 
+# Cached result of all_chunks_normalized()
+_normalized_checked_at = None
+_all_normalized = False
+
+# Cached result of count_other_dimension_chunks()
+_dimension_checked_at = None
+_other_dimension_chunks = 0
+
 def store_document(filename, title, page_count, file_hash, file_path=None, processing_status='pending'):
     """Store document metadata and return document ID."""
     if not is_db_ready():
@@ -52,16 +63,20 @@ def store_document_chunks(document_id, chunks_with_embeddings):
         # Clear existing chunks for this document
         cursor.execute("DELETE FROM document_chunks WHERE document_id = :doc_id", [document_id])
         
-        # Insert new chunks
+        # Insert new chunks, embeddings in the configured storage format
+        storage = get_vector_storage()
         for i, (chunk_text, embedding) in enumerate(chunks_with_embeddings):
-            cursor.execute("""
-                INSERT INTO document_chunks (document_id, chunk_index, chunk_text, embedding, chunk_size)
-                VALUES (:doc_id, :chunk_idx, :chunk_text, :embedding, :chunk_size)
+            if isinstance(embedding, list):
+                embedding = array.array('f', embedding)
+            cursor.execute(f"""
+                INSERT INTO document_chunks (document_id, chunk_index, chunk_text, embedding, embedding_normalized, chunk_size)
+                VALUES (:doc_id, :chunk_idx, :chunk_text, {storage.sql(':embedding')}, :normalized, :chunk_size)
             """, {
                 'doc_id': document_id,
                 'chunk_idx': i,
                 'chunk_text': chunk_text,
-                'embedding': embedding,
+                'embedding': storage.transform(embedding),
+                'normalized': int(storage.normalized),
                 'chunk_size': len(chunk_text)
             })
         
@@ -100,16 +115,21 @@ def update_chunk_embedding(document_id, chunk_index, embedding):
     if not is_db_ready():
         raise Exception("Database not ready")
     
+    if isinstance(embedding, list):
+        embedding = array.array('f', embedding)
+    storage = get_vector_storage()
+    
     db_pool = get_db_pool()
     with db_pool.acquire() as connection:
         cursor = connection.cursor()
         
-        cursor.execute("""
+        cursor.execute(f"""
             UPDATE document_chunks 
-            SET embedding = :embedding 
+            SET embedding = {storage.sql(':embedding')}, embedding_normalized = :normalized 
             WHERE document_id = :doc_id AND chunk_index = :chunk_idx
         """, {
-            'embedding': embedding,
+            'embedding': storage.transform(embedding),
+            'normalized': int(storage.normalized),
             'doc_id': document_id,
             'chunk_idx': chunk_index
         })
@@ -117,6 +137,43 @@ def update_chunk_embedding(document_id, chunk_index, embedding):
         connection.commit()
         logger.info(f"Updated embedding for chunk {chunk_index} of document {document_id}")
 
+def all_chunks_normalized(cursor):
+    """Whether every embedded chunk was normalized on write, re-checked at most every EMBEDDING_NORMALIZED_CHECK_TTL seconds."""
+    global _normalized_checked_at, _all_normalized
+    
+    now = time.monotonic()
+    if _normalized_checked_at is not None and now - _normalized_checked_at < EMBEDDING_NORMALIZED_CHECK_TTL:
+        return _all_normalized
+    
+    cursor.execute("""
+        SELECT COUNT(*) FROM document_chunks
+        WHERE embedding IS NOT NULL AND embedding_normalized = 0 AND ROWNUM = 1
+    """)
+    _all_normalized = cursor.fetchone()[0] == 0
+    _normalized_checked_at = now
+    if not _all_normalized:
+        logger.warning("Found chunks without normalized embeddings, searching with COSINE (backfill with requantize.py)")
+    return _all_normalized
+
+def count_other_dimension_chunks(cursor, dimension):
+    """Embedded chunks whose dimension differs from the configured one, re-counted at most every EMBEDDING_NORMALIZED_CHECK_TTL seconds."""
+    global _dimension_checked_at, _other_dimension_chunks
+    
+    now = time.monotonic()
+    if _dimension_checked_at is not None and now - _dimension_checked_at < EMBEDDING_NORMALIZED_CHECK_TTL:
+        return _other_dimension_chunks
+    
+    cursor.execute("""
+        SELECT COUNT(*) FROM document_chunks
+        WHERE embedding IS NOT NULL AND VECTOR_DIMENSION_COUNT(embedding) != :dimension
+    """, {'dimension': dimension})
+    _other_dimension_chunks = cursor.fetchone()[0]
+    _dimension_checked_at = now
+    if _other_dimension_chunks:
+        logger.warning(f"{_other_dimension_chunks} embedded chunks are not stored with {dimension} dimensions and are "
+                       f"left out of search results until they are converted (requantize.py)")
+    return _other_dimension_chunks
+
 def search_similar_chunks(query_embedding, limit=10):
     """Search for similar chunks using vector similarity."""
     if not is_db_ready():
@@ -131,22 +188,35 @@ def search_similar_chunks(query_embedding, limit=10):
             query_embedding_array = array.array('f', query_embedding)
         else:
             query_embedding_array = query_embedding
-            
-        cursor.execute("""
+        
+        # Apply the same reduction, normalization and quantization as the stored chunks
+        storage = get_vector_storage()
+        query_vector = storage.transform(query_embedding_array)
+        binds = {'query_embedding': query_vector, 'limit': limit}
+        
+        # DOT skips the per-row norm computation and ranks like COSINE once every row is unit length
+        metric = storage.search_metric(all_chunks_normalized(cursor))
+        
+        # Rows of another dimension would fail VECTOR_DISTANCE. Only while some exist (a dimension change not
+        # yet requantized, reported above) are they filtered out, so the query otherwise stays index friendly
+        dimension_filter = ""
+        if count_other_dimension_chunks(cursor, len(query_vector)):
+            dimension_filter = "WHERE VECTOR_DIMENSION_COUNT(dc.embedding) = :dimension"
+            binds['dimension'] = len(query_vector)
+        
+        cursor.execute(f"""
             SELECT 
                 dc.chunk_text,
                 d.filename,
                 d.title,
                 dc.chunk_index,
-                VECTOR_DISTANCE(dc.embedding, :query_embedding, COSINE) as distance
+                VECTOR_DISTANCE(dc.embedding, {storage.sql(':query_embedding')}, {metric}) as distance
             FROM document_chunks dc
             JOIN documents d ON dc.document_id = d.id
-            ORDER BY VECTOR_DISTANCE(dc.embedding, :query_embedding, COSINE)
+            {dimension_filter}
+            ORDER BY VECTOR_DISTANCE(dc.embedding, {storage.sql(':query_embedding')}, {metric})
             FETCH FIRST :limit ROWS ONLY
-        """, {
-            'query_embedding': query_embedding_array,
-            'limit': limit
-        })
+        """, binds)
         
         results = cursor.fetchall()
         logger.info("results")
@@ -157,7 +227,7 @@ def search_similar_chunks(query_embedding, limit=10):
             'filename': row[1],
             'title': row[2],
             'chunk_index': row[3],
-            'similarity': 1 - row[4]  # Convert distance back to similarity
+            'similarity': storage.similarity(row[4], metric)  # Convert distance back to cosine similarity
         } for row in results]
 
 def get_document_counts_by_status():
@@ -0,0 +1,38 @@
+"""
+The configured storage format of document_chunks.embedding (see common.vector_format).
+"""
+
+import logging
+import sys
+from pathlib import Path
+from config import (
+    EMBEDDING_STORAGE_FORMAT, EMBEDDING_STORAGE_DIMENSION,
+    EMBEDDING_STORAGE_PROJECTION, EMBEDDING_PCA_PATH
+)
+
+# Shared vector storage transforms (src/common)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from common.vector_format import VectorStorage, PcaProjection
+
+# Re-exported for scripts on the service's configuration, e.g. requantize.py and stress/storage
+__all__ = ['VectorStorage', 'PcaProjection', 'get_vector_storage']
+
+logger = logging.getLogger(__name__)
+
+# Global state
+_storage = None
+
+
+def get_vector_storage():
+    """Get the configured vector storage, created on first use."""
+    global _storage
+
+    if _storage is None:
+        _storage = VectorStorage(
+            EMBEDDING_STORAGE_FORMAT,
+            EMBEDDING_STORAGE_DIMENSION,
+            EMBEDDING_STORAGE_PROJECTION,
+            EMBEDDING_PCA_PATH
+        )
+        logger.info(f"Embeddings stored as {_storage.describe()}")
+    return _storage
@@ -1,11 +1,16 @@
 from .document import get_file_hash, process_document
 from .search import search_documents
 from .queue import enqueue_document_for_chunking, enqueue_chunk_for_embedding
+from .admission import start_admission_sampler, stop_admission_sampler, check_admission, get_admission_state
 
 __all__ = [
     'get_file_hash', 
     'process_document',
     'search_documents',
     'enqueue_document_for_chunking',
-    'enqueue_chunk_for_embedding'
+    'enqueue_chunk_for_embedding',
+    'start_admission_sampler',
+    'stop_admission_sampler',
+    'check_admission',
+    'get_admission_state'
 ]
\ No newline at end of file
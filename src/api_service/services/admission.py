@@ -0,0 +1,182 @@
+"""
+Admission control of uploads, from the backlog of the ingestion queues.
+
+A sampler thread reads the depth of vector_pending_document and
+vector_pending_chunk and the age of their oldest pending message (the
+processing lag) every ADMISSION_SAMPLE_INTERVAL_S seconds, so uploads never
+wait on a queue query. When a measure reaches its high watermark, uploads are
+refused with 429 until every measure is back below ADMISSION_RESUME_RATIO of
+its watermark, so admission does not flap around the watermark.
+
+Retry-After is the time the queues need to drain back below the resume
+level at the rate they were observed draining, within
+ADMISSION_RETRY_AFTER_MIN_S .. ADMISSION_RETRY_AFTER_MAX_S (the maximum
+until a drain has been observed). If the queues cannot be sampled, uploads
+are admitted.
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+from config import (
+    ADMISSION_ENABLED, ADMISSION_SAMPLE_INTERVAL_S, ADMISSION_MAX_PENDING_DOCUMENTS, ADMISSION_MAX_PENDING_CHUNK_MESSAGES,
+    ADMISSION_MAX_LAG_S, ADMISSION_RESUME_RATIO, ADMISSION_RETRY_AFTER_MIN_S, ADMISSION_RETRY_AFTER_MAX_S
+)
+from .queue import get_queue_backlog
+
+logger = logging.getLogger(__name__)
+
+# High watermark of each watched queue's depth, in messages: a vector_pending_chunk message
+# references up to CHUNKER_CHUNKS_PER_MESSAGE chunks
+WATERMARKS = {
+    'vector_pending_document': ADMISSION_MAX_PENDING_DOCUMENTS,
+    'vector_pending_chunk': ADMISSION_MAX_PENDING_CHUNK_MESSAGES
+}
+
+# Weight of the latest observation in the drain rate estimate
+DRAIN_SMOOTHING = 0.5
+
+# Global state
+_sampler = None
+_stop = threading.Event()
+_lock = threading.Lock()
+_state = {
+    'enabled': ADMISSION_ENABLED,
+    'admitting': True,
+    'reasons': [],
+    'retry_after_s': None,
+    'queues': {},
+    'sampled_at': None,
+    'sample_error': None
+}
+_rejected = 0
+_last_sample = None  # (monotonic time, {queue: depth}) of the previous successful sample
+_drain_rates = {}
+
+
+def _measures(queues):
+    """(name, value, high watermark, queue) of every enabled measure."""
+    measures = []
+    for queue, sample in queues.items():
+        if WATERMARKS[queue] > 0:
+            measures.append((f'{queue} depth', sample['depth'], WATERMARKS[queue], queue))
+        if ADMISSION_MAX_LAG_S > 0:
+            measures.append((f'{queue} lag_s', sample['lag_s'], ADMISSION_MAX_LAG_S, queue))
+    return measures
+
+def _drain_seconds(measure, queues):
+    """Seconds until a measure drops below its resume level at the queue's observed drain rate, None if unknown."""
+    name, value, watermark, queue = measure
+    resume = watermark * ADMISSION_RESUME_RATIO
+    rate = _drain_rates.get(queue)
+    if not rate:
+        return None
+    if name.endswith('depth'):
+        excess = value - resume
+    else:
+        # The share of pending messages older than the resume lag, taking their ages as evenly spread
+        excess = queues[queue]['depth'] * (1 - resume / value)
+    return max(excess, 0) / rate
+
+def retry_after(measures, queues):
+    """Retry-After seconds for the measures above their resume level."""
+    estimates = [_drain_seconds(measure, queues) for measure in measures]
+    if not estimates or any(estimate is None for estimate in estimates):
+        return ADMISSION_RETRY_AFTER_MAX_S
+    return min(max(math.ceil(max(estimates)), ADMISSION_RETRY_AFTER_MIN_S), ADMISSION_RETRY_AFTER_MAX_S)
+
+def _update_drain_rates(now, queues):
+    # A depth that fell since the last sample drained at least that fast; a depth that grew says
+    # nothing about the drain rate, so the previous estimate stands
+    global _last_sample
+    if _last_sample is not None:
+        elapsed = now - _last_sample[0]
+        for queue, sample in queues.items():
+            drained = _last_sample[1].get(queue, 0) - sample['depth']
+            if drained > 0 and elapsed > 0:
+                rate = drained / elapsed
+                previous = _drain_rates.get(queue)
+                _drain_rates[queue] = rate if previous is None else (
+                    DRAIN_SMOOTHING * rate + (1 - DRAIN_SMOOTHING) * previous
+                )
+    _last_sample = (now, {queue: sample['depth'] for queue, sample in queues.items()})
+
+def sample_admission():
+    """Sample the queues and update the admission state."""
+    now = time.monotonic()
+    queues = {}
+    for queue in WATERMARKS:
+        depth, lag_s = get_queue_backlog(queue)
+        queues[queue] = {'depth': depth, 'lag_s': round(lag_s, 1)}
+    _update_drain_rates(now, queues)
+    for queue, sample in queues.items():
+        rate = _drain_rates.get(queue)
+        sample['drain_per_s'] = round(rate, 2) if rate is not None else None
+
+    measures = _measures(queues)
+    with _lock:
+        if _state['admitting']:
+            over = [measure for measure in measures if measure[1] >= measure[2]]
+        else:
+            # Keep refusing until every measure is below its resume level
+            over = [measure for measure in measures if measure[1] > measure[2] * ADMISSION_RESUME_RATIO]
+        admitting = not over
+        if admitting != _state['admitting']:
+            if admitting:
+                logger.info(f"Admitting uploads again: {queues}")
+            else:
+                logger.warning(f"Refusing uploads, ingestion queues above their watermarks: "
+                               f"{', '.join(f'{name}={value:g} (max {watermark:g})' for name, value, watermark, _ in over)}")
+        _state.update({
+            'admitting': admitting,
+            'reasons': [f'{name} {value:g} (watermark {watermark:g})' for name, value, watermark, _ in over],
+            'retry_after_s': None if admitting else retry_after(over, queues),
+            'queues': queues,
+            'sampled_at': datetime.utcnow().isoformat() + 'Z',
+            'sample_error': None
+        })
+
+def _sample_loop():
+    while not _stop.is_set():
+        try:
+            sample_admission()
+        except Exception as e:
+            with _lock:
+                if _state['sample_error'] is None:
+                    logger.error(f"Could not sample the ingestion queues, admitting uploads: {e}")
+                _state.update({'admitting': True, 'reasons': [], 'retry_after_s': None, 'sample_error': str(e)})
+        _stop.wait(ADMISSION_SAMPLE_INTERVAL_S)
+
+def start_admission_sampler():
+    """Start sampling the ingestion queues in a background thread (if ADMISSION_ENABLED)."""
+    global _sampler
+    if not ADMISSION_ENABLED or _sampler is not None:
+        return
+    _stop.clear()
+    _sampler = threading.Thread(target=_sample_loop, name='admission-sampler', daemon=True)
+    _sampler.start()
+    logger.info(f"Admission sampler started (every {ADMISSION_SAMPLE_INTERVAL_S:g}s, "
+                f"watermarks {WATERMARKS}, max lag {ADMISSION_MAX_LAG_S:g}s)")
+
+def stop_admission_sampler():
+    global _sampler
+    sampler, _sampler = _sampler, None
+    if sampler is not None:
+        _stop.set()
+        sampler.join(timeout=5)
+
+def check_admission():
+    """None if an upload is admitted, otherwise the seconds after which to retry."""
+    global _rejected
+    with _lock:
+        if _state['admitting']:
+            return None
+        _rejected += 1
+        return _state['retry_after_s']
+
+def get_admission_state():
+    """The latest admission decision with the queue samples it was made on."""
+    with _lock:
+        return dict(_state, rejected=_rejected)
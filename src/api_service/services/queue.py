@@ -1,132 +1,95 @@
-import json
 import logging
+import sys
+from pathlib import Path
+from config import QUEUE_PAYLOAD, QUEUE_BACKEND, QUEUE_SQLITE_PATH
 from database import get_db_pool, is_db_ready
 
+# Shared queue client (src/common)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from common.queues import create_queue, DOCUMENT_MESSAGE, CHUNK_RANGE_MESSAGE
+
 logger = logging.getLogger(__name__)
 
+# On the QUEUE_BACKEND (see common.queues.backends)
+document_queue = create_queue(QUEUE_BACKEND, "vector_pending_document", DOCUMENT_MESSAGE, get_db_pool,
+                              sqlite_path=QUEUE_SQLITE_PATH, payload=QUEUE_PAYLOAD)
+chunk_queue = create_queue(QUEUE_BACKEND, "vector_pending_chunk", CHUNK_RANGE_MESSAGE, get_db_pool,
+                           sqlite_path=QUEUE_SQLITE_PATH, payload=QUEUE_PAYLOAD)
+
 def enqueue_document_for_chunking(document_id, file_path):
     """Enqueue a document for chunking processing."""
     if not is_db_ready():
         raise Exception("Database not ready")
     
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_document"
-            
-            # Create payload with document metadata
-            payload = {
-                'document_id': document_id,
-                'file_path': file_path
-            }
-            
-            # Enqueue message using Oracle AQ
-            cursor.execute("""
-                DECLARE
-                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                BEGIN
-                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
-                    message.set_text(:payload);
-                    
-                    DBMS_AQ.ENQUEUE(
-                        queue_name         => :queue_name,
-                        enqueue_options    => enqueue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    COMMIT;
-                END;
-            """, payload=json.dumps(payload), queue_name=queue_name)
-            
-            logger.info(f"Enqueued document {document_id} for chunking")
-            
+        document_queue.enqueue({'document_id': document_id, 'file_path': file_path})
+        logger.info(f"Enqueued document {document_id} for chunking")
+        
     except Exception as e:
         logger.error(f"Failed to enqueue document: {e}")
         raise
 
-def enqueue_chunk_for_embedding(document_id, chunk_index, chunk_text):
-    """Enqueue a chunk for embedding processing."""
+def enqueue_chunk_for_embedding(document_id, chunk_index):
+    """Enqueue a stored chunk for embedding processing."""
     if not is_db_ready():
         raise Exception("Database not ready")
     
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_chunk"
-            
-            # Create payload with chunk metadata
-            payload = {
-                'document_id': document_id,
-                'chunk_index': chunk_index,
-                'chunk_text': chunk_text
-            }
-            
-            # Enqueue message using Oracle AQ
-            cursor.execute("""
-                DECLARE
-                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                BEGIN
-                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
-                    message.set_text(:payload);
-                    
-                    DBMS_AQ.ENQUEUE(
-                        queue_name         => :queue_name,
-                        enqueue_options    => enqueue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    COMMIT;
-                END;
-            """, payload=json.dumps(payload), queue_name=queue_name)
-            
-            logger.info(f"Enqueued chunk {chunk_index} for document {document_id}")
-            
+        # Reference the stored chunk, the vector_maker_service reads its text from document_chunks
+        chunk_queue.enqueue({
+            'document_id': document_id,
+            'first_chunk_index': chunk_index,
+            'last_chunk_index': chunk_index
+        })
+        logger.info(f"Enqueued chunk {chunk_index} for document {document_id}")
+        
     except Exception as e:
         logger.error(f"Failed to enqueue chunk: {e}")
         raise
 
-def get_queue_depth(queue_name):
-    """Get the number of pending messages in a queue."""
+# AQ$ views of the queues from pdb_queues.sql: the sharded queues are their own queue tables,
+# with a row per consumer group and message
+QUEUE_VIEWS = {
+    'vector_pending_document': 'PDBADMIN.AQ$VECTOR_PENDING_DOCUMENT',
+    'vector_pending_chunk': 'PDBADMIN.AQ$VECTOR_PENDING_CHUNK',
+    'vector_exception': 'PDBADMIN.AQ$VECTOR_EXCEPTION_TABLE'
+}
+
+def get_queue_backlog(queue_name):
+    """Pending messages in a queue and the age in seconds of the oldest of them, in one query.
+
+    Raises on an unknown queue or a database error.
+    """
+    if QUEUE_BACKEND != 'aq':
+        # Messages ready for delivery on the memory or sqlite queues
+        return document_queue.backlog(queue_name.lower())
+
     if not is_db_ready():
         raise Exception("Database not ready")
-    
+
+    view_name = QUEUE_VIEWS.get(queue_name.lower())
+    if not view_name:
+        raise ValueError(f"Unknown queue name: {queue_name}")
+
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        # Count the pending messages once whatever the number of consumer groups. The queue table
+        # keeps enqueue times in UTC and the AQ$ view shows them as plain TIMESTAMPs in the session
+        # time zone, so the oldest one is tagged with SESSIONTIMEZONE and both sides compared in UTC
+        cursor.execute(f"""
+            SELECT COUNT(DISTINCT msg_id),
+                   (CAST(SYS_EXTRACT_UTC(SYSTIMESTAMP) AS DATE)
+                    - CAST(SYS_EXTRACT_UTC(FROM_TZ(CAST(MIN(enq_timestamp) AS TIMESTAMP), SESSIONTIMEZONE)) AS DATE)) * 86400
+            FROM {view_name}
+            WHERE msg_state = 'READY'
+        """)
+        depth, age = cursor.fetchone()
+        return depth or 0, max(float(age or 0), 0.0)
+
+def get_queue_depth(queue_name):
+    """Get the number of pending messages in a queue."""
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            # Use the actual queue table names from pdb_queues.sql
-            table_mapping = {
-                'vector_pending_document': 'PDBADMIN.VECTOR_PENDING_DOCUMENT_TABLE',
-                'vector_pending_chunk': 'PDBADMIN.VECTOR_PENDING_CHUNK_TABLE'
-            }
-            
-            table_name = table_mapping.get(queue_name.lower())
-            if not table_name:
-                logger.error(f"Unknown queue name: {queue_name}")
-                return 0
-            
-            # Query the queue table directly for pending messages
-            cursor.execute(f"""
-                SELECT COUNT(*) 
-                FROM {table_name}
-                WHERE msg_state = 'READY'
-            """)
-            
-            result = cursor.fetchone()
-            return result[0] if result else 0
+        return get_queue_backlog(queue_name)[0]
             
     except Exception as e:
         logger.error(f"Failed to get queue depth for {queue_name}: {e}")
@@ -137,6 +100,7 @@ def get_all_queue_depths():
     """Get depths for all queues used in the system.""" 
     return {
         'vector_pending_document': get_queue_depth('vector_pending_document'),
-        'vector_pending_chunk': get_queue_depth('vector_pending_chunk')
+        'vector_pending_chunk': get_queue_depth('vector_pending_chunk'),
+        'vector_exception': get_queue_depth('vector_exception')
     }
 
@@ -1,31 +1,44 @@
 import logging
+import struct
 import requests
 import os
+from config import VECTOR_SERVICE_FORMAT
 from database import search_similar_chunks
+from .vector_codec import OCTET_STREAM, NPY, JSON, decode_embeddings_response
 
 logger = logging.getLogger(__name__)
 
+# Accept header and JSON options for each VECTOR_SERVICE_FORMAT
+_REQUEST_FORMATS = {
+    'binary': (OCTET_STREAM, {}),
+    'npy': (NPY, {}),
+    'base64': (JSON, {'encoding': 'base64', 'include_texts': False}),
+    'json': (JSON, {'include_texts': False})
+}
+
 def search_documents(query_text, limit=10):
     """Search for similar document chunks using vector similarity."""
     
     # Get embedding from vector_maker_service
     vector_service_url = os.getenv('VECTOR_SERVICE_URL', 'http://localhost:8001')
     
+    accept, options = _REQUEST_FORMATS.get(VECTOR_SERVICE_FORMAT, _REQUEST_FORMATS['binary'])
+    
     try:
         response = requests.post(
             f"{vector_service_url}/embeddings",
-            json={"texts": [query_text]},
+            json={"texts": [query_text], **options},
+            headers={'Accept': accept},
             timeout=30
         )
         response.raise_for_status()
         
-        embeddings_data = response.json()
-        query_embedding = embeddings_data['embeddings'][0]['embedding']
+        query_embedding = decode_embeddings_response(response)[0]
         
     except requests.exceptions.RequestException as e:
         logger.error(f"Failed to get embedding from vector service: {e}")
         raise Exception(f"Vector service unavailable: {e}")
-    except (KeyError, IndexError) as e:
+    except (KeyError, IndexError, ValueError, struct.error) as e:
         logger.error(f"Invalid response from vector service: {e}")
         raise Exception(f"Invalid embedding response: {e}")
     
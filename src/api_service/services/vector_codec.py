@@ -0,0 +1,78 @@
+"""
+Decoders for the compact /embeddings response formats of the vector_maker_service.
+
+Mirrors vector_maker_service/api/vector_codec.py. Vectors are little-endian float32
+and are returned as array.array('f'), which binds directly to an Oracle VECTOR.
+"""
+
+import array
+import ast
+import base64
+import struct
+import sys
+
+JSON = 'application/json'
+OCTET_STREAM = 'application/octet-stream'
+NPY = 'application/x-npy'
+
+MAGIC = b'EMB1'
+HEADER = struct.Struct('<4sII')
+
+NPY_MAGIC = b'\x93NUMPY'
+
+
+def _split_float32_le(data, count, dimension):
+    """Split a row-major little-endian float32 matrix into one array per row."""
+    if len(data) != count * dimension * 4:
+        raise ValueError(f"Expected {count * dimension * 4} bytes of float32 data, got {len(data)}")
+    
+    matrix = array.array('f')
+    matrix.frombytes(data)
+    if sys.byteorder != 'little':
+        matrix.byteswap()
+    return [matrix[i * dimension:(i + 1) * dimension] for i in range(count)]
+
+def decode_base64(text):
+    """Vector from base64 little-endian float32 bytes."""
+    data = base64.b64decode(text)
+    return _split_float32_le(data, 1, len(data) // 4)[0]
+
+def decode_octet_stream(body):
+    """Vectors from an application/octet-stream /embeddings response."""
+    magic, count, dimension = HEADER.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError(f"Unexpected embeddings magic {magic!r}")
+    return _split_float32_le(memoryview(body)[HEADER.size:], count, dimension)
+
+def decode_npy(body):
+    """Vectors from an application/x-npy /embeddings response ('<f4' matrix)."""
+    if body[:6] != NPY_MAGIC:
+        raise ValueError("Not an .npy body")
+    
+    major = body[6]
+    if major == 1:
+        (header_length,) = struct.unpack_from('<H', body, 8)
+        offset = 10
+    else:
+        (header_length,) = struct.unpack_from('<I', body, 8)
+        offset = 12
+    header = ast.literal_eval(body[offset:offset + header_length].decode('latin1'))
+    if header['descr'] != '<f4' or header['fortran_order'] or len(header['shape']) != 2:
+        raise ValueError(f"Unsupported .npy layout: {header}")
+    
+    count, dimension = header['shape']
+    return _split_float32_le(memoryview(body)[offset + header_length:], count, dimension)
+
+def decode_embeddings_response(response):
+    """Vectors from a requests response of /embeddings in any supported format."""
+    content_type = response.headers.get('Content-Type', JSON).split(';')[0].strip()
+    
+    if content_type == OCTET_STREAM:
+        return decode_octet_stream(response.content)
+    if content_type == NPY:
+        return decode_npy(response.content)
+    
+    data = response.json()
+    if data.get('dtype') == '<f4':
+        return [decode_base64(item['embedding']) for item in data['embeddings']]
+    return [array.array('f', item['embedding']) for item in data['embeddings']]
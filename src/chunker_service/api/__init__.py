@@ -1,3 +1,7 @@
 from .health import health_bp
+from .routes import api_bp
 
-__all__ = ['health_bp']
\ No newline at end of file
+__all__ = [
+    'health_bp',
+    'api_bp'
+]
@@ -0,0 +1,14 @@
+from flask import Blueprint, jsonify
+from services import get_conversion_stats, get_conversion_cache_stats, get_processing_stats, get_queue_stats
+
+api_bp = Blueprint('api', __name__)
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Conversion pool throughput, conversion cache hit rate, document processing times and queue consumer."""
+    return jsonify({
+        'conversion': get_conversion_stats(),
+        'conversion_cache': get_conversion_cache_stats(),
+        'processing': get_processing_stats(),
+        'queue': get_queue_stats()
+    })
@@ -3,13 +3,18 @@ import signal
 import atexit
 import threading
 import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from flask import Flask
 from flask_cors import CORS
 
 from config import HOST, PORT, DEBUG, CORS_ORIGINS
 from database import init_database, cleanup_database
-from services import dequeue_document_for_chunking, process_document_from_file
-from api import health_bp
+from services import (
+    lease_document_for_chunking, process_document, init_queue_consumer, cleanup_queue_consumer,
+    init_conversion_pool, conversion_capacity, cleanup_conversion_pool
+)
+from api import health_bp, api_bp
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -27,36 +32,75 @@ CORS(app, origins=CORS_ORIGINS)
 
 # Register blueprints
 app.register_blueprint(health_bp)
+app.register_blueprint(api_bp)
+
+def _collect_documents(in_flight, timeout):
+    """Ack the documents that finished processing and retry the failed ones, waiting up to timeout for one."""
+    done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+    for future in done:
+        document_id, lease = in_flight.pop(future)
+        try:
+            try:
+                result = future.result()
+            except Exception as e:
+                # Already logged by process_document, retried later or moved to the exception queue
+                lease.fail(e)
+                continue
+            # The chunks are committed, only now remove the document from the queue
+            lease.ack()
+            logger.info(f"Successfully processed document {document_id}: {result['message']}")
+        except Exception as e:
+            logger.error(f"Could not end the queue lease of document {document_id}, it will be redelivered: {e}")
 
 def chunking_worker():
     """Background worker to process document chunking queue."""
     global _worker_running
     logger.info("Starting chunking worker thread...")
-    
+
+    # One thread per document in flight drives its conversion (in the pool) and stores its chunks
+    capacity = conversion_capacity()
+    documents = ThreadPoolExecutor(max_workers=capacity, thread_name_prefix='chunking-document')
+    in_flight = {}
+
     while _worker_running:
         try:
-            # Try to dequeue a document (with 30 second timeout)
-            document_data = dequeue_document_for_chunking(timeout=30)
+            # Collect finished documents, and wait for one while every slot is busy
+            full = len(in_flight) >= capacity
+            _collect_documents(in_flight, timeout=1 if full else 0)
+            if full:
+                continue
+
+            # Try to lease a document (with 30 second timeout, short while documents are in flight)
+            lease = lease_document_for_chunking(timeout=1 if in_flight else 30)
             
-            if document_data is None:
+            if lease is None:
                 # No message received within timeout, continue
                 continue
             
             # Extract document information
+            document_data = lease.messages[0]
             document_id = document_data['document_id']
             file_path = document_data['file_path']
             
             logger.info(f"Processing document {document_id} from {file_path}")
             
-            # Process document and create chunks
-            result = process_document_from_file(document_id, file_path)
-            
-            logger.info(f"Successfully processed document {document_id}: {result['message']}")
+            # Process document and create chunks, the lease is acked or failed when it finishes
+            try:
+                in_flight[documents.submit(process_document, document_id, file_path)] = (document_id, lease)
+            except Exception:
+                lease.release()
+                raise
             
         except Exception as e:
             logger.error(f"Error processing document: {e}")
-            # Continue processing other documents even if one fails
+            # Continue processing other documents even if one fails, after a pause in case the queue is down
+            time.sleep(1)
             continue
+
+    # Finish the documents still in flight
+    while in_flight:
+        _collect_documents(in_flight, timeout=None)
+    documents.shutdown()
     
     logger.info("Chunking worker thread stopped")
 
@@ -73,12 +117,14 @@ def cleanup_resources():
     global _worker_running, _worker_thread
     logger.info("Shutting down gracefully...")
     
-    # Stop worker thread
+    # Stop worker thread (and wake it if it is waiting for a queue notification)
     _worker_running = False
+    cleanup_queue_consumer()
     if _worker_thread and _worker_thread.is_alive():
         logger.info("Waiting for chunking worker to stop...")
         _worker_thread.join(timeout=10)
     
+    cleanup_conversion_pool()
     cleanup_database()
     logger.info("Graceful shutdown completed")
 
@@ -88,23 +134,28 @@ def signal_handler(signum, frame):
     cleanup_resources()
     exit(0)
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
-signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
-
-# Register exit handler for normal program termination
-atexit.register(cleanup_resources)
-
 # Initialize services
 def initialize_services():
     """Initialize all services."""
     logger.info("Initializing services...")
     init_database()
+    init_queue_consumer()
+    init_conversion_pool()
     start_chunking_worker()
     logger.info("Services initialization completed")
 
-# Initialize services when module is imported (works with both direct run and gunicorn)
-initialize_services()
+# Conversion pool workers are spawned and re-import this module when it is run directly,
+# only the parent process serves requests and owns the worker
+if multiprocessing.parent_process() is None:
+    # Register signal handlers
+    signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
+    signal.signal(signal.SIGTERM, signal_handler)  # Termination signal
+
+    # Register exit handler for normal program termination
+    atexit.register(cleanup_resources)
+
+    # Initialize services when module is imported (works with both direct run and gunicorn)
+    initialize_services()
 
 if __name__ == '__main__':
     app.run(debug=DEBUG, host=HOST, port=PORT)
\ No newline at end of file
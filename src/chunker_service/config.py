@@ -12,6 +12,34 @@ CORS_ORIGINS = os.getenv('CHUNKER_CORS_ORIGINS', '*').split(',')
 # Document Processing Configuration
 CHUNK_SIZE = int(os.getenv('CHUNKER_CHUNK_SIZE', '512'))
 CHUNK_OVERLAP = int(os.getenv('CHUNKER_CHUNK_OVERLAP', '50'))
+# Chunk the flattened markdown (text) or pack items of the document tree under heading prefixes (structure)
+CHUNK_MODE = os.getenv('CHUNKER_MODE', 'text').lower()
+# Unit of CHUNK_SIZE and CHUNK_OVERLAP: chars, or tokens of CHUNK_TOKENIZER
+CHUNK_UNIT = os.getenv('CHUNKER_CHUNK_UNIT', 'chars').lower()
+# Break chunks at the last space (space) or prefer sentence ends and newlines (sentence)
+CHUNK_BREAK_AT = os.getenv('CHUNKER_CHUNK_BREAK_AT', 'space').lower()
+# Tokenizer for token sizing, should match the vector_maker_service embedding model
+CHUNK_TOKENIZER = os.getenv('CHUNKER_TOKENIZER', os.getenv('VECTOR_MODEL', 'intfloat/e5-mistral-7b-instruct'))
+
+# Chunks referenced by one vector_pending_chunk message (the text is read from document_chunks)
+CHUNKS_PER_MESSAGE = int(os.getenv('CHUNKER_CHUNKS_PER_MESSAGE', '16'))
+
+# Conversion Pool Configuration
+# Worker processes converting documents in parallel (0 converts in the chunking worker thread)
+CONVERSION_WORKERS = int(os.getenv('CHUNKER_CONVERSION_WORKERS', '2'))
+# Memory a single conversion may allocate on top of the warmed worker, in MB (0 = no limit)
+CONVERSION_MEMORY_MB = int(os.getenv('CHUNKER_CONVERSION_MEMORY_MB', '4096'))
+# Time a single conversion may take, in seconds (0 = no limit)
+CONVERSION_TIMEOUT_S = int(os.getenv('CHUNKER_CONVERSION_TIMEOUT_S', '900'))
+
+# Convert PDFs longer than this many pages in windows of this many pages, storing chunks as each window finishes (0 = whole documents)
+PAGE_WINDOW = int(os.getenv('CHUNKER_PAGE_WINDOW', '20'))
+
+# Conversion Cache Configuration
+# Directory of cached Docling conversions, keyed by file hash and converter configuration
+CONVERSION_CACHE_PATH = os.getenv('CHUNKER_CONVERSION_CACHE_PATH', './conversion_cache')
+# Size of the conversion cache in MB, least recently used entries are evicted beyond it (0 = no cache)
+CONVERSION_CACHE_MB = int(os.getenv('CHUNKER_CONVERSION_CACHE_MB', '2048'))
 
 # File Storage Configuration
 DOCUMENTS_STORAGE_PATH = os.getenv('DOCUMENTS_STORAGE_PATH', './documents')
@@ -28,4 +56,27 @@ ORACLE_DSN = os.getenv('ORACLE_DSN') or f'{ORACLE_HOST}:{ORACLE_PORT}/{ORACLE_SE
 ORACLE_POOL_MIN = int(os.getenv('ORACLE_POOL_MIN', '2'))
 ORACLE_POOL_MAX = int(os.getenv('ORACLE_POOL_MAX', '10'))
 ORACLE_POOL_INCREMENT = int(os.getenv('ORACLE_POOL_INCREMENT', '1'))
-ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', '60'))
\ No newline at end of file
+ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', '60'))
+
+# Queue Configuration
+# Message payload, raw (binary layout) or json; must match in all services and the queue tables of pdb_queues.sql
+QUEUE_PAYLOAD = os.getenv('ORACLE_QUEUE_PAYLOAD', 'raw').lower()
+# Sharded Transactional Event Queues (thick mode), false for the classic queues of an earlier setup
+QUEUE_SHARDED = os.getenv('ORACLE_QUEUE_SHARDED', 'True').lower() in ('true', '1', 'yes')
+# Wait for documents in a blocking dequeue (poll) or on AQ notifications without holding a pooled connection (notify, thick mode)
+QUEUE_CONSUMER = os.getenv('ORACLE_QUEUE_CONSUMER', 'poll').lower()
+# Oracle Client libraries for thick mode (empty searches the system library path)
+ORACLE_CLIENT_LIB_DIR = os.getenv('ORACLE_CLIENT_LIB_DIR', '')
+# Retries of a document that failed to process before it goes to the vector_exception queue
+QUEUE_MAX_RETRIES = int(os.getenv('ORACLE_QUEUE_MAX_RETRIES', '5'))
+# Delay of the first retry in seconds, doubled on each further one up to the longest delay
+QUEUE_RETRY_DELAY_S = float(os.getenv('ORACLE_QUEUE_RETRY_DELAY_S', '10'))
+QUEUE_MAX_RETRY_DELAY_S = float(os.getenv('ORACLE_QUEUE_MAX_RETRY_DELAY_S', '600'))
+# Consumer group the replicas dequeue documents as, sharing the shards of the sharded vector_pending_document
+QUEUE_CONSUMER_GROUP = os.getenv('ORACLE_QUEUE_CONSUMER_GROUP', 'CHUNKER').upper()
+# Queue backend: aq (Oracle AQ), memory (in-process, for single-process runs) or sqlite (a SQLite file shared by the services of one host)
+QUEUE_BACKEND = os.getenv('QUEUE_BACKEND', 'aq').lower()
+# SQLite file of the sqlite backend, the same file for every service (relative to the service's directory)
+QUEUE_SQLITE_PATH = os.getenv('QUEUE_SQLITE_PATH', '../cache/queues.sqlite3')
+# Seconds a document leased from a memory or sqlite queue stays hidden before it is delivered again, above the longest conversion
+QUEUE_VISIBILITY_TIMEOUT_S = float(os.getenv('QUEUE_VISIBILITY_TIMEOUT_S', '1800'))
@@ -1,4 +1,4 @@
-from .connection import init_database, get_db_pool, is_db_ready, cleanup_database
+from .connection import init_database, get_db_pool, is_db_ready, cleanup_database, connect_for_notifications
 from .operations import update_document_with_chunks, store_document_chunks_without_embeddings
 
 __all__ = [
@@ -6,6 +6,7 @@ __all__ = [
     'get_db_pool', 
     'is_db_ready',
     'cleanup_database',
+    'connect_for_notifications',
     'update_document_with_chunks',
     'store_document_chunks_without_embeddings'
 ]
\ No newline at end of file
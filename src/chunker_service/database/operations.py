@@ -4,71 +4,93 @@ from .connection import get_db_pool, is_db_ready
 
 logger = logging.getLogger(__name__)
 
-def update_document_with_chunks(document_id, chunks_count, title=None, page_count=None):
-    """Update document with chunks count and metadata after processing."""
+def update_document_with_chunks(document_id, chunks_count, title=None, page_count=None, connection=None):
+    """Update document with chunks count and metadata after processing.
+    
+    Commits on a pooled connection; with a connection passed in, the update is
+    left to the caller's transaction.
+    """
     if not is_db_ready():
         raise Exception("Database not ready")
     
-    db_pool = get_db_pool()
-    with db_pool.acquire() as connection:
-        cursor = connection.cursor()
-        
-        # Build update query dynamically based on provided parameters
-        update_fields = ["chunks_count = :chunks_count", "processing_status = 'chunked'", "processed_time = CURRENT_TIMESTAMP"]
-        params = {'chunks_count': chunks_count, 'doc_id': document_id}
-        
-        if title:
-            update_fields.append("title = :title")
-            params['title'] = title
-            
-        if page_count is not None:
-            update_fields.append("page_count = :page_count")
-            params['page_count'] = page_count
-        
-        # Update document with metadata
-        cursor.execute(f"""
-            UPDATE documents 
-            SET {', '.join(update_fields)}
-            WHERE id = :doc_id
-        """, params)
+    if connection is None:
+        with get_db_pool().acquire() as connection:
+            _update_document(connection, document_id, chunks_count, title, page_count)
+            connection.commit()
+        return
+    _update_document(connection, document_id, chunks_count, title, page_count)
+
+def _update_document(connection, document_id, chunks_count, title, page_count):
+    cursor = connection.cursor()
+    
+    # Build update query dynamically based on provided parameters
+    update_fields = ["chunks_count = :chunks_count", "processing_status = 'chunked'", "processed_time = CURRENT_TIMESTAMP"]
+    params = {'chunks_count': chunks_count, 'doc_id': document_id}
+    
+    if title:
+        update_fields.append("title = :title")
+        params['title'] = title
         
-        connection.commit()
-        logger.info(f"Updated document {document_id} with {chunks_count} chunks")
+    if page_count is not None:
+        update_fields.append("page_count = :page_count")
+        params['page_count'] = page_count
+    
+    # Update document with metadata
+    cursor.execute(f"""
+        UPDATE documents 
+        SET {', '.join(update_fields)}
+        WHERE id = :doc_id
+    """, params)
+    
+    logger.info(f"Updated document {document_id} with {chunks_count} chunks")
+
 
+def store_document_chunks_without_embeddings(document_id, chunks, first_index=0, replace=True, connection=None):
+    """Store document chunks without embeddings in one array-DML round trip.
 
-def store_document_chunks_without_embeddings(document_id, chunks):
-    """Store document chunks without embeddings."""
+    replace clears the document's existing chunks first; streaming conversion
+    stores later windows with replace=False, numbered on from first_index.
+    Commits on a pooled connection; with a connection passed in, the rows are
+    left to the caller's transaction. Returns the number of chunks stored.
+    """
     if not is_db_ready():
         raise Exception("Database not ready")
     
-    db_pool = get_db_pool()
-    with db_pool.acquire() as connection:
-        cursor = connection.cursor()
-        
+    if connection is None:
+        with get_db_pool().acquire() as connection:
+            stored_chunks = _insert_chunks(connection, document_id, chunks, first_index, replace)
+            connection.commit()
+            return stored_chunks
+    return _insert_chunks(connection, document_id, chunks, first_index, replace)
+
+def _insert_chunks(connection, document_id, chunks, first_index, replace):
+    cursor = connection.cursor()
+    
+    if replace:
         # Clear existing chunks for this document
         cursor.execute("DELETE FROM document_chunks WHERE document_id = :doc_id", [document_id])
-        
-        # Insert new chunks without embeddings
-        stored_chunks = 0
-        for i, chunk_text in enumerate(chunks):
-            # Validate chunk text before insertion
-            if not chunk_text or chunk_text.strip() == '':
-                logger.warning(f"Skipping empty chunk {i} for document {document_id}")
-                continue
-                
-            cursor.execute("""
-                INSERT INTO document_chunks (document_id, chunk_index, chunk_text, chunk_size)
-                VALUES (:doc_id, :chunk_idx, :chunk_text, :chunk_size)
-            """, {
-                'doc_id': document_id,
-                'chunk_idx': stored_chunks,  # Use stored_chunks counter for sequential indexing
-                'chunk_text': chunk_text,
-                'chunk_size': len(chunk_text)
-            })
-            stored_chunks += 1
-        
-        connection.commit()
-        logger.info(f"Stored {stored_chunks} chunks without embeddings for document {document_id} (from {len(chunks)} total chunks)")
+    
+    # Skip empty chunks, numbering the rest sequentially
+    rows = []
+    for i, chunk_text in enumerate(chunks):
+        if not chunk_text or chunk_text.strip() == '':
+            logger.warning(f"Skipping empty chunk {i} for document {document_id}")
+            continue
+        rows.append({
+            'doc_id': document_id,
+            'chunk_idx': first_index + len(rows),
+            'chunk_text': chunk_text,
+            'chunk_size': len(chunk_text)
+        })
+    
+    if rows:
+        cursor.executemany("""
+            INSERT INTO document_chunks (document_id, chunk_index, chunk_text, chunk_size)
+            VALUES (:doc_id, :chunk_idx, :chunk_text, :chunk_size)
+        """, rows)
+    
+    logger.info(f"Stored {len(rows)} chunks without embeddings for document {document_id} (from {len(chunks)} total chunks)")
+    return len(rows)
 
 def update_chunk_embedding(document_id, chunk_index, embedding):
     """Update a specific chunk with its embedding."""
@@ -1,10 +1,45 @@
-from .document import chunk_text, process_document_from_file
-from .queue import enqueue_document_for_chunking, dequeue_document_for_chunking, enqueue_chunk_for_embedding
+from .chunking import iter_chunks, iter_document_chunks
+from .document import (
+    chunk_text, convert_document, convert_window, store_chunks, store_converted_document, process_document_from_file
+)
+from .conversion import (
+    init_conversion_pool, get_conversion_pool, conversion_capacity, submit_conversion, convert,
+    reset_conversion_pool, get_conversion_stats, cleanup_conversion_pool
+)
+from .conversion_cache import get_conversion_cache_stats
+from .processing import process_document, stream_document, get_processing_stats
+from .queue import (
+    init_queue_consumer, cleanup_queue_consumer, get_queue_stats,
+    enqueue_document_for_chunking, lease_document_for_chunking,
+    enqueue_chunk_for_embedding, enqueue_chunks_for_embedding
+)
 
 __all__ = [
+    'iter_chunks',
+    'iter_document_chunks',
     'chunk_text',
+    'convert_document',
+    'convert_window',
+    'store_chunks',
+    'store_converted_document',
     'process_document_from_file',
+    'init_conversion_pool',
+    'get_conversion_pool',
+    'conversion_capacity',
+    'submit_conversion',
+    'convert',
+    'reset_conversion_pool',
+    'get_conversion_stats',
+    'cleanup_conversion_pool',
+    'get_conversion_cache_stats',
+    'process_document',
+    'stream_document',
+    'get_processing_stats',
+    'init_queue_consumer',
+    'cleanup_queue_consumer',
+    'get_queue_stats',
     'enqueue_document_for_chunking',
-    'dequeue_document_for_chunking',
-    'enqueue_chunk_for_embedding'
+    'lease_document_for_chunking',
+    'enqueue_chunk_for_embedding',
+    'enqueue_chunks_for_embedding'
 ]
\ No newline at end of file
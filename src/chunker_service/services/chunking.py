@@ -0,0 +1,311 @@
+"""
+Streaming text chunker.
+
+Chunks are sized in units, either characters or tokens of the embedding model's
+tokenizer, and yielded one at a time. Each chunk ends at the last break point
+inside its window, and the next chunk starts `overlap` units before that break.
+
+Break points are searched backwards from the window end with str.rfind, so each
+character is looked at a bounded number of times and a whole document is
+chunked in linear time:
+
+- space: the last ' ' in the window (the original chunk_text behaviour,
+  byte-for-byte)
+- sentence: the last sentence end ('. ', '! ', '? ') or newline in the second
+  half of the window, falling back to the last space
+
+Token offsets are computed once per text by the tokenizer. A chunk always moves
+the start forward: when the overlap would reach back to or before the previous
+start (a break point right after the start, e.g. before a long URL), the next
+chunk starts at the break instead.
+
+iter_document_chunks chunks a converted DoclingDocument by its item tree
+instead (CHUNKER_MODE=structure): headings, paragraphs, list items and tables
+are packed into chunks up to the size budget, and every chunk starts with its
+heading path as a one-line prefix, so no overlap is needed between chunks.
+Paragraphs are cut where a chunk is full, preferably at a sentence end, tables
+and list items not at all unless they exceed a whole chunk.
+"""
+
+import array
+import logging
+from bisect import bisect_left
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_UNIT, CHUNK_BREAK_AT, CHUNK_TOKENIZER
+
+logger = logging.getLogger(__name__)
+
+UNITS = ('chars', 'tokens')
+BREAKS = ('space', 'sentence')
+MODES = ('text', 'structure')
+
+# Item labels that carry no retrievable content
+_SKIPPED_LABELS = ('page_header', 'page_footer', 'picture')
+_HEADING_LABELS = ('title', 'section_header')
+
+# Lazy initialization of the tokenizer, only needed for token sizing
+_tokenizer = None
+
+
+def get_tokenizer():
+    """Get the fast tokenizer of the embedding model (transformers comes with docling)."""
+    global _tokenizer
+    if _tokenizer is None:
+        from transformers import AutoTokenizer
+
+        _tokenizer = AutoTokenizer.from_pretrained(CHUNK_TOKENIZER, use_fast=True)
+        logger.info(f"Chunking by tokens of {CHUNK_TOKENIZER}")
+    return _tokenizer
+
+def token_starts(text, tokenizer=None):
+    """Character offset where each token of the text starts."""
+    tokenizer = tokenizer or get_tokenizer()
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True, verbose=False)
+    return array.array('q', (start for start, _ in encoding['offset_mapping']))
+
+def count_units(text, unit, tokenizer=None):
+    """Length of text in chunking units."""
+    if unit == 'chars':
+        return len(text)
+    tokenizer = tokenizer or get_tokenizer()
+    return len(tokenizer(text, add_special_tokens=False, verbose=False)['input_ids'])
+
+def last_sentence_end(text, lower, limit):
+    """Offset of the last sentence-ending whitespace or newline in (lower, limit], or -1."""
+    end = text.rfind('\n', lower + 1, limit + 1)
+    for mark in ('. ', '! ', '? '):
+        found = text.rfind(mark, lower, limit + 1)
+        if found != -1 and found + 1 > end:
+            end = found + 1
+    return end
+
+
+def iter_chunks(text, chunk_size=None, overlap=None, unit=None, break_at=None, tokenizer=None):
+    """Yield overlapping chunks of text.
+
+    chunk_size and overlap are counted in the given unit ('chars' or 'tokens').
+    With the char defaults this yields exactly what chunk_text used to return.
+    """
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    overlap = CHUNK_OVERLAP if overlap is None else overlap
+    unit = unit or CHUNK_UNIT
+    break_at = break_at or CHUNK_BREAK_AT
+
+    if chunk_size <= 0 or overlap < 0:
+        raise ValueError(f"Invalid chunking: size {chunk_size}, overlap {overlap}")
+    if unit not in UNITS:
+        raise ValueError(f"Unknown chunk unit '{unit}', expected one of: {', '.join(UNITS)}")
+    if break_at not in BREAKS:
+        raise ValueError(f"Unknown chunk break '{break_at}', expected one of: {', '.join(BREAKS)}")
+
+    # Validate text input - yield nothing if no meaningful content
+    if not text or text.strip() == '':
+        logger.warning("Empty or whitespace-only text provided for chunking")
+        return
+
+    # starts[i] is the character offset of unit i
+    by_chars = unit == 'chars'
+    starts = range(len(text)) if by_chars else token_starts(text, tokenizer)
+
+    if not starts:
+        yield text
+        return
+
+    first = 0
+    while True:
+        start = starts[first]
+        if first + chunk_size >= len(starts):
+            yield text[start:]
+            return
+
+        limit = starts[first + chunk_size]
+        end = -1
+        if break_at == 'sentence':
+            end = last_sentence_end(text, starts[first + chunk_size // 2], limit)
+        if end == -1:
+            # Last space after the start, up to and including the limit
+            end = text.rfind(' ', start + 1, limit + 1)
+        if end == -1:  # No space found, force break
+            end = limit
+
+        yield text[start:end]
+
+        # First unit at or after the break, then back by the overlap
+        following = end if by_chars else bisect_left(starts, end, first + 1)
+        first = following - overlap if following - overlap > first else following
+
+
+def item_text(item, document=None):
+    """Chunk text of one document item, or None for items without content."""
+    label = getattr(item.label, 'value', item.label)
+    if label in _SKIPPED_LABELS:
+        return None
+    if label == 'table':
+        try:
+            markdown = item.export_to_markdown(doc=document)
+        except TypeError:  # docling-core before 2.8 takes no document
+            markdown = item.export_to_markdown()
+        return markdown.strip() or None
+    text = (getattr(item, 'text', None) or '').strip()
+    if not text:
+        return None
+    if label == 'list_item':
+        return f"{getattr(item, 'marker', None) or '-'} {text}"
+    return text
+
+def document_blocks(document):
+    """Yield the headings and content items of a DoclingDocument as (kind, level, text).
+
+    kind is 'heading' (level 0 for the title), 'table', 'list_item' or 'text'.
+    Blocks are plain tuples, so conversion workers can send them to the parent.
+    """
+    for item, _ in document.iterate_items():
+        label = getattr(item.label, 'value', item.label)
+        if label in _HEADING_LABELS:
+            text = (item.text or '').strip()
+            if text:
+                yield 'heading', 0 if label == 'title' else getattr(item, 'level', 1), text
+            continue
+
+        text = item_text(item, document)
+        if text is not None:
+            yield label if label in ('table', 'list_item') else 'text', 0, text
+
+def iter_document_chunks(document, chunk_size=None, unit=None, tokenizer=None):
+    """Yield chunks of a DoclingDocument packed from whole items under a heading prefix."""
+    return iter_block_chunks(document_blocks(document), chunk_size, unit, tokenizer)
+
+def iter_block_chunks(blocks, chunk_size=None, unit=None, tokenizer=None):
+    """Yield chunks packed from document blocks under a heading prefix.
+
+    Blocks are packed in order up to chunk_size units, the heading prefix of
+    the chunk included, so adjacent sections share a chunk with their
+    headings inline; a heading with nothing of its section after it moves to
+    the prefix of the next chunk instead. A paragraph that does not fit fills
+    the rest of the chunk and continues in the next one, cut at a sentence end
+    within the last eighth of the chunk, or else at a space. Tables and list
+    items move whole to the next chunk and are only cut when larger than a
+    chunk. The prefix takes at most a quarter of the chunk, outer headings are
+    dropped first. Chunks do not overlap. blocks may be any iterable, e.g. the
+    blocks of consecutive page windows, and is consumed lazily.
+    """
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    unit = unit or CHUNK_UNIT
+
+    def measure(text):
+        return count_units(text, unit, tokenizer)
+
+    def unit_starts(text):
+        return range(len(text)) if unit == 'chars' else token_starts(text, tokenizer)
+
+    # (level, text) of the enclosing headings, outermost first
+    headings = []
+    prefix = ''
+    parts = []
+    used = 0
+    # Inline headings at the end of parts, with no item of their section after them yet
+    trailing_headings = 0
+
+    def heading_prefix():
+        """Prefix of a chunk starting under the current headings, and its size."""
+        limit = chunk_size // 4
+        for first in range(len(headings)):
+            path = ' > '.join(heading for _, heading in headings[first:]) + '\n'
+            size = measure(path)
+            if size <= limit:
+                return path, size
+        if not headings or limit < 2:
+            return '', 0
+        # Even the innermost heading is too long, keep its leading units
+        heading = headings[-1][1]
+        starts = unit_starts(heading)
+        if len(starts) >= limit:
+            heading = heading[:starts[limit - 1]].rstrip()
+        return heading + '\n', measure(heading + '\n')
+
+    def cut(text, starts, first, room):
+        """Offset to end the part of text from unit first at, within room units, or -1."""
+        start, limit = starts[first], starts[first + room]
+        end = last_sentence_end(text, start, limit)
+        # A sentence end leaving more than an eighth of the chunk empty gives way to the last space
+        if end <= start or (limit - end) * room > (limit - start) * (chunk_size // 8):
+            end = text.rfind(' ', start + 1, limit + 1)
+        if end <= start and not parts:
+            # Nothing else in the chunk, force a break
+            end = limit
+        return end
+
+    def flush():
+        nonlocal parts, used, trailing_headings
+        # Headings whose section moves to the next chunk are only part of its prefix
+        if trailing_headings:
+            del parts[-trailing_headings:]
+        if parts:
+            yield prefix + '\n'.join(parts)
+        parts = []
+        used = 0
+        trailing_headings = 0
+
+    for kind, level, text in blocks:
+        if kind == 'heading':
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, text))
+
+            if not parts:
+                # The heading is the prefix of the chunk that follows
+                prefix, used = heading_prefix()
+                continue
+            # The section shares the current chunk, heading kept inline
+            text = '#' * max(level, 1) + ' ' + text
+
+        size = measure(text) + (1 if parts else 0)
+        if used + size <= chunk_size:
+            parts.append(text)
+            used += size
+            trailing_headings = trailing_headings + 1 if kind == 'heading' else 0
+            continue
+
+        if kind == 'heading':
+            # The heading starts the next chunk, so it is only part of its prefix
+            yield from flush()
+            prefix, used = heading_prefix()
+            continue
+
+        # The item overflows the chunk: fill the rest of it with the leading part of a paragraph
+        # (or of any item larger than a whole chunk) and carry the rest over
+        starts = unit_starts(text)
+        first = 0
+        while True:
+            room = chunk_size - used - (1 if parts else 0)
+            if len(starts) - first <= room:
+                parts.append(text[starts[first]:].strip())
+                used += len(starts) - first + (1 if len(parts) > 1 else 0)
+                trailing_headings = 0
+                break
+            if kind == 'text' or not parts:
+                end = cut(text, starts, first, room) if room > 0 else -1
+                if end > starts[first]:
+                    parts.append(text[starts[first]:end].strip())
+                    trailing_headings = 0
+                    first = end if unit == 'chars' else bisect_left(starts, end, first + 1)
+            yield from flush()
+            prefix, used = heading_prefix()
+
+    yield from flush()
+
+def iter_window_chunks(texts, chunk_size=None, overlap=None, unit=None, break_at=None, tokenizer=None):
+    """Yield iter_chunks chunks of consecutive texts, e.g. the markdown of page windows.
+
+    The last chunk of each text is only complete once the next text is known,
+    so it is carried over and chunked again at the front of the next one; the
+    overlap therefore spans window boundaries as it does inside a window.
+    """
+    carry = ''
+    for text in texts:
+        if not text or text.strip() == '':
+            continue
+        chunks = list(iter_chunks(carry + '\n\n' + text if carry else text, chunk_size, overlap, unit, break_at, tokenizer))
+        carry = chunks.pop() if chunks else ''
+        yield from chunks
+    if carry:
+        yield carry
@@ -0,0 +1,191 @@
+"""
+Document conversion in a pool of worker processes.
+
+Docling PDF conversion is CPU-bound and holds the GIL, so converting in the
+chunking worker thread handles one document at a time per node. The pool runs
+conversions (convert_document, or convert_window for one page window) in
+CONVERSION_WORKERS spawned processes instead; each one warms its own converter
+from get_converter when it starts and keeps it for every task. Only the file
+path goes to a worker and only chunks or window text come back, so the
+database stays in the parent.
+
+Per-task limits, enforced inside the worker process:
+
+- time: SIGALRM after CONVERSION_TIMEOUT_S raises TimeoutError in the task
+- memory: the address space is capped at the warmed size plus
+  CONVERSION_MEMORY_MB, so a runaway document fails with MemoryError instead of
+  taking the node down
+
+A worker that dies anyway (OOM killer, crash in native code) breaks the pool;
+its in-flight documents fail with BrokenProcessPool and the pool is recreated
+on the next submit.
+"""
+
+import logging
+import multiprocessing
+import resource
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from config import CONVERSION_WORKERS, CONVERSION_MEMORY_MB, CONVERSION_TIMEOUT_S
+from .document import get_converter
+
+logger = logging.getLogger(__name__)
+
+# Global state
+_pool = None
+_pool_workers = 0
+_lock = threading.Lock()
+_stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'timeouts': 0, 'restarts': 0, 'task_s': 0.0}
+_started_at = time.monotonic()
+
+
+def _address_space_bytes():
+    """Current virtual memory size of this process."""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[0]) * resource.getpagesize()
+
+def _on_timeout(signum, frame):
+    raise TimeoutError(f"Conversion exceeded {CONVERSION_TIMEOUT_S}s")
+
+def _init_worker(memory_mb):
+    """Warm the converter once per worker process and apply the memory limit."""
+    logging.basicConfig(level=logging.INFO)
+    # Shutdown signals are handled by the parent
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGALRM, _on_timeout)
+
+    converter = get_converter()
+    try:
+        from docling.datamodel.base_models import InputFormat
+
+        # Load the PDF pipeline models now rather than on the first document
+        converter.initialize_pipeline(InputFormat.PDF)
+    except Exception as e:
+        logger.warning(f"Could not warm the PDF pipeline: {e}")
+
+    if memory_mb:
+        try:
+            limit = _address_space_bytes() + memory_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, resource.RLIM_INFINITY))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not limit conversion memory: {e}")
+
+def _run(function, args, timeout_s):
+    """Run one conversion under the time limit (in a worker process), returning (result, seconds)."""
+    started = time.perf_counter()
+    if timeout_s:
+        signal.alarm(timeout_s)
+    try:
+        result = function(*args)
+    finally:
+        signal.alarm(0)
+    return result, time.perf_counter() - started
+
+
+def init_conversion_pool(workers=None):
+    """Start the conversion pool (workers <= 0 keeps conversion in-process)."""
+    global _pool, _pool_workers
+    workers = CONVERSION_WORKERS if workers is None else workers
+
+    with _lock:
+        if _pool is not None or workers <= 0:
+            return _pool
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            # Docling and torch are not fork-safe once threads are running
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(CONVERSION_MEMORY_MB,)
+        )
+        _pool_workers = workers
+        logger.info(f"Conversion pool started with {workers} worker processes "
+                    f"(limits: {CONVERSION_TIMEOUT_S or 'no'} s, {CONVERSION_MEMORY_MB or 'no'} MB per task)")
+        return _pool
+
+def get_conversion_pool():
+    """Get the conversion pool, or None when converting in-process."""
+    return _pool
+
+def conversion_capacity():
+    """Documents converted concurrently."""
+    return _pool_workers or 1
+
+def submit_conversion(function, *args):
+    """Run a conversion function in the pool, returning a Future of (result, seconds)."""
+    for attempt in (1, 2):
+        pool = _pool or init_conversion_pool(_pool_workers or None)
+        try:
+            future = pool.submit(_run, function, args, CONVERSION_TIMEOUT_S)
+            break
+        except BrokenProcessPool:
+            if attempt == 2:
+                raise
+            reset_conversion_pool()
+
+    with _lock:
+        _stats['submitted'] += 1
+    future.add_done_callback(_record)
+    return future
+
+def _record(future):
+    with _lock:
+        error = future.exception()
+        if error is None:
+            _stats['completed'] += 1
+            _stats['task_s'] += future.result()[1]
+        else:
+            _stats['failed'] += 1
+            if isinstance(error, TimeoutError):
+                _stats['timeouts'] += 1
+
+def convert(function, *args):
+    """Run a conversion function in the pool, or in this thread when there is no pool."""
+    if _pool is None and not _pool_workers:
+        return function(*args)
+    try:
+        result, _ = submit_conversion(function, *args).result()
+    except BrokenProcessPool:
+        reset_conversion_pool()
+        raise
+    return result
+
+def reset_conversion_pool():
+    """Replace a broken pool; the next submit starts fresh worker processes."""
+    global _pool
+    with _lock:
+        pool, _pool = _pool, None
+        if pool is not None:
+            _stats['restarts'] += 1
+    if pool is not None:
+        logger.warning("Conversion pool broken (a worker process died), restarting it")
+        pool.shutdown(wait=False)
+
+def get_conversion_stats():
+    """Throughput and failure counts of the conversion pool (a task is a document or a page window)."""
+    with _lock:
+        stats = dict(_stats)
+    elapsed_min = (time.monotonic() - _started_at) / 60
+    completed = stats['completed']
+    return {
+        'workers': _pool_workers,
+        'in_flight': stats['submitted'] - completed - stats['failed'],
+        'completed': completed,
+        'failed': stats['failed'],
+        'timeouts': stats['timeouts'],
+        'restarts': stats['restarts'],
+        'mean_task_s': round(stats['task_s'] / completed, 3) if completed else None,
+        'tasks_per_minute': round(completed / elapsed_min, 2) if elapsed_min else 0.0
+    }
+
+def cleanup_conversion_pool():
+    """Stop the worker processes once their current documents are done."""
+    global _pool, _pool_workers
+    with _lock:
+        pool, _pool = _pool, None
+        _pool_workers = 0
+    if pool is not None:
+        pool.shutdown(wait=False)
+        logger.info("Conversion pool stopped")
@@ -0,0 +1,215 @@
+"""
+On-disk cache of Docling conversion results.
+
+Converting a PDF is by far the most expensive step of processing a document,
+and its result only depends on the file content and the converter. Every
+conversion is therefore stored as the DoclingDocument JSON (gzip-compressed)
+under CONVERSION_CACHE_PATH, keyed by:
+
+- the SHA-256 of the file, as api_service computes it for documents.file_hash
+- the converter configuration (docling and docling-core versions, pipeline
+  options)
+- the page range, for a page window of a streamed PDF
+
+Chunking runs on the loaded document, so reprocessing a document, uploading the
+same file again or changing the chunk size, unit or mode all skip conversion.
+
+The cache is shared by the conversion worker processes: entries are written to
+a temporary file and renamed into place, a hit refreshes the entry's mtime, and
+after each write the least recently used entries are removed until the cache
+fits in CONVERSION_CACHE_MB. Lookups happen in the worker processes, so their
+outcome is returned with the conversion result and counted in the parent with
+record_lookup.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from config import CONVERSION_CACHE_PATH, CONVERSION_CACHE_MB
+
+logger = logging.getLogger(__name__)
+
+ENTRY_SUFFIX = '.json.gz'
+
+# Global state
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'bytes_saved': 0, 'seconds_saved': 0.0, 'stored': 0, 'evicted': 0}
+
+
+def is_cache_enabled():
+    """Whether conversion results are cached (CONVERSION_CACHE_MB > 0)."""
+    return CONVERSION_CACHE_MB > 0
+
+def file_sha256(full_file_path):
+    """SHA-256 of a file, the same digest api_service stores as documents.file_hash."""
+    digest = hashlib.sha256()
+    with open(full_file_path, 'rb') as file:
+        for block in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_key(file_hash, fingerprint, page_range=None):
+    """Cache key of a conversion of the file, or of pages first..last of it."""
+    pages = f"{page_range[0]}-{page_range[1]}" if page_range else 'all'
+    digest = hashlib.sha256(f"{fingerprint}\n{pages}".encode()).hexdigest()[:16]
+    return f"{file_hash}-{pages}-{digest}"
+
+def _entry_path(key):
+    return os.path.join(CONVERSION_CACHE_PATH, key + ENTRY_SUFFIX)
+
+def _entries():
+    """(mtime, size, path) of every cache entry."""
+    entries = []
+    try:
+        with os.scandir(CONVERSION_CACHE_PATH) as scan:
+            for entry in scan:
+                if entry.name.endswith(ENTRY_SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # evicted by another process
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def load_document(key):
+    """Load a cached conversion as (DoclingDocument, entry metadata), or None."""
+    path = _entry_path(key)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            entry = json.load(file)
+    except FileNotFoundError:
+        return None
+
+    from docling_core.types.doc import DoclingDocument
+
+    document = DoclingDocument.model_validate(entry.pop('document'))
+    try:
+        # Most recently used entries are evicted last
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+    return document, entry
+
+def store_document(key, document, source_bytes, convert_s):
+    """Cache a converted DoclingDocument, returning the number of entries evicted to make room."""
+    os.makedirs(CONVERSION_CACHE_PATH, exist_ok=True)
+    entry = {
+        'document': document.export_to_dict(),
+        'page_count': len(document.pages),
+        'source_bytes': source_bytes,
+        'convert_s': round(convert_s, 3),
+        'created': time.time()
+    }
+
+    # Readers never see a partly written entry
+    descriptor, temporary_path = tempfile.mkstemp(dir=CONVERSION_CACHE_PATH, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as raw, gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=5) as file:
+            file.write(json.dumps(entry, separators=(',', ':')).encode('utf-8'))
+        os.replace(temporary_path, _entry_path(key))
+    except BaseException:
+        try:
+            os.remove(temporary_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return evict()
+
+def evict(max_bytes=None):
+    """Remove least recently used entries until the cache fits in max_bytes (CONVERSION_CACHE_MB)."""
+    max_bytes = CONVERSION_CACHE_MB * 1024 * 1024 if max_bytes is None else max_bytes
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+
+    evicted = 0
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            evicted += 1
+        except FileNotFoundError:
+            pass
+        total -= size
+
+    if evicted:
+        logger.info(f"Evicted {evicted} conversion cache entries, {total / 1024 / 1024:.1f} MB left")
+    return evicted
+
+def cached_conversion(full_file_path, convert, fingerprint, file_hash=None, page_range=None):
+    """Load a conversion from the cache, or run convert() and cache its DoclingDocument.
+
+    Returns (document, lookup); lookup describes the cache outcome for
+    record_lookup and is None when the cache is disabled. Cache errors are
+    logged and never fail the conversion.
+    """
+    if not is_cache_enabled():
+        return convert(), None
+
+    source_bytes = os.path.getsize(full_file_path)
+    key = None
+    try:
+        key = cache_key(file_hash or file_sha256(full_file_path), fingerprint, page_range)
+        cached = load_document(key)
+        if cached is not None:
+            document, entry = cached
+            return document, {'hit': True, 'source_bytes': source_bytes, 'convert_s': entry.get('convert_s', 0.0)}
+    except Exception as e:
+        logger.warning(f"Could not read conversion cache entry {key}: {e}")
+
+    started = time.perf_counter()
+    document = convert()
+    convert_s = time.perf_counter() - started
+
+    lookup = {'hit': False, 'source_bytes': source_bytes, 'convert_s': convert_s, 'stored': False, 'evicted': 0}
+    if key is not None:
+        try:
+            lookup['evicted'] = store_document(key, document, source_bytes, convert_s)
+            lookup['stored'] = True
+        except Exception as e:
+            logger.warning(f"Could not cache conversion of {full_file_path}: {e}")
+    return document, lookup
+
+def record_lookup(lookup):
+    """Count the cache outcome returned with a conversion result."""
+    if not lookup:
+        return
+    with _lock:
+        if lookup['hit']:
+            _stats['hits'] += 1
+            _stats['bytes_saved'] += lookup['source_bytes']
+            _stats['seconds_saved'] += lookup['convert_s']
+        else:
+            _stats['misses'] += 1
+            _stats['stored'] += 1 if lookup.get('stored') else 0
+            _stats['evicted'] += lookup.get('evicted', 0)
+
+def get_conversion_cache_stats():
+    """Hit rate and savings of the conversion cache (a lookup is a document or a page window)."""
+    with _lock:
+        stats = dict(_stats)
+    entries = _entries() if is_cache_enabled() else []
+    lookups = stats['hits'] + stats['misses']
+    return {
+        'enabled': is_cache_enabled(),
+        'hits': stats['hits'],
+        'misses': stats['misses'],
+        'hit_rate': round(stats['hits'] / lookups, 3) if lookups else None,
+        # Source document bytes whose conversion was skipped
+        'bytes_saved': stats['bytes_saved'],
+        'seconds_saved': round(stats['seconds_saved'], 1),
+        'stored': stats['stored'],
+        'evicted': stats['evicted'],
+        'entries': len(entries),
+        'size_mb': round(sum(size for _, size, _ in entries) / 1024 / 1024, 1),
+        'max_mb': CONVERSION_CACHE_MB
+    }
@@ -1,17 +1,22 @@
 import os
 import logging
-from config import CHUNK_SIZE, CHUNK_OVERLAP, DOCUMENTS_STORAGE_PATH
-from database import store_document_chunks_without_embeddings, update_document_with_chunks
-from .queue import enqueue_chunk_for_embedding
+from config import CHUNK_MODE, DOCUMENTS_STORAGE_PATH
+from database import get_db_pool, store_document_chunks_without_embeddings, update_document_with_chunks
+from .queue import enqueue_chunks_for_embedding, chunk_queue
+from .chunking import iter_chunks, iter_document_chunks, document_blocks
+from .conversion_cache import cached_conversion, record_lookup
 
 logger = logging.getLogger(__name__)
 
 # Lazy initialization of docling converter to reduce startup memory
 converter = None
+# Pipeline options of the converter, part of the conversion cache key
+converter_options = None
+fingerprint = None
 
 def get_converter():
     """Get or initialize the document converter with lightweight configuration."""
-    global converter
+    global converter, converter_options
     if converter is None:
         from docling.document_converter import DocumentConverter
         
@@ -36,6 +41,7 @@ def get_converter():
                     InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
                 }
             )
+            converter_options = pipeline_options.model_dump_json()
             logger.info("Docling converter initialized with lightweight configuration")
             
         except Exception as e:
@@ -43,47 +49,17 @@ def get_converter():
             logger.warning(f"Failed to initialize lightweight config: {e}")
             logger.info("Falling back to default Docling configuration")
             converter = DocumentConverter()
+            converter_options = 'default'
             logger.info("Docling converter initialized with default configuration")
     
     return converter
 
 def chunk_text(text, chunk_size=None, overlap=None):
-    """Split text into overlapping chunks."""
-    if chunk_size is None:
-        chunk_size = CHUNK_SIZE
-    if overlap is None:
-        overlap = CHUNK_OVERLAP
-    
-    # Validate text input - return empty list if no meaningful content
-    if not text or text.strip() == '':
-        logger.warning("Empty or whitespace-only text provided for chunking")
-        return []
-    
-    if len(text) <= chunk_size:
-        return [text]
-    
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        if end >= len(text):
-            chunks.append(text[start:])
-            break
-        
-        # Find the last space before the chunk size limit
-        while end > start and text[end] != ' ':
-            end -= 1
-        
-        if end == start:  # No space found, force break
-            end = start + chunk_size
-        
-        chunks.append(text[start:end])
-        start = end - overlap
-    
-    return chunks
+    """Split text into overlapping chunks (see iter_chunks for the streaming form)."""
+    return list(iter_chunks(text, chunk_size, overlap))
 
-def process_document_from_file(document_id, file_path):
-    """Process document from file path and create chunks."""
+def document_path(file_path):
+    """Full path of a stored document."""
     
     # Ensure documents storage directory exists
     os.makedirs(DOCUMENTS_STORAGE_PATH, exist_ok=True)
@@ -93,58 +69,147 @@ def process_document_from_file(document_id, file_path):
     
     if not os.path.exists(full_file_path):
         raise FileNotFoundError(f"Document file not found: {full_file_path}")
-    
-    try:
-        # Convert document using docling
-        converter = get_converter()
-        result = converter.convert(full_file_path)
+    return full_file_path
+
+def converter_fingerprint():
+    """Docling versions and pipeline options the converter produces its results with."""
+    global fingerprint
+    if fingerprint is None:
+        from importlib.metadata import version
 
+        get_converter()
+        fingerprint = f"docling {version('docling')}, docling-core {version('docling-core')}, {converter_options}"
+    return fingerprint
+
+def converted_document(file_path, file_hash=None, page_range=None):
+    """Convert a stored document (or pages first..last of it) with Docling, unless already cached.
+
+    Returns (DoclingDocument, cache lookup) as cached_conversion does. file_hash
+    saves hashing the file again, e.g. for every page window.
+    """
+    full_file_path = document_path(file_path)
+
+    def convert():
+        if page_range:
+            return get_converter().convert(full_file_path, page_range=page_range).document
+        return get_converter().convert(full_file_path).document
+
+    return cached_conversion(full_file_path, convert, converter_fingerprint(), file_hash, page_range)
+
+def convert_document(file_path, file_hash=None):
+    """Convert a stored document with Docling (or load its cached conversion) and chunk it.
+
+    Only needs the file, so it also runs in the conversion worker processes;
+    the returned dict is plain data that can be sent back to the parent, and
+    'cache' is the lookup for record_lookup.
+    """
+    document, lookup = converted_document(file_path, file_hash)
+
+    if CHUNK_MODE == 'structure':
+        # Pack whole items of the document tree under their heading path
+        chunks = list(iter_document_chunks(document))
+        text_content = chunks[0] if chunks else ''
+    else:
         # Extract text content
-        text_content = result.document.export_to_markdown()
-        
+        text_content = document.export_to_markdown()
+
         # Validate extracted text content
         if not text_content or text_content.strip() == '':
-            logger.warning(f"Document {document_id} has no extractable text content")
             # Still create empty chunks list to avoid errors, but log the issue
             chunks = []
         else:
             # Chunk the text
             chunks = chunk_text(text_content)
-        
-        logger.info(f"Document {document_id} chunked into {len(chunks)} chunks")
-        
-        # Store chunks without embeddings in database
-        store_document_chunks_without_embeddings(document_id, chunks)
-        
-        # Update document metadata with extracted information
-        # Generate title from text content or use a default
-        if text_content and text_content.strip():
-            title = text_content[:100] + "..." if len(text_content) > 100 else text_content
-        else:
-            title = f"Document {document_id} (no text content)"
-            
-        update_document_with_chunks(
-            document_id, 
-            len(chunks), 
-            title=title,
-            page_count=len(result.document.pages)
+
+    # Generate title from text content
+    title = None
+    if text_content and text_content.strip():
+        title = text_content[:100] + "..." if len(text_content) > 100 else text_content
+
+    return {
+        'chunks': chunks,
+        'title': title,
+        'page_count': len(document.pages),
+        'cache': lookup
+    }
+
+def convert_window(file_path, first_page, last_page, file_hash=None):
+    """Convert pages first_page..last_page (1-based, inclusive) of a stored PDF.
+
+    Returns the window's markdown in text mode or its document blocks in
+    structure mode, for iter_window_chunks / iter_block_chunks, and the cache
+    lookup. Also runs in the conversion worker processes.
+    """
+    document, lookup = converted_document(file_path, file_hash, (first_page, last_page))
+
+    if CHUNK_MODE == 'structure':
+        return {'blocks': list(document_blocks(document)), 'cache': lookup}
+    return {'markdown': document.export_to_markdown(), 'cache': lookup}
+
+def store_chunks(document_id, chunks, first_index=0, replace=True, update_document=False, title=None, page_count=None):
+    """Store chunks and queue them for embedding in one transaction.
+
+    The rows go in with one array insert and the messages, which reference
+    the rows by chunk index, with one enqmany call on the same connection,
+    and a single commit makes both visible; with update_document the
+    document's chunk count, title, page count and status are updated in the
+    same transaction. A memory or sqlite chunk queue is outside the
+    transaction, so the messages are enqueued right after the commit (if the
+    process dies in between, the document's lease is redelivered and its
+    chunks stored again). Empty chunks are skipped. Returns the number of
+    chunks stored.
+    """
+    chunks = [chunk for chunk in chunks if chunk and chunk.strip()]
+
+    with get_db_pool().acquire() as connection:
+        stored = store_document_chunks_without_embeddings(
+            document_id, chunks, first_index=first_index, replace=replace, connection=connection
         )
-        
-        # Enqueue chunks for embedding processing (only non-empty chunks)
-        enqueued_chunks = 0
-        for i, chunk in enumerate(chunks):
-            if chunk and chunk.strip():  # Only enqueue non-empty chunks
-                enqueue_chunk_for_embedding(document_id, enqueued_chunks, chunk)
-                enqueued_chunks += 1
-        
-        logger.info(f"Successfully processed document {document_id}, queued {enqueued_chunks} chunks for embedding")
-        
-        return {
-            'document_id': document_id,
-            'chunks_count': len(chunks),
-            'message': f'Document processed and {enqueued_chunks} chunks queued for embedding'
-        }
+        if update_document:
+            update_document_with_chunks(
+                document_id, first_index + stored, title=title, page_count=page_count, connection=connection
+            )
+        if chunk_queue.transactional:
+            enqueue_chunks_for_embedding(document_id, first_index, stored, connection=connection)
+        connection.commit()
+    if not chunk_queue.transactional:
+        enqueue_chunks_for_embedding(document_id, first_index, stored)
+    return stored
+
+def store_converted_document(document_id, converted):
+    """Store the chunks of a converted document, update it and queue the chunks for embedding."""
+    chunks = [chunk for chunk in converted['chunks'] if chunk and chunk.strip()]
+    page_count = converted['page_count']
+
+    if not chunks:
+        logger.warning(f"Document {document_id} has no extractable text content")
+
+    chunks_per_page = f", {len(chunks) / page_count:.1f} per page" if page_count else ""
+    logger.info(f"Document {document_id} chunked into {len(chunks)} chunks ({CHUNK_MODE} mode{chunks_per_page})")
+    
+    # Store chunks, update the document (or use a default title) and enqueue the chunks, all in one commit
+    stored = store_chunks(
+        document_id,
+        chunks,
+        update_document=True,
+        title=converted['title'] or f"Document {document_id} (no text content)",
+        page_count=page_count
+    )
     
+    logger.info(f"Successfully processed document {document_id}, queued {stored} chunks for embedding")
+    
+    return {
+        'document_id': document_id,
+        'chunks_count': stored,
+        'message': f'Document processed and {stored} chunks queued for embedding'
+    }
+
+def process_document_from_file(document_id, file_path):
+    """Process document from file path and create chunks."""
+    try:
+        converted = convert_document(file_path)
+        record_lookup(converted['cache'])
+        return store_converted_document(document_id, converted)
     except Exception as e:
         logger.error(f"Error processing document {document_id}: {e}")
-        raise
\ No newline at end of file
+        raise
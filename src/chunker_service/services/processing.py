@@ -0,0 +1,175 @@
+"""
+Convert, chunk, store and enqueue one document.
+
+Documents are converted whole, except PDFs longer than PAGE_WINDOW pages, which
+are streamed in page windows: each window is converted on its own (in the
+conversion pool when there is one), chunked together with the tail carried
+over from the previous window, and its finished chunks are stored and queued
+for embedding (in one transaction, see store_chunks) before the next window is
+converted. The last window commits together with the document update. Memory is bounded by one
+window instead of the whole document, and the first chunks become searchable
+after one window rather than after the whole file.
+
+Time to first chunk (from the start of processing to the first chunk queued
+for embedding) is logged and kept in get_processing_stats for both paths.
+
+The file is hashed once here for the conversion cache (see conversion_cache),
+and the cache outcome of every conversion, whole document or window, is
+counted here as well, since the lookups happen in the worker processes.
+"""
+
+import logging
+import threading
+import time
+from itertools import chain
+from config import CHUNK_MODE, PAGE_WINDOW
+from .chunking import iter_window_chunks, iter_block_chunks
+from .conversion import convert
+from .conversion_cache import is_cache_enabled, file_sha256, record_lookup
+from .document import document_path, convert_document, convert_window, store_converted_document, store_chunks
+
+logger = logging.getLogger(__name__)
+
+# Global state
+_lock = threading.Lock()
+_stats = {'documents': 0, 'streamed': 0, 'failed': 0, 'chunks': 0, 'with_chunks': 0, 'first_chunk_s': 0.0, 'total_s': 0.0}
+_last_first_chunk_s = None
+
+
+def pdf_page_count(file_path):
+    """Page count of a stored PDF, or None for other formats."""
+    full_file_path = document_path(file_path)
+    if not full_file_path.lower().endswith('.pdf'):
+        return None
+
+    # pypdfium2 comes with docling
+    import pypdfium2
+
+    pdf = pypdfium2.PdfDocument(full_file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def page_windows(page_count, window):
+    """(first_page, last_page) of each window, 1-based and inclusive."""
+    return [(first, min(first + window - 1, page_count)) for first in range(1, page_count + 1, window)]
+
+def _record(chunks, first_chunk_s, total_s, streamed):
+    global _last_first_chunk_s
+    with _lock:
+        _stats['documents'] += 1
+        _stats['streamed'] += 1 if streamed else 0
+        _stats['chunks'] += chunks
+        _stats['total_s'] += total_s
+        if first_chunk_s is not None:
+            _stats['with_chunks'] += 1
+            _stats['first_chunk_s'] += first_chunk_s
+            _last_first_chunk_s = first_chunk_s
+
+def _file_hash(file_path):
+    """SHA-256 of a stored document for the conversion cache, or None without a cache."""
+    return file_sha256(document_path(file_path)) if is_cache_enabled() else None
+
+def stream_document(document_id, file_path, page_count, window=None, file_hash=None):
+    """Convert a PDF window by window, storing and enqueueing chunks as each window finishes."""
+    window = window or PAGE_WINDOW
+    file_hash = file_hash or _file_hash(file_path)
+    started = time.perf_counter()
+    first_chunk_s = None
+    title = None
+    stored = 0
+    # Chunks completed but not yet stored, at most about one window's worth
+    pending = []
+
+    def persist(final=False):
+        nonlocal stored, first_chunk_s
+        chunks = [chunk for chunk in pending if chunk and chunk.strip()]
+        pending.clear()
+        if not chunks and not final:
+            return
+        if final and not chunks and not stored:
+            # Chunks of an earlier run are still cleared, as a whole-document conversion would
+            logger.warning(f"Document {document_id} has no extractable text content")
+        count = store_chunks(
+            document_id, chunks, first_index=stored, replace=stored == 0, update_document=final,
+            title=title or f"Document {document_id} (no text content)", page_count=page_count
+        )
+        if count and first_chunk_s is None:
+            first_chunk_s = time.perf_counter() - started
+            logger.info(f"Document {document_id}: first chunks queued for embedding after {first_chunk_s:.2f}s")
+        stored += count
+
+    def converted_windows(key):
+        for first_page, last_page in page_windows(page_count, window):
+            # Everything chunked so far is complete, store it before converting further
+            persist()
+            converted = convert(convert_window, file_path, first_page, last_page, file_hash)
+            record_lookup(converted['cache'])
+            yield converted[key]
+
+    if CHUNK_MODE == 'structure':
+        chunks = iter_block_chunks(chain.from_iterable(converted_windows('blocks')))
+    else:
+        chunks = iter_window_chunks(converted_windows('markdown'))
+
+    for chunk in chunks:
+        if title is None and chunk.strip():
+            title = chunk[:100] + "..." if len(chunk) > 100 else chunk
+        pending.append(chunk)
+    persist(final=True)
+
+    total_s = time.perf_counter() - started
+    _record(stored, first_chunk_s, total_s, streamed=True)
+    logger.info(f"Streamed document {document_id} in {len(page_windows(page_count, window))} windows of {window} pages: "
+                f"{stored} chunks in {total_s:.2f}s, first after {first_chunk_s or total_s:.2f}s")
+
+    return {
+        'document_id': document_id,
+        'chunks_count': stored,
+        'first_chunk_s': first_chunk_s,
+        'message': f'Document processed in page windows and {stored} chunks queued for embedding'
+    }
+
+def process_document(document_id, file_path):
+    """Convert, chunk, store and enqueue a document, streaming long PDFs in page windows."""
+    try:
+        started = time.perf_counter()
+        file_hash = _file_hash(file_path)
+        page_count = pdf_page_count(file_path) if PAGE_WINDOW else None
+        if page_count and page_count > PAGE_WINDOW:
+            return stream_document(document_id, file_path, page_count, file_hash=file_hash)
+
+        converted = convert(convert_document, file_path, file_hash)
+        record_lookup(converted['cache'])
+        result = store_converted_document(document_id, converted)
+        # Chunks are only queued once the whole document is converted and stored
+        total_s = time.perf_counter() - started
+        _record(result['chunks_count'], total_s if result['chunks_count'] else None, total_s, streamed=False)
+        result['first_chunk_s'] = total_s if result['chunks_count'] else None
+        return result
+
+    except Exception as e:
+        with _lock:
+            _stats['failed'] += 1
+        logger.error(f"Error processing document {document_id}: {e}")
+        raise
+
+def get_processing_stats():
+    """Documents processed and their time to first chunk."""
+    with _lock:
+        stats = dict(_stats)
+        last_first_chunk_s = _last_first_chunk_s
+    documents = stats['documents']
+    return {
+        'documents': documents,
+        'streamed_documents': stats['streamed'],
+        'failed': stats['failed'],
+        'chunks': stats['chunks'],
+        'page_window': PAGE_WINDOW,
+        'time_to_first_chunk_s': {
+            'last': round(last_first_chunk_s, 3) if last_first_chunk_s is not None else None,
+            'mean': round(stats['first_chunk_s'] / stats['with_chunks'], 3) if stats['with_chunks'] else None
+        },
+        'mean_document_s': round(stats['total_s'] / documents, 3) if documents else None
+    }
@@ -1,146 +1,143 @@
-import json
 import logging
-from database import get_db_pool, is_db_ready
+import sys
+from pathlib import Path
+from config import (
+    CHUNKS_PER_MESSAGE, QUEUE_PAYLOAD, QUEUE_CONSUMER, QUEUE_MAX_RETRIES, QUEUE_RETRY_DELAY_S, QUEUE_MAX_RETRY_DELAY_S,
+    QUEUE_SHARDED, QUEUE_CONSUMER_GROUP, QUEUE_BACKEND, QUEUE_SQLITE_PATH, QUEUE_VISIBILITY_TIMEOUT_S
+)
+from database import get_db_pool, is_db_ready, connect_for_notifications
+
+# Shared queue client (src/common)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from common.queues import create_queue, DOCUMENT_MESSAGE, CHUNK_RANGE_MESSAGE
 
 logger = logging.getLogger(__name__)
 
+def _queue(name, message_format, **options):
+    """A queue on the QUEUE_BACKEND (see common.queues.backends)."""
+    return create_queue(
+        QUEUE_BACKEND, name, message_format, get_db_pool, sqlite_path=QUEUE_SQLITE_PATH,
+        visibility_timeout_s=QUEUE_VISIBILITY_TIMEOUT_S, payload=QUEUE_PAYLOAD, **options
+    )
+
+document_queue = _queue(
+    "vector_pending_document", DOCUMENT_MESSAGE,
+    max_retries=QUEUE_MAX_RETRIES, retry_delay_s=QUEUE_RETRY_DELAY_S, max_retry_delay_s=QUEUE_MAX_RETRY_DELAY_S,
+    consumer=QUEUE_CONSUMER_GROUP if QUEUE_SHARDED else None
+)
+chunk_queue = _queue("vector_pending_chunk", CHUNK_RANGE_MESSAGE)
+
+def init_queue_consumer():
+    """Join the QUEUE_CONSUMER_GROUP of vector_pending_document, and subscribe to its notifications
+    when QUEUE_CONSUMER is notify.
+
+    The chunking worker then waits for documents without holding a pooled
+    connection. If the subscription fails, it keeps waiting in blocking dequeues.
+    """
+    try:
+        document_queue.join()
+    except Exception as e:
+        logger.error(f"Could not add consumer group {QUEUE_CONSUMER_GROUP} to vector_pending_document: {e}")
+
+    if QUEUE_CONSUMER != 'notify':
+        return
+    try:
+        document_queue.listen(connect_for_notifications)
+    except Exception as e:
+        logger.error(f"Could not subscribe to queue notifications, polling instead: {e}")
+
+def cleanup_queue_consumer():
+    """Drop the notification subscription, waking the chunking worker if it is waiting."""
+    document_queue.stop_listening()
+
+def get_queue_stats():
+    """How the chunking worker waits for documents (poll or notify), with notification and lease counters."""
+    return document_queue.get_consumer_stats()
+
 def enqueue_document_for_chunking(document_id, file_path):
     """Enqueue a document for chunking processing."""
     if not is_db_ready():
         raise Exception("Database not ready")
-    
+
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_document"
-            
-            # Create payload with document metadata
-            payload = {
-                'document_id': document_id,
-                'file_path': file_path
-            }
-            
-            # Enqueue message using Oracle AQ
-            cursor.execute("""
-                DECLARE
-                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                BEGIN
-                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
-                    message.set_text(:payload);
-                    
-                    DBMS_AQ.ENQUEUE(
-                        queue_name         => :queue_name,
-                        enqueue_options    => enqueue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    COMMIT;
-                END;
-            """, payload=json.dumps(payload), queue_name=queue_name)
-            
-            logger.info(f"Enqueued document {document_id} for chunking")
-            
+        document_queue.enqueue({'document_id': document_id, 'file_path': file_path})
+        logger.info(f"Enqueued document {document_id} for chunking")
+
     except Exception as e:
         logger.error(f"Failed to enqueue document: {e}")
         raise
 
-def dequeue_document_for_chunking(timeout=30):
-    """Dequeue a document for chunking processing."""
+def lease_document_for_chunking(timeout=30):
+    """Lease a document for chunking, or None when none arrived within timeout.
+
+    The message stays on the queue (its lease holding a pooled connection)
+    until the lease is acked after the document's chunks are committed. A
+    failed lease is retried with a growing delay, up to QUEUE_MAX_RETRIES
+    times, then moved to vector_exception.
+    """
+    if not is_db_ready():
+        raise Exception("Database not ready")
+
+    # Errors propagate, so the caller backs off instead of reading them as an empty queue
+    return document_queue.lease_many(1, wait=timeout)
+
+def chunk_ranges(document_id, first_index, count, chunks_per_message=None):
+    """Queue messages referencing chunks first_index .. first_index + count - 1 of a document.
+
+    Messages carry chunk identifiers only; the vector_maker_service reads the
+    texts from document_chunks. Each message covers up to chunks_per_message
+    (CHUNKS_PER_MESSAGE) consecutive chunks.
+    """
+    chunks_per_message = chunks_per_message or CHUNKS_PER_MESSAGE
+    return [
+        {
+            'document_id': document_id,
+            'first_chunk_index': first,
+            'last_chunk_index': min(first + chunks_per_message, first_index + count) - 1
+        }
+        for first in range(first_index, first_index + count, chunks_per_message)
+    ]
+
+def enqueue_chunk_for_embedding(document_id, chunk_index):
+    """Enqueue a stored chunk for embedding processing (forward to vector_maker_service)."""
     if not is_db_ready():
         raise Exception("Database not ready")
-    
+
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_document"
-            
-            cursor.execute("""
-                DECLARE
-                    dequeue_options    DBMS_AQ.DEQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                    text_content       VARCHAR2(4000);
-                BEGIN
-                    dequeue_options.wait := :timeout;
-                    
-                    DBMS_AQ.DEQUEUE(
-                        queue_name         => :queue_name,
-                        dequeue_options    => dequeue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    
-                    message.get_text(text_content);
-                    :result := text_content;
-                    COMMIT;
-                EXCEPTION
-                    WHEN OTHERS THEN
-                        :result := NULL;
-                END;
-            """, timeout=timeout, queue_name=queue_name, result=cursor.var(str))
-            
-            result = cursor.bindvars['result'].getvalue()
-            if result:
-                return json.loads(result)
-            return None
-            
+        # Reference the stored chunk, the text stays in document_chunks
+        chunk_queue.enqueue(chunk_ranges(document_id, chunk_index, 1)[0])
+        logger.info(f"Enqueued chunk {chunk_index} for document {document_id} for embedding")
+
     except Exception as e:
-        logger.error(f"Failed to dequeue document: {e}")
-        return None
+        logger.error(f"Failed to enqueue chunk for embedding: {e}")
+        raise
+
+def enqueue_chunks_for_embedding(document_id, first_index, count, connection=None, queue_name="vector_pending_chunk"):
+    """Enqueue stored chunks first_index .. first_index + count - 1 for embedding in one enqmany call.
 
-def enqueue_chunk_for_embedding(document_id, chunk_index, chunk_text):
-    """Enqueue a chunk for embedding processing (forward to vector_maker_service)."""
+    The messages (see chunk_ranges) are enqueued with ON_COMMIT visibility:
+    on a pooled connection they are committed here; with a connection passed
+    in, they become visible when the caller commits, together with the chunk
+    rows. On a memory or sqlite queue (not chunk_queue.transactional) they
+    are visible at once, so callers enqueue after committing the rows.
+    Returns the number of messages enqueued.
+    """
     if not is_db_ready():
         raise Exception("Database not ready")
-    
+
+    if not count:
+        return 0
+
+    queue = chunk_queue
+    if queue_name != chunk_queue.name:
+        queue = _queue(queue_name, CHUNK_RANGE_MESSAGE)
+
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_chunk"
-            
-            # Create payload with chunk metadata
-            payload = {
-                'document_id': document_id,
-                'chunk_index': chunk_index,
-                'chunk_text': chunk_text
-            }
-            
-            # Enqueue message using Oracle AQ
-            cursor.execute("""
-                DECLARE
-                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                BEGIN
-                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
-                    message.set_text(:payload);
-                    
-                    DBMS_AQ.ENQUEUE(
-                        queue_name         => :queue_name,
-                        enqueue_options    => enqueue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    COMMIT;
-                END;
-            """, payload=json.dumps(payload), queue_name=queue_name)
-            
-            logger.info(f"Enqueued chunk {chunk_index} for document {document_id} for embedding")
-            
+        enqueued = queue.enqueue_many(chunk_ranges(document_id, first_index, count), connection=connection)
+        logger.info(f"Enqueued chunks {first_index}-{first_index + count - 1} for document {document_id} "
+                    f"for embedding in {enqueued} messages")
+        return enqueued
+
     except Exception as e:
-        logger.error(f"Failed to enqueue chunk for embedding: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Failed to enqueue chunks for embedding: {e}")
+        raise
@@ -0,0 +1,27 @@
+from .codecs import RAW, JSON, PAYLOADS, DOCUMENT_MESSAGE, CHUNK_RANGE_MESSAGE, QUEUE_MESSAGES, EXCEPTION_QUEUE
+from .client import AQQueue, Lease, ON_COMMIT, IMMEDIATE, NO_WAIT, WAIT_FOREVER
+from .notify import QueueNotifier
+from .local import MemoryQueue, SQLiteQueue, LocalLease
+from .backends import BACKENDS, create_queue
+
+__all__ = [
+    'RAW',
+    'JSON',
+    'PAYLOADS',
+    'DOCUMENT_MESSAGE',
+    'CHUNK_RANGE_MESSAGE',
+    'QUEUE_MESSAGES',
+    'EXCEPTION_QUEUE',
+    'AQQueue',
+    'Lease',
+    'ON_COMMIT',
+    'IMMEDIATE',
+    'NO_WAIT',
+    'WAIT_FOREVER',
+    'QueueNotifier',
+    'MemoryQueue',
+    'SQLiteQueue',
+    'LocalLease',
+    'BACKENDS',
+    'create_queue'
+]
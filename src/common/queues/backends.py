@@ -0,0 +1,37 @@
+"""
+Queue backend selection (QUEUE_BACKEND of the services).
+
+- aq: Oracle AQ / Transactional Event Queues (client.AQQueue), the default
+- memory: in-process queues (local.MemoryQueue), for single-process runs
+- sqlite: queues in a SQLite file (local.SQLiteQueue), for several processes
+  on one host
+"""
+
+from .client import AQQueue
+from .local import MemoryQueue, SQLiteQueue
+
+BACKENDS = ('aq', 'memory', 'sqlite')
+
+# AQQueue options the local backends have no use for
+_AQ_OPTIONS = ('payload', 'visibility', 'consumer')
+
+
+def create_queue(backend, name, message_format, get_pool, sqlite_path=None, visibility_timeout_s=300, **options):
+    """A queue of the given backend, with the options of AQQueue.
+
+    sqlite_path is the SQLite file of the sqlite backend; visibility_timeout_s
+    how long local backends hide leased messages (AQ holds them for as long as
+    the lease's transaction).
+    """
+    if backend == 'aq':
+        return AQQueue(name, message_format, get_pool, **options)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown queue backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    for option in _AQ_OPTIONS:
+        options.pop(option, None)
+    if backend == 'memory':
+        return MemoryQueue(name, message_format, visibility_timeout_s=visibility_timeout_s, **options)
+    if not sqlite_path:
+        raise ValueError("The sqlite queue backend needs a database file (QUEUE_SQLITE_PATH)")
+    return SQLiteQueue(name, message_format, sqlite_path, visibility_timeout_s=visibility_timeout_s, **options)
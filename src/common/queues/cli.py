@@ -0,0 +1,157 @@
+"""
+Inspect and replay the exception queue.
+
+Messages that failed more than ORACLE_QUEUE_MAX_RETRIES times land on
+vector_exception with the queue they came from, their failed attempts and the
+last error (see client.Lease). Once the cause is fixed, replay puts them back
+on their queue with a fresh retry count, in the same transaction that removes
+them from the exception queue.
+
+Connects with the ORACLE_* settings of the services (environment or .env):
+
+    cd src
+    python -m common.queues.cli list
+    python -m common.queues.cli show <msgid>
+    python -m common.queues.cli replay <msgid> [<msgid> ...]
+    python -m common.queues.cli replay --all [--queue vector_pending_document]
+    python -m common.queues.cli purge <msgid> [<msgid> ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import oracledb
+from .client import AQQueue
+from .codecs import EXCEPTION_QUEUE, QUEUE_MESSAGES, PAYLOADS
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
+
+
+def connect():
+    if load_dotenv is not None:
+        load_dotenv()
+    dsn = os.getenv('ORACLE_DSN') or (f"{os.getenv('ORACLE_HOST', 'localhost')}:{os.getenv('ORACLE_PORT', '1521')}/"
+                                      f"{os.getenv('ORACLE_SERVICE_NAME', 'FREEPDB1')}")
+    return oracledb.connect(
+        user=os.getenv('ORACLE_USER', 'SYSTEM'),
+        password=os.getenv('ORACLE_PASSWORD', os.getenv('ORACLE_DB_PASSWORD', 'password')),
+        dsn=dsn
+    )
+
+def _exception_queue(connection, exception_queue):
+    queue = connection.queue(exception_queue, 'JSON')
+    queue.deqoptions.wait = oracledb.DEQ_NO_WAIT
+    queue.deqoptions.visibility = oracledb.DEQ_ON_COMMIT
+    return queue
+
+def browse(connection, exception_queue, queue_name=None, limit=None):
+    """Messages of the exception queue, oldest first, without removing them."""
+    queue = _exception_queue(connection, exception_queue)
+    queue.deqoptions.mode = oracledb.DEQ_BROWSE
+    queue.deqoptions.navigation = oracledb.DEQ_FIRST_MSG
+    messages = []
+    while limit is None or len(messages) < limit:
+        message = queue.deqone()
+        if message is None:
+            break
+        queue.deqoptions.navigation = oracledb.DEQ_NEXT_MSG
+        if queue_name is None or message.payload.get('queue') == queue_name:
+            messages.append(message)
+    return messages
+
+def remove(connection, exception_queue, msgid):
+    """Dequeue one message of the exception queue by id, in the connection's transaction."""
+    queue = _exception_queue(connection, exception_queue)
+    queue.deqoptions.msgid = bytes.fromhex(msgid)
+    return queue.deqone()
+
+def replay(connection, exception_queue, msgid, payload):
+    """Move one message back to its queue with a fresh retry count; returns the queue name."""
+    message = remove(connection, exception_queue, msgid)
+    if message is None:
+        raise LookupError(f"No message {msgid} on {exception_queue}")
+    failed = message.payload
+    if failed['queue'] not in QUEUE_MESSAGES:
+        raise LookupError(f"Message {msgid} came from unknown queue {failed['queue']}")
+    target = AQQueue(failed['queue'], QUEUE_MESSAGES[failed['queue']], get_pool=None, payload=payload)
+    target.enqueue(failed['message'], connection=connection)
+    return failed['queue']
+
+def _selected(connection, args):
+    if args.msgids:
+        return args.msgids
+    if args.all:
+        return [message.msgid.hex() for message in browse(connection, args.exception_queue, args.queue)]
+    sys.exit("Pass message ids or --all")
+
+def _summary(message):
+    failed = message.payload
+    return (f"{message.msgid.hex()}  {failed.get('failed_at', '')}  {failed.get('queue')}  "
+            f"attempts={failed.get('attempts')}  {json.dumps(failed.get('message'))}  "
+            f"{str(failed.get('error', ''))[:120]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect and replay the queue of failed messages')
+    parser.add_argument('--exception-queue', default=EXCEPTION_QUEUE, help='Exception queue name')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    list_parser = commands.add_parser('list', help='List failed messages, oldest first')
+    list_parser.add_argument('--queue', help='Only messages from this queue')
+    list_parser.add_argument('--limit', type=int, default=100, help='Messages to list')
+
+    show_parser = commands.add_parser('show', help='Print a failed message with its full error')
+    show_parser.add_argument('msgid')
+
+    for name, description in (('replay', 'Put failed messages back on their queue'),
+                               ('purge', 'Delete failed messages')):
+        command = commands.add_parser(name, help=description)
+        command.add_argument('msgids', nargs='*', help='Message ids (see list)')
+        command.add_argument('--all', action='store_true', help='Every message (of --queue)')
+        command.add_argument('--queue', help='Only messages from this queue (with --all)')
+    commands.choices['replay'].add_argument(
+        '--payload', choices=PAYLOADS, default=os.getenv('ORACLE_QUEUE_PAYLOAD', 'raw').lower(),
+        help='Payload type of the target queues (ORACLE_QUEUE_PAYLOAD)'
+    )
+    args = parser.parse_args()
+
+    with connect() as connection:
+        if args.command == 'list':
+            messages = browse(connection, args.exception_queue, args.queue, args.limit)
+            for message in messages:
+                print(_summary(message))
+            print(f"{len(messages)} messages")
+
+        elif args.command == 'show':
+            for message in browse(connection, args.exception_queue):
+                if message.msgid.hex() == args.msgid.lower():
+                    print(json.dumps(dict(message.payload, msgid=args.msgid, enqueued=str(message.enqtime)), indent=2))
+                    return 0
+            print(f"No message {args.msgid} on {args.exception_queue}")
+            return 1
+
+        else:
+            done = 0
+            for msgid in _selected(connection, args):
+                try:
+                    if args.command == 'replay':
+                        target = replay(connection, args.exception_queue, msgid, args.payload)
+                    elif remove(connection, args.exception_queue, msgid) is None:
+                        raise LookupError(f"No message {msgid} on {args.exception_queue}")
+                    connection.commit()
+                    done += 1
+                    if args.command == 'replay':
+                        print(f"Replayed {msgid} to {target}")
+                except (LookupError, ValueError, oracledb.Error) as e:
+                    connection.rollback()
+                    print(f"Skipped {msgid}: {e}")
+            print(f"{'Replayed' if args.command == 'replay' else 'Purged'} {done} messages")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""
+Oracle AQ client on python-oracledb's native queue API.
+
+Enqueues and dequeues go through connection.queue() with enqmany/deqmany, so a
+batch of messages is one round trip with no PL/SQL block, no JMS object
+construction and no JSON text parsing in the database.
+
+Visibility follows the connection convention of the services' database
+operations: with ON_COMMIT visibility (the default) and a connection passed
+in, the enqueue or dequeue is part of the caller's transaction and the caller
+commits; without one, a pooled connection is acquired and committed.
+IMMEDIATE visibility makes the operation its own transaction regardless.
+
+Consumers either wait for messages in a blocking dequeue, or, after listen(),
+on AQ notifications with no connection held while the queue is empty (see
+notify).
+
+The service queues are sharded Transactional Event Queues (pdb_queues.sql)
+with one consumer group per consuming service. Messages carry their format's
+key (the document id) as correlation, so all messages of a document land in
+the same shard. Every session that dequeues as a group shares that group's
+shards, and the database rebalances the shards as sessions come and go.
+Replicas of a service therefore join its group just by dequeuing, and the
+messages of one document stay with one of them.
+
+dequeue_many() commits the removal before the messages are processed (at most
+once delivery). For at least once delivery, consumers lease messages instead:
+lease_many() dequeues on a connection it keeps with the removal uncommitted,
+and the consumer acks the lease once its processing writes have committed. A
+consumer that crashes or loses its connection rolls the removal back, and AQ
+redelivers the messages. A consumer that fails to process them calls fail(),
+which re-enqueues each message with an exponentially growing delay, or routes
+it to the exception queue (EXCEPTION_QUEUE) once it has failed max_retries + 1
+times, in the same transaction as the removal. On a multi-consumer queue the
+retry is addressed to the failing consumer group alone: with subscribers A and
+B, a message that A fails is enqueued again with recipients [A], so B, which
+had its own copy of the original, does not receive it a second time.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+import oracledb
+from .codecs import RAW, EXCEPTION_QUEUE
+from .notify import QueueNotifier
+
+logger = logging.getLogger(__name__)
+
+ON_COMMIT = 'on_commit'
+IMMEDIATE = 'immediate'
+
+_ENQ_VISIBILITY = {ON_COMMIT: oracledb.ENQ_ON_COMMIT, IMMEDIATE: oracledb.ENQ_IMMEDIATE}
+_DEQ_VISIBILITY = {ON_COMMIT: oracledb.DEQ_ON_COMMIT, IMMEDIATE: oracledb.DEQ_IMMEDIATE}
+
+# Wait values (seconds otherwise)
+NO_WAIT = oracledb.DEQ_NO_WAIT
+WAIT_FOREVER = oracledb.DEQ_WAIT_FOREVER
+
+# Pause between non-blocking dequeues while lingering for a fuller batch
+LINGER_POLL_S = 0.005
+
+# Longest error text kept with a message routed to the exception queue
+MAX_ERROR_LENGTH = 2000
+
+REDELIVERY_ERROR = "Delivery rolled back (the consumer stopped or lost its connection while processing it)"
+
+
+class AQQueue:
+    """A queue of one message format (see codecs), used through a service's connection pool.
+
+    get_pool returns the service's connection pool; it is called on every
+    operation that does not get a connection, as pools are created after import.
+
+    Leased messages are retried up to max_retries times, the nth retry
+    delayed by retry_delay_s * 2^(n-1) seconds up to max_retry_delay_s.
+    max_leases bounds the leases held at once, each holding a pooled
+    connection (None: unbounded).
+
+    consumer is the consumer group (subscriber) to dequeue as on a
+    multi-consumer queue, None on a single-consumer queue.
+    """
+
+    backend = 'aq'
+    # Enqueues can join the caller's database transaction
+    transactional = True
+
+    def __init__(self, name, message_format, get_pool, payload=RAW, visibility=ON_COMMIT, wait=NO_WAIT,
+                 max_retries=5, retry_delay_s=10, max_retry_delay_s=600, exception_queue=EXCEPTION_QUEUE,
+                 max_leases=None, consumer=None):
+        if visibility not in _ENQ_VISIBILITY:
+            raise ValueError(f"Unknown queue visibility {visibility!r}, expected {ON_COMMIT} or {IMMEDIATE}")
+        self.name = name
+        self.message_format = message_format
+        self.codec = message_format.codec(payload)
+        self.payload = payload
+        self.visibility = visibility
+        self.wait = wait
+        self.consumer = consumer
+        self.max_retries = max_retries
+        self.retry_delay_s = retry_delay_s
+        self.max_retry_delay_s = max_retry_delay_s
+        self.exception_queue = exception_queue
+        self.notifier = None
+        self._get_pool = get_pool
+        self._leases = threading.BoundedSemaphore(max_leases) if max_leases else None
+        self._lock = threading.Lock()
+        self._stats = {'leased': 0, 'acked': 0, 'retried': 0, 'rejected': 0, 'redelivered': 0, 'in_flight': 0}
+
+    def _queue(self, connection, visibility=None, wait=None):
+        visibility = visibility or self.visibility
+        queue = connection.queue(self.name, self.codec.payload_type)
+        queue.enqoptions.visibility = _ENQ_VISIBILITY[visibility]
+        queue.deqoptions.visibility = _DEQ_VISIBILITY[visibility]
+        queue.deqoptions.wait = self.wait if wait is None else wait
+        if self.consumer:
+            queue.deqoptions.consumername = self.consumer
+        return queue
+
+    def _properties(self, connection, message, attempt=0, delay=0, recipients=None):
+        return connection.msgproperties(
+            payload=self.codec.encode(message, attempt=attempt),
+            correlation=self.message_format.correlation(message),
+            delay=delay,
+            recipients=recipients
+        )
+
+    def _run(self, operation, connection, *args):
+        if connection is None:
+            with self._get_pool().acquire() as connection:
+                result = operation(connection, *args)
+                connection.commit()
+                return result
+        return operation(connection, *args)
+
+    def enqueue_many(self, messages, connection=None, visibility=None):
+        """Enqueue messages (dicts of the queue's message format) in one round trip, returning their count."""
+        if not messages:
+            return 0
+        return self._run(self._enqueue_many, connection, messages, visibility)
+
+    def _enqueue_many(self, connection, messages, visibility):
+        queue = self._queue(connection, visibility)
+        queue.enqmany([self._properties(connection, message) for message in messages])
+        return len(messages)
+
+    def enqueue(self, message, connection=None, visibility=None):
+        """Enqueue a single message."""
+        self.enqueue_many([message], connection, visibility)
+
+    def join(self, connection=None):
+        """Add the consumer group as a subscriber of the queue, unless it already is one.
+
+        Only needed once per group (pdb_queues.sql adds the services' groups);
+        further consumers of the group join by dequeuing as it.
+        """
+        if not self.consumer:
+            return
+        self._run(self._join, connection)
+
+    def _join(self, connection):
+        connection.cursor().execute("""
+            DECLARE
+                already_subscribed EXCEPTION;
+                PRAGMA EXCEPTION_INIT(already_subscribed, -24034);
+            BEGIN
+                DBMS_AQADM.ADD_SUBSCRIBER(
+                    queue_name => :queue_name,
+                    subscriber => SYS.AQ$_AGENT(:consumer, NULL, NULL)
+                );
+            EXCEPTION
+                WHEN already_subscribed THEN NULL;
+            END;
+        """, queue_name=self.name, consumer=self.consumer)
+
+    def listen(self, connect):
+        """Wait for messages on AQ notifications instead of in blocking dequeues.
+
+        connect returns a standalone connection with events enabled (thick
+        mode) for the subscription.
+        """
+        notifier = QueueNotifier(self.name, connect, consumer=self.consumer)
+        notifier.start()
+        self.notifier = notifier
+
+    def stop_listening(self):
+        """Drop the notification subscription, waking consumers waiting on it."""
+        notifier, self.notifier = self.notifier, None
+        if notifier is not None:
+            notifier.stop()
+
+    def get_consumer_stats(self):
+        """How consumers wait for messages (poll or notify), with the notification and lease counters."""
+        with self._lock:
+            leases = dict(self._stats)
+        notifier = self.notifier
+        group = {'consumer': self.consumer} if self.consumer else {}
+        if notifier is None:
+            return {'mode': 'poll', **group, 'leases': leases}
+        return {'mode': 'notify', **group, **notifier.get_stats(), 'leases': leases}
+
+    def _count(self, **counts):
+        with self._lock:
+            for key, count in counts.items():
+                self._stats[key] += count
+
+    def _receive(self, dequeue, wait):
+        # dequeue(wait) directly, or while listening without waiting, then again after a notification
+        wait = self.wait if wait is None else wait
+        notifier = self.notifier
+        if notifier is None or wait == NO_WAIT:
+            return dequeue(wait)
+
+        received = dequeue(NO_WAIT)
+        if received or not notifier.wait(None if wait == WAIT_FOREVER else wait):
+            return received
+        return dequeue(NO_WAIT)
+
+    def dequeue_many(self, max_messages, wait=None, linger_ms=0, connection=None, visibility=None):
+        """Dequeue up to max_messages messages, decoded to dicts.
+
+        Waits up to wait seconds (the queue's default when None) for the first
+        messages, then keeps collecting until max_messages is reached or
+        linger_ms has elapsed. Returns an empty list on timeout. While
+        listening, an empty queue is waited on without holding a connection.
+        """
+        return self._receive(
+            lambda wait: [message for message, _ in self._run(
+                self._dequeue_many, connection, max_messages, wait, linger_ms, visibility
+            )],
+            wait
+        )
+
+    def _dequeue_many(self, connection, max_messages, wait, linger_ms, visibility):
+        received = self._dequeue_properties(connection, max_messages, wait, linger_ms, visibility)
+        return [self.codec.decode(message.payload) for message in received]
+
+    def _dequeue_properties(self, connection, max_messages, wait, linger_ms, visibility):
+        queue = self._queue(connection, visibility, wait)
+        received = queue.deqmany(max_messages)
+
+        if received and linger_ms > 0 and len(received) < max_messages:
+            # After the first messages only linger briefly for more
+            queue.deqoptions.wait = NO_WAIT
+            deadline = time.monotonic() + linger_ms / 1000
+            while len(received) < max_messages:
+                more = queue.deqmany(max_messages - len(received))
+                if more:
+                    received.extend(more)
+                elif time.monotonic() >= deadline:
+                    break
+                else:
+                    time.sleep(LINGER_POLL_S)
+
+        return received
+
+    def dequeue(self, wait=None, connection=None, visibility=None):
+        """Dequeue a single message, or None on timeout."""
+        messages = self.dequeue_many(1, wait=wait, connection=connection, visibility=visibility)
+        return messages[0] if messages else None
+
+    def lease_many(self, max_messages, wait=None, linger_ms=0):
+        """Lease up to max_messages messages for at least once processing, or None on timeout.
+
+        Waits like dequeue_many. The returned Lease keeps a pooled connection
+        with the dequeue uncommitted until it is acked, failed or released.
+        Redelivered messages that already failed more than max_retries times
+        go to the exception queue instead (None if that leaves none).
+        """
+        if self._leases is not None:
+            self._leases.acquire()
+        try:
+            lease = self._receive(lambda wait: self._lease(max_messages, wait, linger_ms), wait)
+        except Exception:
+            if self._leases is not None:
+                self._leases.release()
+            raise
+        if lease is None and self._leases is not None:
+            self._leases.release()
+        return lease
+
+    def _lease(self, max_messages, wait, linger_ms):
+        connection = self._get_pool().acquire()
+        try:
+            received = self._dequeue_properties(connection, max_messages, wait, linger_ms, ON_COMMIT)
+            deliveries, rejected = [], []
+            for properties in received:
+                message, attempt = self.codec.decode(properties.payload)
+                # AQ counts the rollbacks of this copy of the message, the payload the handled failures
+                failures = attempt + properties.attempts
+                if properties.attempts and failures > self.max_retries:
+                    rejected.append((message, failures))
+                else:
+                    deliveries.append((message, failures))
+
+            for message, failures in rejected:
+                self._reject(connection, message, failures, REDELIVERY_ERROR)
+            if not deliveries:
+                # Nothing received, or only rejected messages to commit
+                connection.commit()
+                connection.close()
+        except Exception:
+            connection.close()
+            raise
+
+        self._count(redelivered=sum(1 for properties in received if properties.attempts))
+        if not deliveries:
+            self._rejected(rejected, REDELIVERY_ERROR)
+            return None
+        self._count(leased=len(deliveries), in_flight=1)
+        return Lease(self, connection, deliveries, rejected)
+
+    def retry_delay(self, failures):
+        """Seconds before the retry following the given number of failures."""
+        return min(self.retry_delay_s * 2 ** (failures - 1), self.max_retry_delay_s)
+
+    def _retry(self, connection, message, failures):
+        # Only to the consumer group that failed it, the other subscribers already had the message
+        queue = self._queue(connection, ON_COMMIT)
+        queue.enqone(self._properties(
+            connection, message, attempt=failures, delay=int(self.retry_delay(failures)),
+            recipients=[self.consumer] if self.consumer else None
+        ))
+
+    def _reject(self, connection, message, failures, error):
+        queue = connection.queue(self.exception_queue, 'JSON')
+        queue.enqoptions.visibility = oracledb.ENQ_ON_COMMIT
+        queue.enqone(connection.msgproperties(payload={
+            'queue': self.name,
+            'message': dict(message),
+            'attempts': failures,
+            'error': str(error)[:MAX_ERROR_LENGTH],
+            'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+        }))
+
+    def _rejected(self, rejected, error):
+        # After the commit that moved them
+        self._count(rejected=len(rejected))
+        for message, failures in rejected:
+            logger.error(f"Moved message {message} of {self.name} to {self.exception_queue} "
+                         f"after {failures} failed deliveries: {error}")
+
+    def _finish(self, **counts):
+        self._count(in_flight=-1, **counts)
+        if self._leases is not None:
+            self._leases.release()
+
+
+class Lease:
+    """Messages dequeued on a held connection, removed from the queue only when acked.
+
+    connection can run reads for the messages, but processing writes go
+    through their own transaction, acked after it commits: a failure between
+    the two redelivers messages whose writes committed, so processing must be
+    idempotent.
+    """
+
+    def __init__(self, queue, connection, deliveries, rejected=()):
+        self.queue = queue
+        self.connection = connection
+        self._deliveries = deliveries
+        # Redelivered messages moved to the exception queue in this transaction
+        self._rejected = list(rejected)
+        self._done = False
+
+    @property
+    def messages(self):
+        return [message for message, _ in self._deliveries]
+
+    def __len__(self):
+        return len(self._deliveries)
+
+    def ack(self):
+        """Commit the removal of the messages, once their processing has committed."""
+        self._end(lambda connection: None)
+        self.queue._finish(acked=len(self._deliveries))
+        self.queue._rejected(self._rejected, REDELIVERY_ERROR)
+
+    def fail(self, error):
+        """Re-enqueue each message with a retry delay, or route it to the exception queue after max_retries."""
+        retries, rejected = [], []
+        for message, failures in self._deliveries:
+            (rejected if failures + 1 > self.queue.max_retries else retries).append((message, failures + 1))
+
+        def requeue(connection):
+            for message, failures in retries:
+                self.queue._retry(connection, message, failures)
+            for message, failures in rejected:
+                self.queue._reject(connection, message, failures, error)
+
+        self._end(requeue)
+        self.queue._finish(retried=len(retries))
+        self.queue._rejected(self._rejected, REDELIVERY_ERROR)
+        self.queue._rejected(rejected, error)
+        if retries:
+            logger.warning(f"Retrying {len(retries)} messages of {self.queue.name} "
+                           f"in {self.queue.retry_delay(retries[0][1]):g}s or more: {error}")
+
+    def release(self):
+        """Roll the dequeue back; AQ redelivers the messages (counting a delivery attempt)."""
+        if self._done:
+            return
+        self._done = True
+        try:
+            self.connection.rollback()
+        except Exception as e:
+            logger.warning(f"Could not roll back a lease of {self.queue.name}: {e}")
+        self._close()
+        self.queue._finish()
+
+    def _end(self, operation):
+        if self._done:
+            raise RuntimeError(f"Lease of {self.queue.name} already ended")
+        self._done = True
+        try:
+            operation(self.connection)
+            self.connection.commit()
+        except Exception:
+            # Closing rolls the dequeue back, so AQ redelivers the messages
+            self._close()
+            self.queue._finish()
+            raise
+        self._close()
+
+    def _close(self):
+        try:
+            self.connection.close()
+        except Exception as e:
+            logger.warning(f"Could not return the connection of a lease of {self.queue.name}: {e}")
@@ -0,0 +1,125 @@
+"""
+Payload encodings of queue messages.
+
+Messages are small dicts (ids and at most one string). They are sent either as
+RAW payloads, in a fixed binary layout per message type, or as native JSON
+payloads (stored as OSON). The payload type of a queue is set when its queue
+table is created (pdb_queues.sql), and every service must use the same one
+(ORACLE_QUEUE_PAYLOAD).
+
+Both encodings carry the number of times a message was already retried after
+a failed delivery (see client.Lease), so retries survive re-enqueueing.
+"""
+
+import struct
+
+RAW = 'raw'
+JSON = 'json'
+PAYLOADS = (RAW, JSON)
+
+# First byte of every RAW payload, bumped when a layout changes
+RAW_VERSION = 2
+
+# Retry count recorded in a payload (one byte in RAW payloads)
+MAX_ATTEMPT = 255
+
+
+class RawCodec:
+    """Binary layout of a message: version and retry bytes, fixed-size fields, then an optional UTF-8 string.
+
+    Version 1 payloads (no retry byte) are still decoded, as retry 0.
+    """
+
+    payload_type = None  # RAW for connection.queue()
+
+    def __init__(self, fields, struct_format, text_field=None):
+        self.fields = tuple(fields)
+        self.text_field = text_field
+        self._struct = struct.Struct('>BB' + struct_format)
+        self._struct_v1 = struct.Struct('>B' + struct_format)
+
+    def encode(self, message, attempt=0):
+        encoded = self._struct.pack(RAW_VERSION, min(attempt, MAX_ATTEMPT),
+                                    *(message[field] for field in self.fields))
+        if self.text_field:
+            encoded += message[self.text_field].encode('utf-8')
+        return encoded
+
+    def decode(self, payload):
+        """The message dict and its retry count."""
+        version = payload[0]
+        if version == RAW_VERSION:
+            layout = self._struct
+            _, attempt, *values = layout.unpack_from(payload)
+        elif version == 1:
+            layout = self._struct_v1
+            _, *values = layout.unpack_from(payload)
+            attempt = 0
+        else:
+            raise ValueError(f"Unsupported RAW message version {version}")
+        message = dict(zip(self.fields, values))
+        if self.text_field:
+            message[self.text_field] = bytes(payload[layout.size:]).decode('utf-8')
+        return message, attempt
+
+
+class JsonCodec:
+    """Messages as native JSON payloads; python-oracledb converts dicts both ways."""
+
+    payload_type = 'JSON'
+
+    def __init__(self, fields, text_field=None):
+        self.fields = tuple(fields) + ((text_field,) if text_field else ())
+
+    def encode(self, message, attempt=0):
+        encoded = {field: message[field] for field in self.fields}
+        if attempt:
+            encoded['attempt'] = min(attempt, MAX_ATTEMPT)
+        return encoded
+
+    def decode(self, payload):
+        """The message dict and its retry count."""
+        message = dict(payload)
+        return message, message.pop('attempt', 0)
+
+
+class MessageFormat:
+    """Fields of a message type, with its RAW layout (struct format of the non-text fields).
+
+    key names the field that partitions messages across the shards of a
+    sharded queue; it is sent as the message correlation.
+    """
+
+    def __init__(self, name, fields, struct_format, text_field=None, key=None):
+        self.name = name
+        self.key = key
+        self._codecs = {
+            RAW: RawCodec(fields, struct_format, text_field),
+            JSON: JsonCodec(fields, text_field)
+        }
+
+    def correlation(self, message):
+        return str(message[self.key]) if self.key else None
+
+    def codec(self, payload):
+        if payload not in self._codecs:
+            raise ValueError(f"Unknown queue payload {payload!r}, expected one of {', '.join(PAYLOADS)}")
+        return self._codecs[payload]
+
+
+# vector_pending_document: a stored upload for the chunker_service (10 bytes + file name)
+DOCUMENT_MESSAGE = MessageFormat('document', ('document_id',), 'Q', text_field='file_path', key='document_id')
+
+# vector_pending_chunk: an inclusive range of a document's stored chunks for the vector_maker_service (18 bytes)
+CHUNK_RANGE_MESSAGE = MessageFormat(
+    'chunk_range', ('document_id', 'first_chunk_index', 'last_chunk_index'), 'QII', key='document_id'
+)
+
+# Formats of the service queues, by queue name (for re-enqueueing failed messages)
+QUEUE_MESSAGES = {
+    'vector_pending_document': DOCUMENT_MESSAGE,
+    'vector_pending_chunk': CHUNK_RANGE_MESSAGE
+}
+
+# JSON queue holding messages that failed more than their retries (see client.Lease and cli)
+EXCEPTION_QUEUE = 'vector_exception'
@@ -0,0 +1,489 @@
+"""
+Local queue backends, stand-ins for Oracle AQ that need no database.
+
+MemoryQueue keeps messages in the process, for single-process runs and
+benchmarks of the Python paths around the queues. SQLiteQueue keeps them in
+a SQLite file (WAL mode), shared by the processes of one host, for small
+deployments. Both behave like AQQueue (see client): batch enqueue and
+dequeue, leases acked after processing, and failed messages retried with an
+exponential delay or routed to the exception queue.
+
+There is no transaction to hold a lease open, so a lease is a visibility
+timeout instead: leased messages are hidden for visibility_timeout_s seconds,
+and if the lease is not acked, failed or released by then they are
+delivered again (counting as a failure). Enqueues are not part of the
+caller's database transaction (transactional is False): callers that store
+rows and enqueue messages referencing them enqueue after their commit.
+
+Messages are stored as JSON objects of the queue's message fields, whatever
+ORACLE_QUEUE_PAYLOAD says.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from .codecs import JSON, EXCEPTION_QUEUE
+from .client import NO_WAIT, WAIT_FOREVER, LINGER_POLL_S, MAX_ERROR_LENGTH, REDELIVERY_ERROR
+
+logger = logging.getLogger(__name__)
+
+# Interval at which SQLite consumers look for messages while waiting
+SQLITE_POLL_S = 0.05
+
+
+class MemoryStore:
+    """Messages of every in-process queue, each with a heap of (visible_at, id) for the next visible ones."""
+
+    def __init__(self):
+        self._rows = {}  # id -> [queue, message, failures, visible_at, lease_token]
+        self._heaps = {}
+        self._ids = itertools.count(1)
+        self._changed = threading.Condition()
+
+    def put(self, queue, records):
+        with self._changed:
+            for message, failures, visible_at in records:
+                self._push(queue, next(self._ids), message, failures, visible_at, None)
+            self._changed.notify_all()
+
+    def _push(self, queue, row_id, message, failures, visible_at, token):
+        # Caller holds the lock
+        self._rows[row_id] = [queue, message, failures, visible_at, token]
+        heapq.heappush(self._heaps.setdefault(queue, []), (visible_at, row_id))
+
+    def take(self, queue, max_messages, now, lease_until, token):
+        """Lease up to max_messages visible messages: [(id, message, failures, redelivered)]."""
+        taken = []
+        with self._changed:
+            heap = self._heaps.get(queue, [])
+            while heap and len(taken) < max_messages and heap[0][0] <= now:
+                visible_at, row_id = heapq.heappop(heap)
+                row = self._rows.get(row_id)
+                if row is None or row[3] != visible_at:
+                    # Settled or rescheduled since it was pushed
+                    continue
+                redelivered = row[4] is not None
+                if redelivered:
+                    row[2] += 1
+                row[3], row[4] = lease_until, token
+                heapq.heappush(heap, (lease_until, row_id))
+                taken.append((row_id, row[1], row[2], redelivered))
+        return taken
+
+    def settle(self, token, acked, requeued, rejected):
+        """Apply the outcome of a lease still held: ids to delete, (id, failures, visible_at) to
+        requeue, (id, exception queue, exception message) to move. Returns the messages settled."""
+        settled = 0
+        with self._changed:
+            for row_id in acked:
+                if self._held(row_id, token):
+                    del self._rows[row_id]
+                    settled += 1
+            for row_id, failures, visible_at in requeued:
+                if self._held(row_id, token):
+                    queue, message = self._rows[row_id][:2]
+                    self._push(queue, row_id, message, failures, visible_at, None)
+                    settled += 1
+            for row_id, exception_queue, failed in rejected:
+                if self._held(row_id, token):
+                    del self._rows[row_id]
+                    self._push(exception_queue, next(self._ids), failed, 0, time.time(), None)
+                    settled += 1
+            self._changed.notify_all()
+        return settled
+
+    def _held(self, row_id, token):
+        row = self._rows.get(row_id)
+        return row is not None and row[4] == token
+
+    def wait(self, queue, timeout):
+        """Wait up to timeout seconds for a change, or until the next delayed message is due."""
+        with self._changed:
+            heap = self._heaps.get(queue)
+            if heap:
+                timeout = max(0.0, min(timeout, heap[0][0] - time.time()))
+            self._changed.wait(timeout)
+
+    def wake(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def backlog(self, queue, now):
+        """Messages ready for delivery and the earliest time one of them became visible (None if none)."""
+        with self._changed:
+            ready = [row[3] for row in self._rows.values() if row[0] == queue and row[3] <= now]
+        return len(ready), min(ready, default=None)
+
+
+class SQLiteStore:
+    """Messages of the queues in one SQLite file, one connection per thread."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS queue_messages (
+                    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                    queue       TEXT NOT NULL,
+                    message     TEXT NOT NULL,
+                    failures    INTEGER NOT NULL DEFAULT 0,
+                    visible_at  REAL NOT NULL,
+                    lease_token TEXT
+                )
+            """)
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS queue_messages_visible ON queue_messages (queue, visible_at, id)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return _Transaction(connection)
+
+    def put(self, queue, records):
+        with self._connection() as connection:
+            connection.executemany(
+                "INSERT INTO queue_messages (queue, message, failures, visible_at) VALUES (?, ?, ?, ?)",
+                [(queue, json.dumps(message), failures, visible_at) for message, failures, visible_at in records]
+            )
+
+    def take(self, queue, max_messages, now, lease_until, token):
+        with self._connection() as connection:
+            rows = connection.execute(
+                "SELECT id, message, failures, lease_token FROM queue_messages "
+                "WHERE queue = ? AND visible_at <= ? ORDER BY visible_at, id LIMIT ?",
+                (queue, now, max_messages)
+            ).fetchall()
+            connection.executemany(
+                "UPDATE queue_messages SET visible_at = ?, lease_token = ?, failures = ? WHERE id = ?",
+                [(lease_until, token, failures + (held is not None), row_id) for row_id, _, failures, held in rows]
+            )
+        return [
+            (row_id, json.loads(message), failures + (held is not None), held is not None)
+            for row_id, message, failures, held in rows
+        ]
+
+    def settle(self, token, acked, requeued, rejected):
+        settled = 0
+        with self._connection() as connection:
+            for row_id in acked:
+                settled += connection.execute(
+                    "DELETE FROM queue_messages WHERE id = ? AND lease_token = ?", (row_id, token)
+                ).rowcount
+            for row_id, failures, visible_at in requeued:
+                settled += connection.execute(
+                    "UPDATE queue_messages SET failures = ?, visible_at = ?, lease_token = NULL "
+                    "WHERE id = ? AND lease_token = ?",
+                    (failures, visible_at, row_id, token)
+                ).rowcount
+            for row_id, exception_queue, failed in rejected:
+                if connection.execute(
+                    "DELETE FROM queue_messages WHERE id = ? AND lease_token = ?", (row_id, token)
+                ).rowcount:
+                    connection.execute(
+                        "INSERT INTO queue_messages (queue, message, visible_at) VALUES (?, ?, ?)",
+                        (exception_queue, json.dumps(failed), time.time())
+                    )
+                    settled += 1
+        return settled
+
+    def wait(self, queue, timeout):
+        # Other processes enqueue too, so look again shortly
+        time.sleep(min(timeout, SQLITE_POLL_S))
+
+    def wake(self):
+        pass
+
+    def backlog(self, queue, now):
+        with self._connection() as connection:
+            return tuple(connection.execute(
+                "SELECT COUNT(*), MIN(visible_at) FROM queue_messages WHERE queue = ? AND visible_at <= ?", (queue, now)
+            ).fetchone())
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT on an autocommit SQLite connection, so leases never race."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+_memory_store = MemoryStore()
+_sqlite_stores = {}
+_sqlite_stores_lock = threading.Lock()
+
+
+class LocalQueue:
+    """A queue of one message format on a local store, with the interface of AQQueue."""
+
+    backend = None
+    transactional = False
+
+    def __init__(self, name, message_format, store, wait=NO_WAIT, max_retries=5, retry_delay_s=10,
+                 max_retry_delay_s=600, exception_queue=EXCEPTION_QUEUE, max_leases=None, visibility_timeout_s=300):
+        self.name = name
+        self.message_format = message_format
+        self.wait = wait
+        self.max_retries = max_retries
+        self.retry_delay_s = retry_delay_s
+        self.max_retry_delay_s = max_retry_delay_s
+        self.exception_queue = exception_queue
+        self.visibility_timeout_s = visibility_timeout_s
+        self._fields = message_format.codec(JSON)
+        self._store = store
+        self._stopped = threading.Event()
+        self._leases = threading.BoundedSemaphore(max_leases) if max_leases else None
+        self._lock = threading.Lock()
+        self._stats = {'leased': 0, 'acked': 0, 'retried': 0, 'rejected': 0, 'redelivered': 0, 'in_flight': 0,
+                       'expired': 0}
+
+    def join(self, connection=None):
+        """Local queues have no consumer groups."""
+
+    def listen(self, connect):
+        """Consumers of local queues are woken by the store, notifications are an AQ feature."""
+        self._stopped.clear()
+        logger.info(f"Queue {self.name} is a {self.backend} queue, ignoring ORACLE_QUEUE_CONSUMER=notify")
+
+    def stop_listening(self):
+        """Wake the consumers waiting for messages; their waits end empty from now on."""
+        self._stopped.set()
+        self._store.wake()
+
+    def get_consumer_stats(self):
+        with self._lock:
+            leases = dict(self._stats)
+        return {'mode': 'local', 'backend': self.backend, 'visibility_timeout_s': self.visibility_timeout_s,
+                'leases': leases}
+
+    def _count(self, **counts):
+        with self._lock:
+            for key, count in counts.items():
+                self._stats[key] += count
+
+    def depth(self, name=None):
+        """Messages ready for delivery on this queue (or another of the same store)."""
+        return self.backlog(name)[0]
+
+    def backlog(self, name=None):
+        """Messages ready for delivery and seconds since the oldest of them became visible (its enqueue,
+        or its last retry delay ending)."""
+        now = time.time()
+        depth, oldest = self._store.backlog(name or self.name, now)
+        return depth, now - oldest if oldest is not None else 0.0
+
+    def enqueue_many(self, messages, connection=None, visibility=None):
+        """Enqueue messages, visible at once; connection and visibility are accepted for AQQueue parity."""
+        if not messages:
+            return 0
+        now = time.time()
+        self._store.put(self.name, [(self._fields.encode(message), 0, now) for message in messages])
+        return len(messages)
+
+    def enqueue(self, message, connection=None, visibility=None):
+        self.enqueue_many([message], connection, visibility)
+
+    def dequeue_many(self, max_messages, wait=None, linger_ms=0, connection=None, visibility=None):
+        """Dequeue (lease and ack at once) up to max_messages messages."""
+        lease = self._lease(max_messages, wait, linger_ms)
+        if lease is None:
+            return []
+        lease.ack()
+        return lease.messages
+
+    def dequeue(self, wait=None, connection=None, visibility=None):
+        messages = self.dequeue_many(1, wait=wait)
+        return messages[0] if messages else None
+
+    def lease_many(self, max_messages, wait=None, linger_ms=0):
+        """Lease up to max_messages messages for visibility_timeout_s seconds, or None on timeout."""
+        if self._leases is not None:
+            self._leases.acquire()
+        try:
+            lease = self._lease(max_messages, wait, linger_ms)
+        except Exception:
+            if self._leases is not None:
+                self._leases.release()
+            raise
+        if lease is None:
+            if self._leases is not None:
+                self._leases.release()
+            return None
+        self._count(in_flight=1)
+        lease.counted = True
+        return lease
+
+    def _lease(self, max_messages, wait, linger_ms):
+        wait = self.wait if wait is None else wait
+        deadline = None if wait == WAIT_FOREVER else time.monotonic() + wait
+        token = uuid.uuid4().hex
+
+        taken = self._take(max_messages, token)
+        while not taken and not self._stopped.is_set():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            self._store.wait(self.name, SQLITE_POLL_S * 20 if remaining is None else remaining)
+            taken = self._take(max_messages, token)
+
+        if taken and linger_ms > 0 and len(taken) < max_messages:
+            linger_until = time.monotonic() + linger_ms / 1000
+            while len(taken) < max_messages and time.monotonic() < linger_until:
+                more = self._take(max_messages - len(taken), token)
+                if more:
+                    taken.extend(more)
+                else:
+                    time.sleep(LINGER_POLL_S)
+
+        # Delivered again after expired or released leases more than max_retries times
+        rejected = [item for item in taken if item[2] > self.max_retries]
+        if rejected:
+            self._settle(token, rejected=[(row_id, message, failures, REDELIVERY_ERROR)
+                                          for row_id, message, failures, _ in rejected])
+        self._count(redelivered=sum(1 for item in taken if item[3]))
+        deliveries = [item for item in taken if item[2] <= self.max_retries]
+        if not deliveries:
+            return None
+        self._count(leased=len(deliveries))
+        return LocalLease(self, token, deliveries)
+
+    def _take(self, max_messages, token):
+        now = time.time()
+        return self._store.take(self.name, max_messages, now, now + self.visibility_timeout_s, token)
+
+    def retry_delay(self, failures):
+        """Seconds before the retry following the given number of failures."""
+        return min(self.retry_delay_s * 2 ** (failures - 1), self.max_retry_delay_s)
+
+    def _settle(self, token, acked=(), requeued=(), rejected=()):
+        """Settle a lease's messages, returning how many it still held (the others expired)."""
+        now = time.time()
+        settled = self._store.settle(
+            token,
+            list(acked),
+            [(row_id, failures, now + self.retry_delay(failures)) for row_id, failures in requeued],
+            [(row_id, self.exception_queue, {
+                'queue': self.name,
+                'message': message,
+                'attempts': failures,
+                'error': str(error)[:MAX_ERROR_LENGTH],
+                'failed_at': datetime.now(timezone.utc).isoformat(timespec='seconds')
+            }) for row_id, message, failures, error in rejected]
+        )
+        self._count(rejected=len(rejected))
+        for _, message, failures, error in rejected:
+            logger.error(f"Moved message {message} of {self.name} to {self.exception_queue} "
+                         f"after {failures} failed deliveries: {error}")
+        return settled
+
+    def _finish(self, lease, **counts):
+        self._count(**counts)
+        if lease.counted:
+            self._count(in_flight=-1)
+            if self._leases is not None:
+                self._leases.release()
+
+
+class LocalLease:
+    """Messages hidden from other consumers until acked, failed, released or their visibility timeout."""
+
+    connection = None
+
+    def __init__(self, queue, token, deliveries):
+        self.queue = queue
+        self.counted = False
+        self._token = token
+        self._deliveries = deliveries  # (id, message, failures, redelivered)
+        self._done = False
+
+    @property
+    def messages(self):
+        return [message for _, message, _, _ in self._deliveries]
+
+    def __len__(self):
+        return len(self._deliveries)
+
+    def _end(self):
+        if self._done:
+            raise RuntimeError(f"Lease of {self.queue.name} already ended")
+        self._done = True
+
+    def ack(self):
+        """Delete the messages, once their processing has committed."""
+        self._end()
+        settled = self.queue._settle(self._token, acked=[row_id for row_id, _, _, _ in self._deliveries])
+        self._expired(settled)
+        self.queue._finish(self, acked=settled)
+
+    def fail(self, error):
+        """Make each message visible again after its retry delay, or move it to the exception queue."""
+        self._end()
+        retries = [(row_id, failures + 1) for row_id, _, failures, _ in self._deliveries
+                   if failures + 1 <= self.queue.max_retries]
+        rejected = [(row_id, message, failures + 1, error) for row_id, message, failures, _ in self._deliveries
+                    if failures + 1 > self.queue.max_retries]
+        settled = self.queue._settle(self._token, requeued=retries, rejected=rejected)
+        self._expired(settled)
+        self.queue._finish(self, retried=len(retries))
+        if retries:
+            logger.warning(f"Retrying {len(retries)} messages of {self.queue.name} "
+                           f"in {self.queue.retry_delay(retries[0][1]):g}s or more: {error}")
+
+    def release(self):
+        """Make the messages visible again now (counting a failed delivery)."""
+        if self._done:
+            return
+        self._done = True
+        self.queue._store.settle(self._token, [], [
+            (row_id, failures + 1, time.time()) for row_id, _, failures, _ in self._deliveries
+        ], [])
+        self.queue._finish(self)
+
+    def _expired(self, settled):
+        expired = len(self._deliveries) - settled
+        if expired:
+            self.queue._count(expired=expired)
+            logger.warning(f"{expired} messages of {self.queue.name} outlived their visibility timeout of "
+                           f"{self.queue.visibility_timeout_s:g}s and were delivered again")
+
+
+class MemoryQueue(LocalQueue):
+    """In-process queue; every MemoryQueue of a name in the process shares its messages."""
+
+    backend = 'memory'
+
+    def __init__(self, name, message_format, **options):
+        super().__init__(name, message_format, _memory_store, **options)
+
+
+class SQLiteQueue(LocalQueue):
+    """Durable queue in a SQLite file, shared by the processes of one host."""
+
+    backend = 'sqlite'
+
+    def __init__(self, name, message_format, path, **options):
+        path = str(Path(path).resolve())
+        with _sqlite_stores_lock:
+            if path not in _sqlite_stores:
+                _sqlite_stores[path] = SQLiteStore(path)
+        super().__init__(name, message_format, _sqlite_stores[path], **options)
@@ -0,0 +1,95 @@
+"""
+AQ notifications for queue consumers.
+
+A blocking dequeue keeps a pooled connection (and its server session) waiting
+inside the dequeue for the whole wait. With a QueueNotifier attached, AQQueue
+dequeues without waiting and, when the queue is empty, waits on a local event
+set by an AQ notification subscription instead, with no pooled connection
+held. The subscription lives on one standalone connection opened with events
+enabled, which python-oracledb only supports in thick mode.
+
+The wait still ends after its timeout, so messages whose notification was
+lost (or enqueued while the subscription was being re-registered) are picked
+up by the next dequeue at the latest.
+"""
+
+import logging
+import threading
+import oracledb
+
+logger = logging.getLogger(__name__)
+
+
+class QueueNotifier:
+    """Subscription to enqueue notifications of a queue, for one consumer group on multi-consumer queues.
+
+    connect returns a new standalone connection opened with events=True.
+    """
+
+    def __init__(self, queue_name, connect, consumer=None):
+        self.queue_name = queue_name
+        self.consumer = consumer
+        self._connect = connect
+        self._connection = None
+        self._subscription = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._stats = {'notifications': 0, 'wakeups': 0, 'timeouts': 0, 'deregistered': 0}
+
+    def start(self):
+        """Register the subscription (client initiated, so the database needs no route back to this host)."""
+        self._stopped = False
+        self._connection = self._connect()
+        self._subscription = self._connection.subscribe(
+            namespace=oracledb.SUBSCR_NAMESPACE_AQ,
+            name=(f"{self.queue_name}:{self.consumer}" if self.consumer else self.queue_name).upper(),
+            callback=self._notified,
+            client_initiated=True
+        )
+        logger.info(f"Subscribed to enqueue notifications of {self.queue_name}")
+
+    def _notified(self, message):
+        # Runs on a thread of the Oracle Client libraries, only signals the waiting consumers
+        with self._lock:
+            if message.type == oracledb.EVENT_DEREG:
+                self._stats['deregistered'] += 1
+            else:
+                self._stats['notifications'] += 1
+        if message.type == oracledb.EVENT_DEREG:
+            logger.warning(f"Notification subscription of {self.queue_name} was deregistered, "
+                           f"falling back to the dequeue timeout")
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """Wait up to timeout seconds (None: forever) for a notification, returning whether one arrived."""
+        notified = self._event.wait(timeout)
+        if self._stopped:
+            return False
+        self._event.clear()
+        with self._lock:
+            self._stats['wakeups' if notified else 'timeouts'] += 1
+        return notified
+
+    def is_subscribed(self):
+        return self._subscription is not None
+
+    def stop(self):
+        """Unsubscribe, close the connection and wake the waiting consumers."""
+        self._stopped = True
+        self._event.set()
+        if self._connection is None:
+            return
+        try:
+            if self._subscription is not None:
+                self._connection.unsubscribe(self._subscription)
+            self._connection.close()
+        except Exception as e:
+            logger.warning(f"Error closing the notification subscription of {self.queue_name}: {e}")
+        self._subscription = None
+        self._connection = None
+        logger.info(f"Unsubscribed from enqueue notifications of {self.queue_name}")
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats, subscribed=self.is_subscribed())
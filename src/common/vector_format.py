@@ -0,0 +1,138 @@
+"""
+Storage format of document_chunks.embedding.
+
+The column is VECTOR(*, *), so each deployment chooses how vectors are stored:
+
+- format: FLOAT32 (4 bytes per dimension), FLOAT16 (2 bytes, converted by
+  Oracle on bind) or INT8 (1 byte, quantized here with a per-vector scale)
+- dimension: 0 keeps the model's full dimension; a smaller value either
+  truncates (Matryoshka-style models) or projects with a fitted PCA
+
+Every stored and query vector is L2-normalized after dimension reduction, so
+the cheaper DOT distance ranks exactly like COSINE for FLOAT32 and FLOAT16. INT8
+vectors carry a per-vector scale and are always compared with COSINE, which
+ignores it. document_chunks.embedding_normalized records which rows were
+written this way: 1 for unit-length FLOAT32 and FLOAT16 rows, 0 for INT8 rows.
+
+The chunk write path (vector_maker_service) and the search query path
+(api_service) must apply the same transform, so both use this module; each
+service's database.vector_format builds the configured VectorStorage.
+"""
+
+import array
+import numpy as np
+
+STORAGE_FORMATS = {'FLOAT32': 4, 'FLOAT16': 2, 'INT8': 1}
+PROJECTIONS = ('truncate', 'pca')
+
+
+def _float32(vector):
+    """NumPy view of an array('f') (no copy), or a float32 copy of any other sequence."""
+    if isinstance(vector, array.array) and vector.typecode == 'f':
+        return np.frombuffer(vector, dtype=np.float32)
+    return np.asarray(vector, dtype=np.float32)
+
+def _to_array(values, typecode):
+    result = array.array(typecode)
+    result.frombytes(values.tobytes())
+    return result
+
+def normalize(vector):
+    """Scale an array('f') to unit L2 norm (zero vectors are returned unchanged)."""
+    values = _float32(vector)
+    norm = float(np.sqrt(np.dot(values, values)))
+    if not norm or abs(norm - 1.0) < 1e-6:
+        return vector
+    return _to_array(values * np.float32(1.0 / norm), 'f')
+
+def quantize_int8(vector):
+    """Scale a vector so its largest component maps to +/-127 and round to int8."""
+    values = _float32(vector)
+    peak = float(np.abs(values).max()) if values.size else 0.0
+    scale = 127.0 / peak if peak else 0.0
+    return _to_array(np.clip(np.rint(values * scale), -127, 127).astype(np.int8), 'b')
+
+
+class PcaProjection:
+    """Linear projection fitted offline (see requantize.py --fit-pca)."""
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self._mean = data['mean'].astype(np.float32)
+            self._components = data['components'].astype(np.float32)
+        self.dimension = self._components.shape[0]
+
+    def project(self, vector):
+        projected = (_float32(vector) - self._mean) @ self._components.T
+        return _to_array(projected.astype(np.float32), 'f')
+
+    @staticmethod
+    def fit(vectors, dimension, path):
+        """Fit a PCA on full-dimension float32 vectors and save it for PcaProjection."""
+        matrix = np.stack([_float32(vector) for vector in vectors])
+        mean = matrix.mean(axis=0)
+        _, _, components = np.linalg.svd(matrix - mean, full_matrices=False)
+        np.savez(path, mean=mean, components=components[:dimension])
+
+
+class VectorStorage:
+    """Transforms full-precision embeddings into the configured storage format."""
+
+    def __init__(self, storage_format='FLOAT32', dimension=0, projection='truncate', pca_path=None):
+        storage_format = storage_format.upper()
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Unknown vector storage format '{storage_format}', expected one of: {', '.join(STORAGE_FORMATS)}")
+        if projection not in PROJECTIONS:
+            raise ValueError(f"Unknown vector projection '{projection}', expected one of: {', '.join(PROJECTIONS)}")
+
+        self.format = storage_format
+        self.dimension = dimension
+        self.projection = projection
+        # Whether transform() returns unit-length vectors (embedding_normalized of the rows written)
+        self.normalized = storage_format != 'INT8'
+        self._pca = PcaProjection(pca_path) if dimension and projection == 'pca' else None
+        if self._pca is not None and self._pca.dimension != dimension:
+            raise ValueError(f"PCA at {pca_path} projects to {self._pca.dimension} dimensions, not {dimension}")
+
+    def describe(self):
+        """Short label such as INT8/256-pca, used in logs and benchmarks."""
+        if not self.dimension:
+            return f"{self.format}/full"
+        return f"{self.format}/{self.dimension}-{self.projection}"
+
+    def bytes_per_vector(self, dimension):
+        """Bytes of vector data stored for a model vector of the given dimension."""
+        return (self.dimension or dimension) * STORAGE_FORMATS[self.format]
+
+    def search_metric(self, all_normalized):
+        """DOT when every stored row is unit length and unscaled, otherwise COSINE."""
+        return 'DOT' if all_normalized and self.format != 'INT8' else 'COSINE'
+
+    @staticmethod
+    def similarity(distance, metric):
+        """Cosine similarity from a VECTOR_DISTANCE result (DOT returns the negated dot product)."""
+        return -distance if metric == 'DOT' else 1 - distance
+
+    def sql(self, placeholder):
+        """SQL expression converting a bound vector to the storage format."""
+        return f"TO_VECTOR({placeholder}, *, {self.format})"
+
+    def transform(self, vector):
+        """Reduce, normalize and quantize an array('f') for binding with sql().
+
+        FLOAT32 and FLOAT16 bind array('f') (Oracle converts to FLOAT16);
+        INT8 binds array('b').
+        """
+        if self.dimension and len(vector) > self.dimension:
+            if self._pca is not None:
+                vector = self._pca.project(vector)
+            else:
+                vector = vector[:self.dimension]
+        elif self.dimension and len(vector) < self.dimension:
+            raise ValueError(f"Cannot store a {len(vector)}-dimension vector as {self.describe()}")
+
+        # INT8 rescales every vector anyway, so its norm is irrelevant
+        if self.format == 'INT8':
+            return quantize_int8(vector)
+        return normalize(vector)
+
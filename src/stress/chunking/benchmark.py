@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Chunks per page and embedding cost of the chunker_service chunking modes.
+
+Converts each document once with the chunker_service Docling configuration,
+then chunks it in text mode (flattened markdown split by size) and structure
+mode (items of the document tree packed under heading prefixes). For each mode
+it reports the chunk count, chunks per page, the total units sent to the
+embedding model (the embedding cost) and the share of document items (paragraphs,
+list items, tables) that end up whole inside a single chunk.
+
+    python benchmark.py ../../documents/*.pdf
+    python benchmark.py --unit tokens --chunk-size 256 --overlap 25 report.pdf
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Reuse the chunker_service configuration, converter and chunkers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'chunker_service'))
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+from services.document import get_converter
+from services.chunking import iter_chunks, iter_document_chunks, count_units, document_blocks
+
+
+def chunk_modes(document, chunk_size, overlap, unit, break_at):
+    """Chunks of one converted document in each mode."""
+    markdown = document.export_to_markdown()
+    return {
+        'text': list(iter_chunks(markdown, chunk_size, overlap, unit, break_at)),
+        'structure': list(iter_document_chunks(document, chunk_size, unit))
+    }
+
+def intact_items(document, chunks):
+    """(items found whole in one chunk, items with content)."""
+    texts = [text for kind, _, text in document_blocks(document) if kind != 'heading']
+    return sum(1 for text in texts if any(text in chunk for chunk in chunks)), len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunking mode benchmark (chunks per page, embedding cost)')
+    parser.add_argument('files', nargs='+', help='Documents to convert and chunk')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Chunk size in units')
+    parser.add_argument('--overlap', type=int, default=CHUNK_OVERLAP, help='Overlap in units (text mode only)')
+    parser.add_argument('--unit', default='chars', choices=['chars', 'tokens'], help='Unit of chunk size and overlap')
+    parser.add_argument('--break-at', default='space', choices=['space', 'sentence'], help='Text mode break points')
+    args = parser.parse_args()
+
+    converter = get_converter()
+    totals = {mode: {'chunks': 0, 'units': 0, 'intact': 0, 'items': 0} for mode in ('text', 'structure')}
+    pages = 0
+
+    print(f"Chunk size {args.chunk_size} {args.unit}, overlap {args.overlap}")
+    print(f"{'document':<32} {'mode':<10} {'pages':>6} {'chunks':>7} {'per page':>9} {'units':>10} {'items whole':>12}")
+    for path in args.files:
+        document = converter.convert(path).document
+        page_count = len(document.pages)
+        pages += page_count
+
+        for mode, chunks in chunk_modes(document, args.chunk_size, args.overlap, args.unit, args.break_at).items():
+            units = sum(count_units(chunk, args.unit) for chunk in chunks)
+            intact, items = intact_items(document, chunks)
+            for key, value in (('chunks', len(chunks)), ('units', units), ('intact', intact), ('items', items)):
+                totals[mode][key] += value
+            print(f"{Path(path).name[:32]:<32} {mode:<10} {page_count:>6} {len(chunks):>7} "
+                  f"{len(chunks) / max(page_count, 1):>9.2f} {units:>10} {intact / max(items, 1):>11.1%}")
+
+    print()
+    for mode, total in totals.items():
+        print(f"{'all documents':<32} {mode:<10} {pages:>6} {total['chunks']:>7} "
+              f"{total['chunks'] / max(pages, 1):>9.2f} {total['units']:>10} {total['intact'] / max(total['items'], 1):>11.1%}")
+
+    text, structure = totals['text'], totals['structure']
+    if text['chunks']:
+        print(f"\nStructure mode: {structure['chunks'] / text['chunks'] - 1:+.1%} chunks, "
+              f"{structure['units'] / max(text['units'], 1) - 1:+.1%} embedded {args.unit}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Cold vs cached conversion time of the chunker_service conversion cache.
+
+Converts and chunks each document twice in this process, first with an empty
+cache (Docling runs and the result is stored), then again from the cache, and
+reports both times with the size of the document and of its cache entry.
+The cache lives in a temporary directory unless --cache-dir is given. Nothing
+is written to the database.
+
+    python cache.py ../../documents/*.pdf
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conversion cache benchmark')
+    parser.add_argument('files', nargs='+', help='Documents to convert')
+    parser.add_argument('--cache-dir', help='Cache directory (default: a new temporary directory)')
+    parser.add_argument('--cache-mb', type=int, default=2048, help='Cache size in MB')
+    args = parser.parse_args()
+
+    cache_dir = args.cache_dir or tempfile.mkdtemp(prefix='conversion_cache_')
+    os.environ['CHUNKER_CONVERSION_CACHE_PATH'] = cache_dir
+    os.environ['CHUNKER_CONVERSION_CACHE_MB'] = str(args.cache_mb)
+
+    # Reuse the chunker_service configuration, converter and cache
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'chunker_service'))
+    from services.document import get_converter, convert_document
+    from services.conversion_cache import file_sha256, record_lookup, get_conversion_cache_stats
+
+    get_converter()
+    print(f"Cache in {cache_dir}")
+    print(f"{'document':<32} {'KiB':>8} {'entry KiB':>10} {'cold s':>8} {'cached s':>9} {'speedup':>8} {'same':>5}")
+
+    for name in args.files:
+        path = str(Path(name).resolve())
+        file_hash = file_sha256(path)
+
+        started = time.perf_counter()
+        cold = convert_document(path, file_hash)
+        cold_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        cached = convert_document(path, file_hash)
+        cached_s = time.perf_counter() - started
+
+        for result in (cold, cached):
+            record_lookup(result['cache'])
+        if not cached['cache']['hit']:
+            print(f"{Path(name).name[:32]:<32} not cached")
+            continue
+
+        entry_kib = sum(entry.stat().st_size for entry in Path(cache_dir).glob(f"{file_hash}-*")) / 1024
+        print(f"{Path(name).name[:32]:<32} {os.path.getsize(path) / 1024:>8.0f} {entry_kib:>10.0f} "
+              f"{cold_s:>8.2f} {cached_s:>9.2f} {cold_s / cached_s:>7.0f}x {str(cold['chunks'] == cached['chunks']):>5}")
+
+    stats = get_conversion_cache_stats()
+    print(f"Hit rate {stats['hit_rate']}, {stats['bytes_saved'] / 1024 / 1024:.1f} MB and "
+          f"{stats['seconds_saved']}s of conversion saved, cache {stats['size_mb']} MB in {stats['entries']} entries")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Time to store and enqueue a document's chunks, row by row vs in one transaction.
+
+For each chunk count, a scratch document's chunks are written the way the
+chunker_service did before (one INSERT per chunk, a separate document update,
+then one pooled connection, PL/SQL block and COMMIT per enqueued JMS text
+message) and the way store_chunks does now (one executemany insert, the
+document update and one enqmany call of chunk reference messages, committed
+together), and how many payload bytes each leaves on the queue. Messages go to
+scratch queues, so the vector_maker_service does not see them; the scratch
+queues and document are removed at the end. Uses the chunker_service
+configuration (.env), including its queue payload (ORACLE_QUEUE_PAYLOAD).
+
+    python store.py --chunks 10,100,1000
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Reuse the chunker_service configuration, database layer and queue
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'chunker_service'))
+from database import init_database, get_db_pool, cleanup_database
+from database import store_document_chunks_without_embeddings, update_document_with_chunks
+from services.queue import enqueue_chunks_for_embedding
+from config import QUEUE_PAYLOAD
+
+SCRATCH_QUEUE = 'vector_benchmark_chunk'
+FORMER_QUEUE = 'vector_benchmark_jms_chunk'
+JMS = 'SYS.AQ$_JMS_TEXT_MESSAGE'
+# Payload bytes of a message, by queue payload type (JSON as its serialized text)
+PAYLOAD_BYTES = {
+    JMS: 't.user_data.text_len',
+    'RAW': 'DBMS_LOB.GETLENGTH(t.user_data)',
+    'JSON': 'DBMS_LOB.GETLENGTH(JSON_SERIALIZE(t.user_data RETURNING BLOB))'
+}
+WORDS = ('vector', 'search', 'oracle', 'embedding', 'index', 'query', 'latency', 'chunk', 'document', 'recall')
+
+
+def create_scratch_queue(cursor, queue_name, payload_type):
+    """(Re)create and start a scratch queue."""
+    drop_scratch_queue(cursor, queue_name)
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.CREATE_QUEUE_TABLE(
+                queue_table        => '{queue_name}_table',
+                queue_payload_type => '{payload_type}'
+            );
+            DBMS_AQADM.CREATE_QUEUE(queue_name => '{queue_name}', queue_table => '{queue_name}_table');
+            DBMS_AQADM.START_QUEUE(queue_name => '{queue_name}');
+        END;
+    """)
+
+def drop_scratch_queue(cursor, queue_name):
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.DROP_QUEUE_TABLE(queue_table => '{queue_name}_table', force => TRUE);
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE != -24002 THEN RAISE; END IF;
+        END;
+    """)
+
+def create_scratch_document(cursor):
+    document_id = cursor.var(int)
+    cursor.execute("""
+        INSERT INTO documents (filename, processing_status) VALUES ('store-benchmark', 'pending')
+        RETURNING id INTO :document_id
+    """, document_id=document_id)
+    cursor.connection.commit()
+    return document_id.getvalue()[0]
+
+def drop_scratch_document(cursor, document_id):
+    cursor.execute("DELETE FROM document_chunks WHERE document_id = :doc_id", [document_id])
+    cursor.execute("DELETE FROM documents WHERE id = :doc_id", [document_id])
+    cursor.connection.commit()
+
+
+def former_store(document_id, chunks):
+    """Chunk rows, document update and enqueues as the chunker_service wrote them before."""
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM document_chunks WHERE document_id = :doc_id", [document_id])
+        for i, chunk_text in enumerate(chunks):
+            cursor.execute("""
+                INSERT INTO document_chunks (document_id, chunk_index, chunk_text, chunk_size)
+                VALUES (:doc_id, :chunk_idx, :chunk_text, :chunk_size)
+            """, {'doc_id': document_id, 'chunk_idx': i, 'chunk_text': chunk_text, 'chunk_size': len(chunk_text)})
+        connection.commit()
+
+    update_document_with_chunks(document_id, len(chunks), title='store-benchmark')
+
+    for i, chunk_text in enumerate(chunks):
+        with get_db_pool().acquire() as connection:
+            connection.cursor().execute("""
+                DECLARE
+                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
+                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
+                    message_handle     RAW(16);
+                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
+                BEGIN
+                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
+                    message.set_text(:payload);
+                    DBMS_AQ.ENQUEUE(
+                        queue_name         => :queue_name,
+                        enqueue_options    => enqueue_options,
+                        message_properties => message_properties,
+                        payload            => message,
+                        msgid              => message_handle
+                    );
+                    COMMIT;
+                END;
+            """, payload=json.dumps({'document_id': document_id, 'chunk_index': i, 'chunk_text': chunk_text}),
+                queue_name=FORMER_QUEUE)
+
+def transactional_store(document_id, chunks):
+    """Chunk rows, document update and enqueues in one transaction, as store_chunks writes them."""
+    with get_db_pool().acquire() as connection:
+        stored = store_document_chunks_without_embeddings(document_id, chunks, connection=connection)
+        update_document_with_chunks(document_id, stored, title='store-benchmark', connection=connection)
+        enqueue_chunks_for_embedding(document_id, 0, stored, connection=connection, queue_name=SCRATCH_QUEUE)
+        connection.commit()
+
+def queued_bytes(cursor, queue_name, payload_type):
+    """Message payload bytes on a scratch queue."""
+    cursor.execute(f"SELECT NVL(SUM({PAYLOAD_BYTES[payload_type]}), 0) FROM {queue_name}_table t")
+    return cursor.fetchone()[0]
+
+def purge_scratch_queue(cursor, queue_name):
+    cursor.execute(f"""
+        DECLARE
+            purge_options DBMS_AQADM.AQ$_PURGE_OPTIONS_T;
+        BEGIN
+            DBMS_AQADM.PURGE_QUEUE_TABLE('{queue_name}_table', NULL, purge_options);
+        END;
+    """)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunk store and enqueue benchmark')
+    parser.add_argument('--chunks', default='10,100,1000', help='Comma separated chunk counts per document')
+    parser.add_argument('--chunk-size', type=int, default=512, help='Characters per chunk')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per variant and count (median reported)')
+    args = parser.parse_args()
+
+    counts = [int(count) for count in args.chunks.split(',')]
+    rng = random.Random(42)
+
+    init_database()
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        queues = {
+            'former': (former_store, FORMER_QUEUE, JMS),
+            'transactional': (transactional_store, SCRATCH_QUEUE, QUEUE_PAYLOAD.upper())
+        }
+        for _, queue_name, payload_type in queues.values():
+            create_scratch_queue(cursor, queue_name, payload_type)
+        document_id = create_scratch_document(cursor)
+        try:
+            print(f"{'chunks':>7} {'row by row ms':>14} {'one transaction ms':>19} {'speedup':>8} "
+                  f"{'queued KiB before':>18} {'after':>8}")
+            for count in counts:
+                chunks = []
+                for _ in range(count):
+                    words = []
+                    while sum(len(word) + 1 for word in words) < args.chunk_size:
+                        words.append(rng.choice(WORDS))
+                    chunks.append(' '.join(words)[:args.chunk_size])
+
+                times = {}
+                queued = {}
+                for name, (store, queue_name, payload_type) in queues.items():
+                    runs = []
+                    for _ in range(args.repeat):
+                        started = time.perf_counter()
+                        store(document_id, chunks)
+                        runs.append(time.perf_counter() - started)
+                        queued[name] = queued_bytes(cursor, queue_name, payload_type) / 1024
+                        purge_scratch_queue(cursor, queue_name)
+                    times[name] = statistics.median(runs) * 1000
+
+                print(f"{count:>7} {times['former']:>14.1f} {times['transactional']:>19.1f} "
+                      f"{times['former'] / times['transactional']:>7.1f}x "
+                      f"{queued['former']:>18.1f} {queued['transactional']:>8.1f}")
+        finally:
+            drop_scratch_document(cursor, document_id)
+            for _, queue_name, _ in queues.values():
+                drop_scratch_queue(cursor, queue_name)
+    cleanup_database()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Peak memory and time to first chunk of whole vs page-window conversion.
+
+Each variant runs in a fresh process: the converter is warmed first, then the
+document is converted and chunked either whole (CHUNKER_PAGE_WINDOW=0) or in
+windows of N pages, the way the chunker_service streams long PDFs. Reported
+are the time until the first chunk is available, the total time, and the
+peak RSS above the warmed process. Nothing is written to the database.
+
+    python streaming.py --windows 0,10,20,50 ../../documents/large.pdf
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+
+# Time conversions, not conversion cache hits
+os.environ['CHUNKER_CONVERSION_CACHE_MB'] = '0'
+
+# Reuse the chunker_service configuration, converter and chunkers
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'chunker_service'))
+from config import CHUNK_MODE
+from services.chunking import iter_window_chunks, iter_block_chunks
+from services.document import get_converter, convert_document, convert_window
+from services.processing import pdf_page_count, page_windows
+
+
+def _rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_variant(path, window):
+    """(first chunk s, total s, chunks, warmed MiB, peak MiB) in this process."""
+    from docling.datamodel.base_models import InputFormat
+
+    get_converter().initialize_pipeline(InputFormat.PDF)
+    warmed = _rss_mb()
+
+    started = time.perf_counter()
+    if window:
+        windows = page_windows(pdf_page_count(path), window)
+        if CHUNK_MODE == 'structure':
+            chunks = iter_block_chunks(chain.from_iterable(convert_window(path, *pages)['blocks'] for pages in windows))
+        else:
+            chunks = iter_window_chunks(convert_window(path, *pages)['markdown'] for pages in windows)
+    else:
+        chunks = convert_document(path)['chunks']
+
+    first_chunk_s = None
+    count = 0
+    for _ in chunks:
+        if first_chunk_s is None:
+            first_chunk_s = time.perf_counter() - started
+        count += 1
+    return first_chunk_s, time.perf_counter() - started, count, warmed, _rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Whole vs page-window conversion benchmark')
+    parser.add_argument('file', help='PDF to convert')
+    parser.add_argument('--windows', default='0,10,20', help='Comma-separated page windows, 0 = whole document')
+    args = parser.parse_args()
+
+    path = str(Path(args.file).resolve())
+    print(f"{Path(path).name}: {pdf_page_count(path)} pages, {CHUNK_MODE} chunking")
+    print(f"{'window':>8} {'first chunk s':>14} {'total s':>9} {'chunks':>7} {'peak MiB':>9} {'above warm':>11}")
+
+    context = multiprocessing.get_context('spawn')
+    for window in (int(value) for value in args.windows.split(',')):
+        # A fresh process per variant, so peak RSS is not carried over
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            first_chunk_s, total_s, count, warmed, peak = pool.submit(run_variant, path, window).result()
+        label = str(window) if window else 'whole'
+        print(f"{label:>8} {first_chunk_s or total_s:>14.2f} {total_s:>9.2f} {count:>7} {peak:>9.0f} {peak - warmed:>11.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Documents per minute of the chunker_service conversion pool by worker count.
+
+Converts and chunks the given documents through the conversion pool (Docling
+in spawned worker processes) once per worker count, after warming every worker.
+Nothing is written to the database. With CPU-bound PDF conversion the rate
+should grow with the worker count up to the number of cores.
+
+    python throughput.py --workers 1,2,4,8 ../../documents/*.pdf
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Time conversions, not conversion cache hits
+os.environ['CHUNKER_CONVERSION_CACHE_MB'] = '0'
+
+# Reuse the chunker_service configuration and conversion pool
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'chunker_service'))
+from services.conversion import init_conversion_pool, submit_conversion, cleanup_conversion_pool
+from services.document import convert_document
+
+
+def run(files, workers, rounds):
+    """Documents per minute and chunk count with the given number of worker processes."""
+    init_conversion_pool(workers)
+    try:
+        # Start and warm every worker before timing
+        for future in [submit_conversion(convert_document, files[0]) for _ in range(workers)]:
+            future.result()
+
+        started = time.perf_counter()
+        futures = [submit_conversion(convert_document, path) for _ in range(rounds) for path in files]
+        chunks = sum(len(future.result()[0]['chunks']) for future in futures)
+        elapsed = time.perf_counter() - started
+    finally:
+        cleanup_conversion_pool()
+    return len(futures) / elapsed * 60, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conversion pool throughput benchmark')
+    parser.add_argument('files', nargs='+', help='Documents to convert (absolute, or relative to DOCUMENTS_STORAGE_PATH)')
+    parser.add_argument('--workers', default=f"1,2,{os.cpu_count() or 1}", help='Comma-separated worker process counts')
+    parser.add_argument('--rounds', type=int, default=1, help='Times each document is converted per worker count')
+    args = parser.parse_args()
+
+    files = [str(Path(path).resolve()) for path in args.files]
+    print(f"Converting {len(files)} documents x {args.rounds} on {os.cpu_count()} cores")
+    print(f"{'workers':>8} {'docs/min':>10} {'speedup':>8} {'chunks':>8}")
+
+    baseline = None
+    for workers in (int(value) for value in args.workers.split(',')):
+        rate, chunks = run(files, workers, args.rounds)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.2f}x {chunks:>8}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chunker_service text chunker.
+
+Compares the former chunk_text, which walks back one character at a time from
+every window end and returns a list, with the streaming iter_chunks, which
+finds break points once per document. Input is synthetic markdown (headings,
+paragraphs, lists, tables and long links) of the requested size.
+
+Character sizing only needs python-dotenv (for the chunker_service config).
+--unit tokens loads the tokenizer set by CHUNKER_TOKENIZER and needs transformers.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Use the chunker_service configuration and chunking module, without the
+# services package (which pulls in the database layer)
+CHUNKER_SERVICE = Path(__file__).resolve().parent.parent.parent / 'chunker_service'
+sys.path[:0] = [str(CHUNKER_SERVICE), str(CHUNKER_SERVICE / 'services')]
+from chunking import iter_chunks
+
+WORDS = ('vector', 'search', 'oracle', 'embedding', 'index', 'query', 'latency', 'chunk',
+         'document', 'the', 'of', 'and', 'a', 'to', 'in', 'database', 'model', 'recall')
+
+
+def former_chunk_text(text, chunk_size, overlap):
+    """chunk_text as it was before the streaming chunker."""
+    if not text or text.strip() == '':
+        return []
+    if len(text) <= chunk_size:
+        return [text]
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end >= len(text):
+            chunks.append(text[start:])
+            break
+        while end > start and text[end] != ' ':
+            end -= 1
+        if end == start:
+            end = start + chunk_size
+        chunks.append(text[start:end])
+        start = end - overlap
+    return chunks
+
+
+def sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 20))]
+    return ' '.join(words).capitalize() + '.'
+
+def make_markdown(size, seed=42):
+    """Synthetic markdown of about size characters."""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < size:
+        kind = rng.random()
+        if kind < 0.1:
+            block = f"## {sentence(rng)[:-1].title()}"
+        elif kind < 0.25:
+            block = '\n'.join(f"- {sentence(rng)}" for _ in range(rng.randint(2, 6)))
+        elif kind < 0.35:
+            rows = [f"| {' | '.join(rng.choice(WORDS) for _ in range(4))} |" for _ in range(rng.randint(2, 8))]
+            block = '\n'.join(['| a | b | c | d |', '|---|---|---|---|'] + rows)
+        elif kind < 0.4:
+            block = f"See [the reference](https://example.com/{'/'.join(rng.choice(WORDS) for _ in range(12))})."
+        else:
+            block = ' '.join(sentence(rng) for _ in range(rng.randint(3, 8)))
+        parts.append(block)
+        length += len(block) + 2
+    return '\n\n'.join(parts)[:size]
+
+
+def measure(chunk, text, iterations):
+    """Return (MB/s, peak traced KiB, chunk count) for one chunker."""
+    count = sum(1 for _ in chunk(text))
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for _ in chunk(text):
+            pass
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for _ in chunk(text):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return len(text) * iterations / elapsed / 1e6, peak / 1024, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunker throughput benchmark')
+    parser.add_argument('--size', type=int, default=5_000_000, help='Characters of synthetic markdown')
+    parser.add_argument('--file', help='Chunk this markdown file instead of synthetic text')
+    parser.add_argument('--chunk-size', type=int, default=512, help='Chunk size in units')
+    parser.add_argument('--overlap', type=int, default=50, help='Overlap in units')
+    parser.add_argument('--unit', default='chars', choices=['chars', 'tokens'], help='Unit of chunk size and overlap')
+    parser.add_argument('--break-at', default='space', choices=['space', 'sentence'], help='Break point preference')
+    parser.add_argument('--iterations', type=int, default=3, help='Timed passes per chunker')
+    args = parser.parse_args()
+
+    text = Path(args.file).read_text() if args.file else make_markdown(args.size)
+    print(f"Chunking {len(text) / 1e6:.1f} M characters, size {args.chunk_size} {args.unit}, "
+          f"overlap {args.overlap}, break at {args.break_at} (pid {os.getpid()})")
+
+    chunkers = {
+        'iter_chunks': lambda text: iter_chunks(text, args.chunk_size, args.overlap, args.unit, args.break_at)
+    }
+    if args.unit == 'chars' and args.break_at == 'space':
+        chunkers['former chunk_text'] = lambda text: former_chunk_text(text, args.chunk_size, args.overlap)
+
+    print(f"{'chunker':<20} {'MB/s':>8} {'peak KiB':>10} {'chunks':>8}")
+    for name, chunk in chunkers.items():
+        throughput, peak, count = measure(chunk, text, args.iterations)
+        print(f"{name:<20} {throughput:>8.1f} {peak:>10.0f} {count:>8}")
+
+    if 'former chunk_text' in chunkers:
+        identical = list(chunkers['iter_chunks'](text)) == chunkers['former chunk_text'](text)
+        print(f"Output identical: {identical}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
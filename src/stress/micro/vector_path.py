@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the embedding vector path of the vector_maker_service.
+
+Compares the former path, where every vector is a Python list of floats that is
+converted to array.array('f') at the cache and again at the Oracle bind, with
+the float32 path, where the model output is copied once into an array.array('f')
+that is carried unchanged through the cache, the model server socket and the bind.
+
+Only the standard library is needed; the model output is simulated with a
+float32 buffer of the same shape.
+"""
+
+import argparse
+import array
+import gc
+import pickle
+import random
+import time
+import tracemalloc
+
+
+def make_model_output(batch_size, dimension):
+    """Simulated pooled model output: one float32 row per text."""
+    source = array.array('f', (random.uniform(-1, 1) for _ in range(batch_size * dimension)))
+    view = memoryview(source)
+    return [view[i * dimension:(i + 1) * dimension] for i in range(batch_size)]
+
+
+def list_path(rows):
+    """Former path: list of floats from the model, converted at each stage."""
+    # Backend returned Python lists (vLLM embed() / NumPy tolist())
+    embeddings = [row.tolist() for row in rows]
+    # Cache stored array('f') copies and handed lists back
+    cached = [array.array('f', embedding) for embedding in embeddings]
+    embeddings = [vector.tolist() for vector in cached]
+    # Model server socket round trip
+    embeddings = pickle.loads(pickle.dumps(embeddings, protocol=pickle.HIGHEST_PROTOCOL))
+    # Oracle VECTOR bind needs array('f')
+    return [array.array('f', embedding) for embedding in embeddings]
+
+
+def float32_path(rows):
+    """Current path: one copy into array('f'), then passed by reference."""
+    embeddings = []
+    for row in rows:
+        vector = array.array('f')
+        vector.frombytes(row.cast('B'))
+        embeddings.append(vector)
+    # Cache stores and returns the same arrays; the socket pickles raw bytes
+    embeddings = pickle.loads(pickle.dumps(embeddings, protocol=pickle.HIGHEST_PROTOCOL))
+    # Bound to the VECTOR column as-is
+    return embeddings
+
+
+def measure(path, rows, iterations):
+    """Return (ms per batch, peak traced KiB) for one path."""
+    path(rows)
+    gc.collect()
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        path(rows)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / iterations
+
+    gc.collect()
+    tracemalloc.start()
+    path(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed_ms, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Vector path micro-benchmark (list of floats vs float32 arrays)')
+    parser.add_argument('--dimension', '-d', type=int, default=4096, help='Vector dimension')
+    parser.add_argument('--batch-size', '-b', type=int, default=16, help='Vectors per batch')
+    parser.add_argument('--iterations', '-i', type=int, default=50, help='Timed batches per path')
+    args = parser.parse_args()
+
+    rows = make_model_output(args.batch_size, args.dimension)
+    payload_kib = args.batch_size * args.dimension * 4 / 1024
+
+    print(f"Vector path benchmark: {args.batch_size} x {args.dimension} float32 "
+          f"({payload_kib:.0f} KiB of vector data per batch), {args.iterations} iterations")
+    print(f"{'path':<10} {'ms/batch':>10} {'peak KiB':>10}")
+
+    results = {}
+    for name, path in (('list', list_path), ('float32', float32_path)):
+        results[name] = measure(path, rows, args.iterations)
+        elapsed_ms, peak_kib = results[name]
+        print(f"{name:<10} {elapsed_ms:>10.2f} {peak_kib:>10.0f}")
+
+    list_ms, list_peak = results['list']
+    float32_ms, float32_peak = results['float32']
+    print(f"float32 path: {list_ms / float32_ms:.1f}x faster, {list_peak / float32_peak:.1f}x lower peak memory")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Enqueue and lease throughput of the local queue backends, without a database.
+
+For each backend, --messages chunk range messages are enqueued in batches of
+--batch with enqueue_many, then --consumers threads (or processes) lease
+batches of up to --batch messages and ack them, as the vector_maker_service
+prefetch stage does:
+
+- memory: in-process queue (threads only)
+- sqlite: queue in a scratch SQLite file, removed at the end
+
+Reports enqueue and lease+ack messages per second. The Oracle AQ client is
+measured by throughput.py and sharded.py, against the database.
+
+    python backends.py --messages 20000 --batch 16 --consumers 4
+    python backends.py --backends sqlite --processes
+"""
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Shared queue client
+SRC = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(SRC))
+from common.queues import create_queue, CHUNK_RANGE_MESSAGE
+
+SCRATCH_QUEUE = 'vector_benchmark_local'
+
+
+def messages(count):
+    return [
+        {'document_id': i // 100 + 1, 'first_chunk_index': i % 100, 'last_chunk_index': i % 100}
+        for i in range(count)
+    ]
+
+def open_queue(backend, path):
+    return create_queue(backend, SCRATCH_QUEUE, CHUNK_RANGE_MESSAGE, get_pool=None, sqlite_path=path)
+
+def consume(backend, path, batch, idle_s, received):
+    """Lease and ack batches until the queue stays empty for idle_s seconds."""
+    queue = open_queue(backend, path)
+    count = 0
+    while True:
+        lease = queue.lease_many(batch, wait=idle_s)
+        if lease is None:
+            break
+        count += len(lease)
+        lease.ack()
+    received.put(count)
+
+def run(backend, path, args):
+    queue = open_queue(backend, path)
+    pending = messages(args.messages)
+
+    started = time.perf_counter()
+    for start in range(0, len(pending), args.batch):
+        queue.enqueue_many(pending[start:start + args.batch])
+    enqueue_s = time.perf_counter() - started
+
+    processes = args.processes and backend == 'sqlite'
+    received = multiprocessing.Queue() if processes else _Counts()
+    worker = multiprocessing.Process if processes else threading.Thread
+    consumers = [
+        worker(target=consume, args=(backend, path, args.batch, args.idle_s, received))
+        for _ in range(args.consumers)
+    ]
+    started = time.perf_counter()
+    for consumer in consumers:
+        consumer.start()
+    counts = [received.get() for _ in consumers]
+    for consumer in consumers:
+        consumer.join()
+    # The last lease of every consumer waited idle_s for nothing
+    lease_s = time.perf_counter() - started - args.idle_s
+
+    return {
+        'enqueue_rate': args.messages / enqueue_s,
+        'received': sum(counts),
+        'lease_rate': sum(counts) / lease_s if lease_s > 0 else float('nan'),
+        'consumers': 'processes' if processes else 'threads'
+    }
+
+class _Counts:
+    """The get/put of multiprocessing.Queue for consumer threads."""
+
+    def __init__(self):
+        self._counts = []
+        self._changed = threading.Condition()
+
+    def put(self, count):
+        with self._changed:
+            self._counts.append(count)
+            self._changed.notify()
+
+    def get(self):
+        with self._changed:
+            self._changed.wait_for(lambda: self._counts)
+            return self._counts.pop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local queue backend throughput')
+    parser.add_argument('--messages', type=int, default=20000, help='Chunk range messages enqueued')
+    parser.add_argument('--batch', type=int, default=16, help='Messages per enqueue_many and per lease')
+    parser.add_argument('--consumers', type=int, default=4, help='Consumers leasing batches')
+    parser.add_argument('--processes', action='store_true', help='Run the sqlite consumers as processes')
+    parser.add_argument('--idle-s', type=float, default=0.5, help='Empty wait after which a consumer stops')
+    parser.add_argument('--backends', default='memory,sqlite', help='Comma separated backends')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as scratch:
+        path = str(Path(scratch) / 'queues.sqlite3')
+        print(f"{'backend':<8} {'enqueue msg/s':>14} {'received':>9} {'lease+ack msg/s':>16}  consumers")
+        for backend in args.backends.split(','):
+            result = run(backend.strip(), path, args)
+            print(f"{backend:<8} {result['enqueue_rate']:>14.0f} {result['received']:>9} "
+                  f"{result['lease_rate']:>16.0f}  {args.consumers} {result['consumers']}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
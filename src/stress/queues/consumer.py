@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Idle pool use and enqueue-to-start latency of polling vs notification consumers.
+
+For each consumer mode, --consumers threads consume a scratch queue the way
+the chunking worker does, each calling dequeue(timeout) in a loop:
+
+- poll: blocking dequeues, each holding a pooled connection inside the wait
+- notify: dequeues without waiting, then an AQ notification wait with no
+  connection held (AQQueue.listen)
+
+While the queue is idle, the pool's busy connections are sampled. Then a
+producer enqueues --messages messages one at a time at random intervals, and
+the time from each enqueue's commit to its dequeue returning is measured.
+
+Notifications need thick mode, so the script runs with ORACLE_QUEUE_CONSUMER=
+notify (set ORACLE_CLIENT_LIB_DIR if the Oracle Client libraries are not on
+the system library path) and both modes are measured in thick mode. Uses the
+chunker_service configuration (.env); the scratch queue is dropped at the end.
+
+    python consumer.py --consumers 4 --idle-s 10 --messages 200
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ['ORACLE_QUEUE_CONSUMER'] = 'notify'
+
+# Reuse the chunker_service configuration and database layer, and the shared queue client
+SRC = Path(__file__).resolve().parent.parent.parent
+sys.path[:0] = [str(SRC / 'chunker_service'), str(SRC)]
+from config import QUEUE_PAYLOAD, ORACLE_POOL_MAX
+from database import init_database, get_db_pool, cleanup_database, connect_for_notifications
+from common.queues import AQQueue, CHUNK_RANGE_MESSAGE
+
+SCRATCH_QUEUE = 'vector_benchmark_consumer'
+STOP = 0  # document_id of the message that stops a consumer
+
+
+def create_scratch_queue(cursor):
+    """(Re)create and start the scratch queue."""
+    drop_scratch_queue(cursor)
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.CREATE_QUEUE_TABLE(
+                queue_table        => '{SCRATCH_QUEUE}_table',
+                queue_payload_type => '{QUEUE_PAYLOAD.upper()}'
+            );
+            DBMS_AQADM.CREATE_QUEUE(queue_name => '{SCRATCH_QUEUE}', queue_table => '{SCRATCH_QUEUE}_table');
+            DBMS_AQADM.START_QUEUE(queue_name => '{SCRATCH_QUEUE}');
+        END;
+    """)
+
+def drop_scratch_queue(cursor):
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.DROP_QUEUE_TABLE(queue_table => '{SCRATCH_QUEUE}_table', force => TRUE);
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE != -24002 THEN RAISE; END IF;
+        END;
+    """)
+
+
+def consume(queue, timeout, received):
+    """Consumer loop of a service worker, recording when each message was dequeued."""
+    while True:
+        message = queue.dequeue(wait=timeout)
+        if message is None:
+            continue
+        if message['document_id'] == STOP:
+            return
+        received[message['document_id']] = time.perf_counter()
+
+def sample_busy(pool, seconds, interval=0.05):
+    """Busy pool connections sampled every interval for seconds."""
+    samples = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        samples.append(pool.busy)
+        time.sleep(interval)
+    return samples
+
+def run(mode, args):
+    queue = AQQueue(SCRATCH_QUEUE, CHUNK_RANGE_MESSAGE, get_db_pool, payload=QUEUE_PAYLOAD)
+    if mode == 'notify':
+        queue.listen(connect_for_notifications)
+
+    received = {}
+    consumers = [
+        threading.Thread(target=consume, args=(queue, args.timeout, received), daemon=True)
+        for _ in range(args.consumers)
+    ]
+    for consumer in consumers:
+        consumer.start()
+
+    # Let every consumer reach its wait, then sample the idle pool
+    time.sleep(1)
+    busy = sample_busy(get_db_pool(), args.idle_s)
+
+    rng = random.Random(42)
+    enqueued = {}
+    with get_db_pool().acquire() as connection:
+        for document_id in range(1, args.messages + 1):
+            time.sleep(rng.uniform(args.min_gap_ms, args.max_gap_ms) / 1000)
+            queue.enqueue({'document_id': document_id, 'first_chunk_index': 0, 'last_chunk_index': 0},
+                          connection=connection)
+            connection.commit()
+            enqueued[document_id] = time.perf_counter()
+
+        # Give the last messages time to arrive, then stop the consumers
+        time.sleep(1)
+        queue.enqueue_many([{'document_id': STOP, 'first_chunk_index': 0, 'last_chunk_index': 0}] * args.consumers,
+                           connection=connection)
+        connection.commit()
+    for consumer in consumers:
+        consumer.join(args.timeout + 5)
+    stats = queue.get_consumer_stats()
+    queue.stop_listening()
+
+    latencies = sorted((received[i] - enqueued[i]) * 1000 for i in enqueued if i in received)
+    return {
+        'busy_mean': statistics.mean(busy),
+        'busy_max': max(busy),
+        'received': len(latencies),
+        'p50': statistics.median(latencies) if latencies else float('nan'),
+        'p95': latencies[int(len(latencies) * 0.95) - 1] if latencies else float('nan'),
+        'max': latencies[-1] if latencies else float('nan'),
+        'stats': stats
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Polling vs notification queue consumer benchmark')
+    parser.add_argument('--consumers', type=int, default=4, help='Consumer threads (service workers)')
+    parser.add_argument('--timeout', type=int, default=30, help='Dequeue timeout of the consumers in seconds')
+    parser.add_argument('--idle-s', type=float, default=10, help='Seconds of idle pool sampling')
+    parser.add_argument('--messages', type=int, default=200, help='Messages enqueued one at a time')
+    parser.add_argument('--min-gap-ms', type=float, default=20, help='Shortest pause between enqueues')
+    parser.add_argument('--max-gap-ms', type=float, default=200, help='Longest pause between enqueues')
+    parser.add_argument('--modes', default='poll,notify', help='Comma separated consumer modes')
+    args = parser.parse_args()
+
+    init_database()
+    with get_db_pool().acquire() as connection:
+        create_scratch_queue(connection.cursor())
+    try:
+        print(f"{'mode':<7} {'idle busy mean':>15} {'max':>5} {'of':>4} {'received':>9} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  consumer")
+        for mode in args.modes.split(','):
+            result = run(mode.strip(), args)
+            print(f"{mode:<7} {result['busy_mean']:>15.2f} {result['busy_max']:>5} {ORACLE_POOL_MAX:>4} "
+                  f"{result['received']:>9} {result['p50']:>8.1f} {result['p95']:>8.1f} {result['max']:>8.1f}  "
+                  f"{result['stats']}")
+    finally:
+        with get_db_pool().acquire() as connection:
+            drop_scratch_queue(connection.cursor())
+        cleanup_database()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Multi-consumer dequeue throughput and document affinity, classic vs sharded queue.
+
+For each queue layout, --messages chunk range messages of --documents
+documents are enqueued interleaved (as several chunker replicas produce
+them), then --consumers threads consume them the way vector_maker replicas
+do, each leasing batches of up to --batch messages and acking them:
+
+- classic: a single-consumer AQ queue in one queue table, which every
+  consumer dequeues from
+- sharded: a Transactional Event Queue with --shards shards, messages keyed
+  by document id, consumed by one consumer group whose shards the database
+  spreads over the consumer sessions
+
+Reports messages per second, the documents per leased batch (fewer means
+longer chunk ranges per get_chunk_texts query) and the consumers that handled
+each document (1.0 means every document stayed with one consumer).
+
+Sharded queues need thick mode (set ORACLE_CLIENT_LIB_DIR if the Oracle
+Client libraries are not on the system library path). Uses the
+chunker_service configuration (.env); the scratch queues are dropped at the
+end.
+
+    python sharded.py --messages 20000 --documents 200 --consumers 4 --shards 8
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+os.environ['ORACLE_QUEUE_SHARDED'] = 'true'
+
+# Reuse the chunker_service configuration and database layer, and the shared queue client
+SRC = Path(__file__).resolve().parent.parent.parent
+sys.path[:0] = [str(SRC / 'chunker_service'), str(SRC)]
+from config import QUEUE_PAYLOAD
+from database import init_database, get_db_pool, cleanup_database
+from common.queues import AQQueue, CHUNK_RANGE_MESSAGE
+
+CONSUMER_GROUP = 'VECTOR_BENCHMARK'
+QUEUES = {
+    'classic': 'vector_benchmark_classic',
+    'sharded': 'vector_benchmark_sharded'
+}
+
+
+def create_scratch_queues(cursor, shards):
+    """(Re)create and start the scratch queues."""
+    drop_scratch_queues(cursor)
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.CREATE_QUEUE_TABLE(
+                queue_table        => '{QUEUES['classic']}_table',
+                queue_payload_type => '{QUEUE_PAYLOAD.upper()}'
+            );
+            DBMS_AQADM.CREATE_QUEUE(queue_name => '{QUEUES['classic']}', queue_table => '{QUEUES['classic']}_table');
+            DBMS_AQADM.START_QUEUE(queue_name => '{QUEUES['classic']}');
+
+            DBMS_AQADM.CREATE_TRANSACTIONAL_EVENT_QUEUE(
+                queue_name         => '{QUEUES['sharded']}',
+                multiple_consumers => TRUE,
+                queue_payload_type => '{QUEUE_PAYLOAD.upper()}'
+            );
+            DBMS_AQADM.SET_QUEUE_PARAMETER('{QUEUES['sharded']}', 'SHARD_NUM', {shards});
+            DBMS_AQADM.SET_QUEUE_PARAMETER('{QUEUES['sharded']}', 'KEY_BASED_ENQUEUE', 1);
+            DBMS_AQADM.SET_QUEUE_PARAMETER('{QUEUES['sharded']}', 'STICKY_DEQUEUE', 1);
+            DBMS_AQADM.START_QUEUE(queue_name => '{QUEUES['sharded']}');
+            DBMS_AQADM.ADD_SUBSCRIBER('{QUEUES['sharded']}', SYS.AQ$_AGENT('{CONSUMER_GROUP}', NULL, NULL));
+        END;
+    """)
+
+def drop_scratch_queues(cursor):
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.DROP_QUEUE_TABLE(queue_table => '{QUEUES['classic']}_table', force => TRUE);
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE != -24002 THEN RAISE; END IF;
+        END;
+    """)
+    cursor.execute(f"""
+        BEGIN
+            DBMS_AQADM.DROP_TRANSACTIONAL_EVENT_QUEUE(queue_name => '{QUEUES['sharded']}', force => TRUE);
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE NOT IN (-24010, -24002) THEN RAISE; END IF;
+        END;
+    """)
+
+
+def messages(count, documents):
+    """Chunk range messages, interleaved across documents."""
+    return [
+        {'document_id': i % documents + 1, 'first_chunk_index': i // documents, 'last_chunk_index': i // documents}
+        for i in range(count)
+    ]
+
+def consume(queue, consumer, batch, idle_s, batches):
+    """Lease and ack batches until the queue stays empty for idle_s seconds."""
+    while True:
+        lease = queue.lease_many(batch, wait=idle_s)
+        if lease is None:
+            return
+        batches.append((consumer, [message['document_id'] for message in lease.messages]))
+        lease.ack()
+
+def run(layout, args):
+    queue = AQQueue(QUEUES[layout], CHUNK_RANGE_MESSAGE, get_db_pool, payload=QUEUE_PAYLOAD,
+                    consumer=CONSUMER_GROUP if layout == 'sharded' else None)
+    pending = messages(args.messages, args.documents)
+    with get_db_pool().acquire() as connection:
+        for start in range(0, len(pending), 1000):
+            queue.enqueue_many(pending[start:start + 1000], connection=connection)
+            connection.commit()
+
+    batches = []
+    consumers = [
+        threading.Thread(target=consume, args=(queue, consumer, args.batch, args.idle_s, batches))
+        for consumer in range(args.consumers)
+    ]
+    started = time.perf_counter()
+    for consumer in consumers:
+        consumer.start()
+    for consumer in consumers:
+        consumer.join()
+    # The last lease of every consumer waited idle_s for nothing
+    elapsed = time.perf_counter() - started - args.idle_s
+
+    consumers_by_document = defaultdict(set)
+    for consumer, documents in batches:
+        for document_id in documents:
+            consumers_by_document[document_id].add(consumer)
+    received = sum(len(documents) for _, documents in batches)
+    return {
+        'received': received,
+        'rate': received / elapsed if elapsed > 0 else float('nan'),
+        'documents_per_batch': statistics.mean(len(set(documents)) for _, documents in batches) if batches else 0,
+        'consumers_per_document': (statistics.mean(len(c) for c in consumers_by_document.values())
+                                   if consumers_by_document else 0)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Classic vs sharded queue with several consumers')
+    parser.add_argument('--messages', type=int, default=20000, help='Chunk range messages enqueued')
+    parser.add_argument('--documents', type=int, default=200, help='Documents the messages are spread over')
+    parser.add_argument('--consumers', type=int, default=4, help='Consumer threads (vector_maker replicas)')
+    parser.add_argument('--batch', type=int, default=16, help='Messages leased per batch')
+    parser.add_argument('--shards', type=int, default=8, help='Shards of the sharded queue')
+    parser.add_argument('--idle-s', type=float, default=2, help='Empty wait after which a consumer stops')
+    parser.add_argument('--layouts', default='classic,sharded', help='Comma separated queue layouts')
+    args = parser.parse_args()
+
+    init_database()
+    with get_db_pool().acquire() as connection:
+        create_scratch_queues(connection.cursor(), args.shards)
+    try:
+        print(f"{'layout':<8} {'received':>9} {'msg/s':>9} {'docs/batch':>11} {'consumers/doc':>14}")
+        for layout in args.layouts.split(','):
+            result = run(layout.strip(), args)
+            print(f"{layout:<8} {result['received']:>9} {result['rate']:>9.0f} "
+                  f"{result['documents_per_batch']:>11.2f} {result['consumers_per_document']:>14.2f}")
+    finally:
+        with get_db_pool().acquire() as connection:
+            drop_scratch_queues(connection.cursor())
+        cleanup_database()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
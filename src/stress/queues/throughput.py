@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Enqueue and dequeue throughput of the PL/SQL queue path vs the native queue client.
+
+Every variant moves the same chunk range messages through its own scratch
+queue, first enqueuing them all, then dequeuing them all, batch by batch:
+
+- plsql single: one PL/SQL DBMS_AQ.ENQUEUE / DEQUEUE block of a JMS text
+  message and one COMMIT per message, as the services did for single messages
+- plsql array: one DBMS_AQ.ENQUEUE_ARRAY block per batch (JSON array of the
+  messages in a CLOB) and one PL/SQL dequeue loop per batch, as the
+  chunker_service and vector_maker_service did for batches
+- native raw / native json: the shared AQQueue client (src/common/queues),
+  enqmany and deqmany of RAW (binary layout) or JSON payloads, one COMMIT
+  per batch
+
+Scratch queues (and the JMS payload array type) are removed at the end, so
+the services never see the messages. Uses the chunker_service configuration
+(.env) for the database.
+
+    python throughput.py --messages 10000 --batch 16,256
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Reuse the chunker_service configuration and database layer, and the shared queue client
+SRC = Path(__file__).resolve().parent.parent.parent
+sys.path[:0] = [str(SRC / 'chunker_service'), str(SRC)]
+import oracledb
+from database import init_database, get_db_pool, cleanup_database
+from common.queues import AQQueue, CHUNK_RANGE_MESSAGE, RAW, JSON, NO_WAIT
+
+JMS = 'SYS.AQ$_JMS_TEXT_MESSAGE'
+JMS_ARRAY = 'vector_benchmark_jms_array'
+QUEUES = {
+    'plsql single': ('vector_benchmark_plsql_single', JMS),
+    'plsql array': ('vector_benchmark_plsql_array', JMS),
+    'native raw': ('vector_benchmark_native_raw', 'RAW'),
+    'native json': ('vector_benchmark_native_json', 'JSON')
+}
+
+
+def create_scratch_queues(cursor):
+    """(Re)create and start the scratch queues and the JMS payload array type."""
+    drop_scratch_queues(cursor)
+    cursor.execute(f"CREATE TYPE {JMS_ARRAY} AS TABLE OF {JMS}")
+    for queue_name, payload_type in QUEUES.values():
+        cursor.execute(f"""
+            BEGIN
+                DBMS_AQADM.CREATE_QUEUE_TABLE(
+                    queue_table        => '{queue_name}_table',
+                    queue_payload_type => '{payload_type}'
+                );
+                DBMS_AQADM.CREATE_QUEUE(queue_name => '{queue_name}', queue_table => '{queue_name}_table');
+                DBMS_AQADM.START_QUEUE(queue_name => '{queue_name}');
+            END;
+        """)
+
+def drop_scratch_queues(cursor):
+    for queue_name, _ in QUEUES.values():
+        cursor.execute(f"""
+            BEGIN
+                DBMS_AQADM.DROP_QUEUE_TABLE(queue_table => '{queue_name}_table', force => TRUE);
+            EXCEPTION WHEN OTHERS THEN
+                IF SQLCODE != -24002 THEN RAISE; END IF;
+            END;
+        """)
+    cursor.execute(f"""
+        BEGIN
+            EXECUTE IMMEDIATE 'DROP TYPE {JMS_ARRAY}';
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE != -4043 THEN RAISE; END IF;
+        END;
+    """)
+
+
+def plsql_single_enqueue(connection, queue_name, messages):
+    for message in messages:
+        connection.cursor().execute("""
+            DECLARE
+                enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
+                message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
+                message_handle     RAW(16);
+                message            SYS.AQ$_JMS_TEXT_MESSAGE;
+            BEGIN
+                message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
+                message.set_text(:payload);
+                DBMS_AQ.ENQUEUE(
+                    queue_name         => :queue_name,
+                    enqueue_options    => enqueue_options,
+                    message_properties => message_properties,
+                    payload            => message,
+                    msgid              => message_handle
+                );
+                COMMIT;
+            END;
+        """, payload=json.dumps(message), queue_name=queue_name)
+
+def plsql_single_dequeue(connection, queue_name, max_messages):
+    received = []
+    while len(received) < max_messages:
+        cursor = connection.cursor()
+        result_var = cursor.var(oracledb.DB_TYPE_CLOB)
+        cursor.execute("""
+            DECLARE
+                dequeue_options    DBMS_AQ.DEQUEUE_OPTIONS_T;
+                message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
+                message_handle     RAW(16);
+                message            SYS.AQ$_JMS_TEXT_MESSAGE;
+                text_content       CLOB;
+                no_messages        EXCEPTION;
+                PRAGMA EXCEPTION_INIT(no_messages, -25228);
+            BEGIN
+                dequeue_options.wait := DBMS_AQ.NO_WAIT;
+                DBMS_AQ.DEQUEUE(
+                    queue_name         => :queue_name,
+                    dequeue_options    => dequeue_options,
+                    message_properties => message_properties,
+                    payload            => message,
+                    msgid              => message_handle
+                );
+                message.get_text(text_content);
+                :result := text_content;
+                COMMIT;
+            EXCEPTION
+                WHEN no_messages THEN
+                    :result := NULL;
+            END;
+        """, queue_name=queue_name, result=result_var)
+        result = result_var.getvalue()
+        if result is None:
+            break
+        received.append(json.loads(result.read()))
+    return received
+
+def plsql_array_enqueue(connection, queue_name, messages):
+    cursor = connection.cursor()
+    payloads_var = cursor.var(oracledb.DB_TYPE_CLOB)
+    payloads_var.setvalue(0, json.dumps(messages))
+    cursor.execute(f"""
+        DECLARE
+            payloads           JSON_ARRAY_T := JSON_ARRAY_T.parse(:payloads);
+            enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
+            message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
+            properties_array   DBMS_AQ.MESSAGE_PROPERTIES_ARRAY_T := DBMS_AQ.MESSAGE_PROPERTIES_ARRAY_T();
+            message_handles    DBMS_AQ.MSGID_ARRAY_T;
+            message            SYS.AQ$_JMS_TEXT_MESSAGE;
+            messages           {JMS_ARRAY} := {JMS_ARRAY}();
+            enqueued           PLS_INTEGER;
+        BEGIN
+            messages.EXTEND(payloads.get_size());
+            properties_array.EXTEND(payloads.get_size());
+            FOR i IN 0 .. payloads.get_size() - 1 LOOP
+                message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
+                message.set_text(payloads.get(i).to_string());
+                messages(i + 1) := message;
+                properties_array(i + 1) := message_properties;
+            END LOOP;
+            enqueued := DBMS_AQ.ENQUEUE_ARRAY(
+                queue_name               => :queue_name,
+                enqueue_options          => enqueue_options,
+                array_size               => messages.COUNT,
+                message_properties_array => properties_array,
+                payload_array            => messages,
+                msgid_array              => message_handles
+            );
+        END;
+    """, payloads=payloads_var, queue_name=queue_name)
+    connection.commit()
+
+def plsql_array_dequeue(connection, queue_name, max_messages):
+    cursor = connection.cursor()
+    result_var = cursor.var(oracledb.DB_TYPE_CLOB)
+    cursor.execute("""
+        DECLARE
+            dequeue_options    DBMS_AQ.DEQUEUE_OPTIONS_T;
+            message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
+            message_handle     RAW(16);
+            message            SYS.AQ$_JMS_TEXT_MESSAGE;
+            text_content       CLOB;
+            batch_content      CLOB;
+            received           PLS_INTEGER := 0;
+            no_messages        EXCEPTION;
+            PRAGMA EXCEPTION_INIT(no_messages, -25228);
+        BEGIN
+            dequeue_options.wait := DBMS_AQ.NO_WAIT;
+            DBMS_LOB.CREATETEMPORARY(batch_content, TRUE);
+            WHILE received < :max_messages LOOP
+                BEGIN
+                    DBMS_AQ.DEQUEUE(
+                        queue_name         => :queue_name,
+                        dequeue_options    => dequeue_options,
+                        message_properties => message_properties,
+                        payload            => message,
+                        msgid              => message_handle
+                    );
+                EXCEPTION
+                    WHEN no_messages THEN
+                        EXIT;
+                END;
+                message.get_text(text_content);
+                IF received > 0 THEN
+                    DBMS_LOB.WRITEAPPEND(batch_content, 1, ',');
+                END IF;
+                DBMS_LOB.APPEND(batch_content, text_content);
+                received := received + 1;
+            END LOOP;
+            COMMIT;
+            :result := batch_content;
+        END;
+    """, max_messages=max_messages, queue_name=queue_name, result=result_var)
+    result = result_var.getvalue()
+    content = result.read() if result is not None else None
+    return json.loads(f"[{content}]") if content else []
+
+def native_variant(queue_name, payload):
+    queue = AQQueue(queue_name, CHUNK_RANGE_MESSAGE, get_db_pool, payload=payload, wait=NO_WAIT)
+
+    def enqueue(connection, _, messages):
+        queue.enqueue_many(messages, connection=connection)
+        connection.commit()
+
+    def dequeue(connection, _, max_messages):
+        received = queue.dequeue_many(max_messages, connection=connection)
+        connection.commit()
+        return received
+
+    return enqueue, dequeue
+
+
+def run(variant, enqueue, dequeue, messages, batch):
+    """Messages per second of enqueuing then dequeuing all messages in batches."""
+    queue_name = QUEUES[variant][0]
+    with get_db_pool().acquire() as connection:
+        started = time.perf_counter()
+        for first in range(0, len(messages), batch):
+            enqueue(connection, queue_name, messages[first:first + batch])
+        enqueue_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        received = 0
+        while received < len(messages):
+            dequeued = dequeue(connection, queue_name, batch)
+            if not dequeued:
+                break
+            received += len(dequeued)
+        dequeue_s = time.perf_counter() - started
+
+    if received != len(messages):
+        print(f"{variant}: dequeued {received} of {len(messages)} messages")
+    return len(messages) / enqueue_s, received / dequeue_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Queue throughput benchmark, PL/SQL vs native AQ client')
+    parser.add_argument('--messages', type=int, default=10000, help='Messages per variant and batch size')
+    parser.add_argument('--batch', default='16,256', help='Comma separated messages per enqueue / dequeue call')
+    parser.add_argument('--variants', default=','.join(QUEUES), help='Comma separated variants to run')
+    args = parser.parse_args()
+
+    batches = [int(batch) for batch in args.batch.split(',')]
+    variants = {
+        'plsql single': (plsql_single_enqueue, plsql_single_dequeue),
+        'plsql array': (plsql_array_enqueue, plsql_array_dequeue),
+        'native raw': native_variant(QUEUES['native raw'][0], RAW),
+        'native json': native_variant(QUEUES['native json'][0], JSON)
+    }
+    selected = [variant.strip() for variant in args.variants.split(',')]
+
+    messages = [
+        {'document_id': 1 + i // 64, 'first_chunk_index': (i % 64) * 16, 'last_chunk_index': (i % 64) * 16 + 15}
+        for i in range(args.messages)
+    ]
+
+    init_database()
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        create_scratch_queues(cursor)
+        try:
+            print(f"{'variant':<13} {'batch':>6} {'enqueue msg/s':>14} {'dequeue msg/s':>14}")
+            for batch in batches:
+                baseline = None
+                for variant in selected:
+                    enqueued, dequeued = run(variant, *variants[variant], messages, batch)
+                    baseline = baseline or (enqueued, dequeued)
+                    print(f"{variant:<13} {batch:>6} {enqueued:>14.0f} {dequeued:>14.0f}   "
+                          f"({enqueued / baseline[0]:.1f}x / {dequeued / baseline[1]:.1f}x)")
+        finally:
+            drop_scratch_queues(cursor)
+    cleanup_database()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
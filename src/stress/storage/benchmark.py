@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Recall vs storage vs latency for the document_chunks embedding storage formats.
+
+Copies a sample of full-precision chunk embeddings (or synthetic clustered
+vectors) into a scratch table once per storage variant, then runs the same
+exact top-k COSINE queries against each. Recall@k is measured against the
+FLOAT32 full-dimension results. Uses the vector_maker_service configuration
+(.env) for the database connection and its vector_format module for the
+transforms, so the numbers match what the services store.
+
+    python benchmark.py --formats FLOAT32,FLOAT16,INT8 --dimensions 0,1024,256
+    python benchmark.py --synthetic --rows 2000 --dimension 1024
+"""
+
+import argparse
+import array
+import random
+import sys
+import time
+from pathlib import Path
+
+# Reuse the vector_maker_service configuration and storage transforms
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'vector_maker_service'))
+import oracledb
+from config import ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN
+from database.vector_format import VectorStorage
+
+SCRATCH_TABLE = 'vector_format_benchmark'
+
+
+def load_sample(connection, rows):
+    """Full-dimension FLOAT32 embeddings from document_chunks."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT embedding FROM document_chunks
+        WHERE embedding IS NOT NULL AND VECTOR_DIMENSION_FORMAT(embedding) = 'FLOAT32'
+        FETCH FIRST :rows ROWS ONLY
+    """, {'rows': rows})
+    return [row[0] for row in cursor.fetchall()]
+
+def synthetic_sample(rows, dimension, clusters=50, seed=42):
+    """Clustered Gaussian vectors, so nearest neighbours are meaningful."""
+    rng = random.Random(seed)
+    centers = [[rng.gauss(0, 1) for _ in range(dimension)] for _ in range(clusters)]
+    return [
+        array.array('f', [value + rng.gauss(0, 0.5) for value in rng.choice(centers)])
+        for _ in range(rows)
+    ]
+
+def create_scratch_table(cursor, storage, vectors):
+    """(Re)create the scratch table and load the vectors in the given storage format."""
+    cursor.execute(f"""
+        BEGIN
+            EXECUTE IMMEDIATE 'DROP TABLE {SCRATCH_TABLE} PURGE';
+        EXCEPTION WHEN OTHERS THEN
+            IF SQLCODE != -942 THEN RAISE; END IF;
+        END;
+    """)
+    cursor.execute(f"CREATE TABLE {SCRATCH_TABLE} (id NUMBER PRIMARY KEY, embedding VECTOR(*, *))")
+    cursor.executemany(
+        f"INSERT INTO {SCRATCH_TABLE} (id, embedding) VALUES (:id, {storage.sql(':embedding')})",
+        [{'id': i, 'embedding': storage.transform(vector)} for i, vector in enumerate(vectors)]
+    )
+    cursor.connection.commit()
+
+def segment_bytes(cursor):
+    """Allocated bytes of the scratch table and its LOB segments."""
+    cursor.execute("""
+        SELECT NVL(SUM(bytes), 0) FROM user_segments
+        WHERE segment_name = :table_name
+           OR segment_name IN (SELECT segment_name FROM user_lobs WHERE table_name = :table_name)
+    """, {'table_name': SCRATCH_TABLE.upper()})
+    return cursor.fetchone()[0]
+
+def run_queries(cursor, storage, queries, k):
+    """Top-k ids and latency in seconds for each query."""
+    sql = f"""
+        SELECT id FROM {SCRATCH_TABLE}
+        ORDER BY VECTOR_DISTANCE(embedding, {storage.sql(':query')}, COSINE)
+        FETCH FIRST :k ROWS ONLY
+    """
+    results = []
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        cursor.execute(sql, {'query': storage.transform(query), 'k': k})
+        results.append([row[0] for row in cursor.fetchall()])
+        latencies.append(time.perf_counter() - started)
+    return results, latencies
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Embedding storage format benchmark (recall vs storage vs latency)')
+    parser.add_argument('--formats', default='FLOAT32,FLOAT16,INT8', help='Comma-separated storage formats')
+    parser.add_argument('--dimensions', default='0,1024,256', help='Comma-separated stored dimensions, 0 = full')
+    parser.add_argument('--projection', default='truncate', choices=['truncate', 'pca'], help='Dimension reduction')
+    parser.add_argument('--pca-path', default='../../vector_maker_service/cache/embedding_pca.npz', help='Fitted PCA (pca projection only, one dimension)')
+    parser.add_argument('--rows', type=int, default=2000, help='Vectors loaded per variant')
+    parser.add_argument('--queries', type=int, default=100, help='Queries per variant')
+    parser.add_argument('--k', type=int, default=10, help='Recall@k')
+    parser.add_argument('--synthetic', action='store_true', help='Use synthetic vectors instead of document_chunks')
+    parser.add_argument('--dimension', type=int, default=4096, help='Synthetic vector dimension')
+    args = parser.parse_args()
+
+    connection = oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN)
+    cursor = connection.cursor()
+
+    vectors = synthetic_sample(args.rows, args.dimension) if args.synthetic else load_sample(connection, args.rows)
+    if len(vectors) <= args.k:
+        print(f"Error: need more than {args.k} vectors, found {len(vectors)} (try --synthetic)")
+        return 1
+
+    full_dimension = len(vectors[0])
+    queries = random.Random(7).sample(vectors, min(args.queries, len(vectors)))
+    variants = [
+        VectorStorage(storage_format, int(dimension), args.projection, args.pca_path)
+        for dimension in args.dimensions.split(',')
+        for storage_format in args.formats.split(',')
+    ]
+
+    print(f"Storage format benchmark: {len(vectors)} vectors of {full_dimension} dimensions, "
+          f"{len(queries)} queries, recall@{args.k}")
+    print(f"{'variant':<22} {'vector bytes':>12} {'table MiB':>10} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    # Ground truth: exact search on the full FLOAT32 vectors
+    baseline = VectorStorage('FLOAT32')
+    create_scratch_table(cursor, baseline, vectors)
+    truth, _ = run_queries(cursor, baseline, queries, args.k)
+
+    try:
+        for storage in variants:
+            create_scratch_table(cursor, storage, vectors)
+            results, latencies = run_queries(cursor, storage, queries, args.k)
+            recall = sum(len(set(found) & set(expected)) for found, expected in zip(results, truth)) / (len(queries) * args.k)
+            print(f"{storage.describe():<22} {storage.bytes_per_vector(full_dimension):>12} "
+                  f"{segment_bytes(cursor) / 1048576:>10.1f} {recall:>8.3f} "
+                  f"{percentile(latencies, 0.50) * 1000:>8.2f} {percentile(latencies, 0.95) * 1000:>8.2f}")
+    finally:
+        cursor.execute(f"DROP TABLE {SCRATCH_TABLE} PURGE")
+        connection.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,9 @@
 import os
 from datetime import datetime
 from flask import Blueprint, jsonify
-from models import get_model, is_model_ready
+from services import get_model_client, ModelServerError
 from database import get_db_pool, is_db_ready
-from config import MODEL_NAME
+from config import MODEL_NAME, EMBEDDING_BACKEND
 
 health_bp = Blueprint('health', __name__)
 
@@ -24,32 +24,34 @@ def readiness_check():
         'service': 'vector_maker_service',
         'timestamp': datetime.utcnow().isoformat() + 'Z',
         'model': MODEL_NAME,
+        'backend': EMBEDDING_BACKEND,
         'services': {
             'model': False,
             'database': False
         }
     }
     
-    # Check model status
-    if not is_model_ready():
+    # Check model status on the model server
+    client = get_model_client()
+    if client is None:
         health_status['status'] = 'not ready'
-        health_status['reason'] = 'model not initialized'
+        health_status['reason'] = 'model server client not initialized'
         return jsonify(health_status), 503
     
     try:
-        # Test model with a simple embedding request
-        model = get_model()
-        test_output = model.embed(["test"])
-        if test_output and len(test_output) > 0:
-            health_status['services']['model'] = True
-        else:
-            health_status['status'] = 'not ready'
-            health_status['reason'] = 'model test failed'
-            return jsonify(health_status), 503
-    except Exception as e:
+        model_status = client.ping()
+    except ModelServerError as e:
+        health_status['status'] = 'not ready'
+        health_status['reason'] = f'model server error: {str(e)}'
+        return jsonify(health_status), 503
+    
+    health_status['model_server_pid'] = model_status['pid']
+    if not model_status['model_ready']:
         health_status['status'] = 'not ready'
-        health_status['reason'] = f'model error: {str(e)}'
+        health_status['reason'] = 'model not initialized'
         return jsonify(health_status), 503
+    health_status['backend'] = model_status['backend']
+    health_status['services']['model'] = True
     
     # Check database status
     if not is_db_ready():
@@ -1,6 +1,7 @@
 import logging
-from flask import Blueprint, request, jsonify
-from models import get_model, is_model_ready
+from flask import Blueprint, Response, request, jsonify
+from services import get_model_client, ModelServerError
+from . import vector_codec
 
 logger = logging.getLogger(__name__)
 
@@ -8,8 +9,16 @@ api_bp = Blueprint('api', __name__)
 
 @api_bp.route('/embeddings', methods=['POST'])
 def create_embeddings():
-    if not is_model_ready():
-        return jsonify({'error': 'Model not ready'}), 503
+    """Embed texts, answering in the format chosen by the Accept header.
+    
+    application/json (default) returns one object per text. Set "encoding" to
+    "base64" for base64 float32 vectors and "include_texts" to false to omit the
+    echoed texts. application/octet-stream and application/x-npy return just the
+    float32 matrix, see vector_codec.
+    """
+    client = get_model_client()
+    if client is None:
+        return jsonify({'error': 'Model server client not initialized'}), 503
     
     try:
         data = request.get_json()
@@ -20,20 +29,53 @@ def create_embeddings():
         if not isinstance(texts, list):
             return jsonify({'error': 'texts must be an array'}), 400
         
-        # Generate embeddings
-        model = get_model()
-        outputs = model.embed(texts)
+        encoding = data.get('encoding', 'float')
+        if encoding not in ('float', 'base64'):
+            return jsonify({'error': 'encoding must be "float" or "base64"'}), 400
+        include_texts = data.get('include_texts', True)
+        
+        mimetype = request.accept_mimetypes.best_match(
+            [vector_codec.JSON, vector_codec.OCTET_STREAM, vector_codec.NPY],
+            default=vector_codec.JSON
+        )
+        
+        # Generate embeddings in the interactive lane of the model server
+        vectors = client.embed(texts, lane='query')
+        
+        if mimetype == vector_codec.OCTET_STREAM:
+            return Response(vector_codec.encode_octet_stream(vectors), mimetype=mimetype)
+        if mimetype == vector_codec.NPY:
+            return Response(vector_codec.encode_npy(vectors), mimetype=mimetype)
         
-        # Format response
+        # Format response, converting the float32 vectors to JSON only here
         embeddings = []
-        for text, output in zip(texts, outputs):
-            embeddings.append({
-                'text': text,
-                'embedding': output.outputs.embedding,
-                'size': len(output.outputs.embedding)
-            })
+        for text, embedding in zip(texts, vectors):
+            item = {
+                'embedding': vector_codec.encode_base64(embedding) if encoding == 'base64' else embedding.tolist(),
+                'size': len(embedding)
+            }
+            if include_texts:
+                item['text'] = text
+            embeddings.append(item)
         
-        return jsonify({'embeddings': embeddings})
+        response = {'embeddings': embeddings}
+        if encoding == 'base64':
+            response['dtype'] = '<f4'
+        return jsonify(response)
     
+    except ModelServerError as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-lane scheduler metrics, embedding cache counters and worker pipeline stages from the model server."""
+    client = get_model_client()
+    if client is None:
+        return jsonify({'error': 'Model server client not initialized'}), 503
+    
+    try:
+        return jsonify(client.get_stats())
+    except ModelServerError as e:
+        return jsonify({'error': str(e)}), 503
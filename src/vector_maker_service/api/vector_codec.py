@@ -0,0 +1,59 @@
+"""
+Compact encodings for /embeddings responses.
+
+All binary forms carry the vectors as little-endian float32:
+
+- application/octet-stream: a 12 byte header (magic b'EMB1', uint32 count,
+  uint32 dimension) followed by count * dimension float32 values, row-major
+- application/x-npy: a NumPy .npy (format 1.0) file of shape (count, dimension)
+  and dtype '<f4', readable with numpy.load
+- base64: each vector's float32 bytes base64-encoded inside the JSON response
+"""
+
+import array
+import base64
+import struct
+import sys
+
+JSON = 'application/json'
+OCTET_STREAM = 'application/octet-stream'
+NPY = 'application/x-npy'
+
+MAGIC = b'EMB1'
+HEADER = struct.Struct('<4sII')
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+
+
+def _dimension(vectors):
+    dimension = len(vectors[0]) if vectors else 0
+    if any(len(vector) != dimension for vector in vectors):
+        raise ValueError("All embeddings must have the same dimension for a binary response")
+    return dimension
+
+def float32_le_bytes(vector):
+    """Little-endian float32 bytes of an array.array('f')."""
+    if sys.byteorder == 'little':
+        return vector.tobytes()
+    swapped = array.array('f', vector)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+def encode_base64(vector):
+    """Base64 text of one vector's little-endian float32 bytes."""
+    return base64.b64encode(float32_le_bytes(vector)).decode('ascii')
+
+def encode_octet_stream(vectors):
+    """Header plus the row-major float32 matrix of all vectors."""
+    dimension = _dimension(vectors)
+    return HEADER.pack(MAGIC, len(vectors), dimension) + b''.join(float32_le_bytes(vector) for vector in vectors)
+
+def encode_npy(vectors):
+    """NumPy .npy (format 1.0) file holding a (count, dimension) '<f4' matrix."""
+    dimension = _dimension(vectors)
+    header = repr({'descr': '<f4', 'fortran_order': False, 'shape': (len(vectors), dimension)})
+    # Pad so the data starts on a 64 byte boundary, header ends with a newline
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = (header + ' ' * (padding % 64) + '\n').encode('latin1')
+    return (NPY_MAGIC + struct.pack('<H', len(header)) + header
+            + b''.join(float32_le_bytes(vector) for vector in vectors))
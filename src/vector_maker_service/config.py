@@ -1,4 +1,6 @@
 import os
+import secrets
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -9,10 +11,71 @@ PORT = int(os.getenv('VECTOR_PORT', '8001'))
 DEBUG = os.getenv('VECTOR_DEBUG', 'True').lower() in ('true', '1', 'yes')
 CORS_ORIGINS = os.getenv('VECTOR_CORS_ORIGINS', '*').split(',')
 
+# Model Server Configuration (long-lived process owning the model and the worker)
+# Socket in a directory only this user can enter (created by the model server), under XDG_RUNTIME_DIR if set
+MODEL_SERVER_SOCKET = os.getenv('VECTOR_MODEL_SERVER_SOCKET') or os.path.join(
+    os.getenv('XDG_RUNTIME_DIR') or tempfile.gettempdir(), f'vector_maker-{os.getuid()}', 'model.sock'
+)
+# Shared secret for model server connections. When unset, a random one is generated and put in the environment,
+# which the model server and the HTTP workers started from this process (gunicorn master, app.py) inherit
+MODEL_SERVER_AUTHKEY_GENERATED = not os.getenv('VECTOR_MODEL_SERVER_AUTHKEY')
+if MODEL_SERVER_AUTHKEY_GENERATED:
+    os.environ['VECTOR_MODEL_SERVER_AUTHKEY'] = secrets.token_hex(32)
+MODEL_SERVER_AUTHKEY = os.environ['VECTOR_MODEL_SERVER_AUTHKEY'].encode('utf-8')
+MODEL_SERVER_AUTOSTART = os.getenv('VECTOR_MODEL_SERVER_AUTOSTART', 'True').lower() in ('true', '1', 'yes')
+MODEL_SERVER_TIMEOUT = int(os.getenv('VECTOR_MODEL_SERVER_TIMEOUT', '120'))
+
 # Model Configuration
+EMBEDDING_BACKEND = os.getenv('VECTOR_BACKEND', 'vllm').lower()  # vllm, cpu or fake
 MODEL_NAME = os.getenv('VECTOR_MODEL', 'intfloat/e5-mistral-7b-instruct')
 ENFORCE_EAGER = os.getenv('VECTOR_ENFORCE_EAGER', 'True').lower() in ('true', '1', 'yes')
 
+# CPU Backend Configuration (sentence-transformers)
+CPU_RUNTIME = os.getenv('VECTOR_CPU_RUNTIME', 'torch').lower()  # torch or onnx
+CPU_QUANTIZE = os.getenv('VECTOR_CPU_QUANTIZE', 'none').lower()  # none or int8 (onnx only)
+CPU_EXPORT_DIR = os.getenv('VECTOR_CPU_EXPORT_DIR', './cache/onnx')
+CPU_BATCH_SIZE = int(os.getenv('VECTOR_CPU_BATCH_SIZE', '32'))
+
+# Fake Backend Configuration (deterministic hash-based vectors)
+FAKE_DIMENSION = int(os.getenv('VECTOR_FAKE_DIMENSION', '4096'))
+FAKE_LATENCY_MS = float(os.getenv('VECTOR_FAKE_LATENCY_MS', '0'))
+FAKE_LATENCY_PER_TEXT_MS = float(os.getenv('VECTOR_FAKE_LATENCY_PER_TEXT_MS', '0'))
+FAKE_MAX_TOKENS = int(os.getenv('VECTOR_FAKE_MAX_TOKENS', '512'))
+
+# Request Batching Configuration (query lane micro-batcher for /embeddings)
+BATCH_WINDOW_MS = float(os.getenv('VECTOR_BATCH_WINDOW_MS', '5'))
+BATCH_MAX_SIZE = int(os.getenv('VECTOR_BATCH_MAX_SIZE', '64'))
+BATCH_REQUEST_TIMEOUT = int(os.getenv('VECTOR_BATCH_REQUEST_TIMEOUT', '60'))
+BATCH_TOKEN_BUDGET = int(os.getenv('VECTOR_BATCH_TOKEN_BUDGET', '16384'))  # Max padded tokens (texts x longest text) per model call
+MAX_INPUT_TOKENS = int(os.getenv('VECTOR_MAX_INPUT_TOKENS', '0'))  # Split longer inputs; 0 uses the model limit
+
+# Scheduler Configuration (query vs bulk lane arbitration)
+SCHEDULER_BULK_MIN_SHARE = float(os.getenv('VECTOR_SCHEDULER_BULK_MIN_SHARE', '0.2'))
+SCHEDULER_SHARE_WINDOW_S = float(os.getenv('VECTOR_SCHEDULER_SHARE_WINDOW_S', '10'))
+SCHEDULER_METRICS_WINDOW = int(os.getenv('VECTOR_SCHEDULER_METRICS_WINDOW', '1024'))
+
+# Embedding Cache Configuration
+CACHE_ENABLED = os.getenv('VECTOR_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+CACHE_MAX_BYTES = int(os.getenv('VECTOR_CACHE_MAX_BYTES', '268435456'))  # 256MB default
+CACHE_PERSISTENT = os.getenv('VECTOR_CACHE_PERSISTENT', 'none').lower()  # none, file or oracle
+CACHE_FILE_PATH = os.getenv('VECTOR_CACHE_FILE_PATH', './cache/embedding_cache.sqlite3')
+
+# Embedding Worker Configuration
+WORKER_BATCH_SIZE = int(os.getenv('VECTOR_WORKER_BATCH_SIZE', '16'))
+WORKER_BATCH_LINGER_MS = int(os.getenv('VECTOR_WORKER_BATCH_LINGER_MS', '50'))
+WORKER_DEQUEUE_TIMEOUT = int(os.getenv('VECTOR_WORKER_DEQUEUE_TIMEOUT', '30'))
+WORKER_PREFETCH_BATCHES = int(os.getenv('VECTOR_WORKER_PREFETCH_BATCHES', '4'))  # Dequeued batches buffered ahead of the model
+WORKER_WRITE_QUEUE_BATCHES = int(os.getenv('VECTOR_WORKER_WRITE_QUEUE_BATCHES', '4'))  # Embedded batches buffered ahead of the writer
+WORKER_WRITE_GROUP_MAX = int(os.getenv('VECTOR_WORKER_WRITE_GROUP_MAX', '256'))  # Max chunks per group commit
+WORKER_MAX_LEASES = int(os.getenv('VECTOR_WORKER_MAX_LEASES', '6'))  # Dequeued batches in flight until written, each holding a pooled connection
+WORKER_STATS_WINDOW_S = float(os.getenv('VECTOR_WORKER_STATS_WINDOW_S', '30'))  # Window for stage utilization
+
+# Embedding Storage Configuration (must match in api_service and vector_maker_service)
+EMBEDDING_STORAGE_FORMAT = os.getenv('EMBEDDING_STORAGE_FORMAT', 'FLOAT32').upper()  # FLOAT32, FLOAT16 or INT8
+EMBEDDING_STORAGE_DIMENSION = int(os.getenv('EMBEDDING_STORAGE_DIMENSION', '0'))  # 0 keeps the model dimension
+EMBEDDING_STORAGE_PROJECTION = os.getenv('EMBEDDING_STORAGE_PROJECTION', 'truncate').lower()  # truncate or pca
+EMBEDDING_PCA_PATH = os.getenv('EMBEDDING_PCA_PATH', './cache/embedding_pca.npz')
+
 # Oracle Database Configuration
 ORACLE_USER = os.getenv('ORACLE_USER', 'SYSTEM')
 ORACLE_PASSWORD = os.getenv('ORACLE_PASSWORD', os.getenv('ORACLE_DB_PASSWORD', 'password'))
@@ -25,4 +88,17 @@ ORACLE_DSN = os.getenv('ORACLE_DSN') or f'{ORACLE_HOST}:{ORACLE_PORT}/{ORACLE_SE
 ORACLE_POOL_MIN = int(os.getenv('ORACLE_POOL_MIN', '2'))
 ORACLE_POOL_MAX = int(os.getenv('ORACLE_POOL_MAX', '10'))
 ORACLE_POOL_INCREMENT = int(os.getenv('ORACLE_POOL_INCREMENT', '1'))
-ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', '60'))
\ No newline at end of file
+ORACLE_POOL_PING_INTERVAL = int(os.getenv('ORACLE_POOL_PING_INTERVAL', '60'))
+
+# Queue Configuration (must match in all services and the queue tables of pdb_queues.sql)
+QUEUE_PAYLOAD = os.getenv('ORACLE_QUEUE_PAYLOAD', 'raw').lower()  # raw (binary layout) or json
+QUEUE_SHARDED = os.getenv('ORACLE_QUEUE_SHARDED', 'True').lower() in ('true', '1', 'yes')  # Sharded queues (thick mode), false for classic queues
+QUEUE_CONSUMER = os.getenv('ORACLE_QUEUE_CONSUMER', 'poll').lower()  # poll (blocking dequeue) or notify (AQ notifications, thick mode)
+ORACLE_CLIENT_LIB_DIR = os.getenv('ORACLE_CLIENT_LIB_DIR', '')  # Oracle Client libraries for thick mode, empty searches the system path
+QUEUE_MAX_RETRIES = int(os.getenv('ORACLE_QUEUE_MAX_RETRIES', '5'))  # Retries of a failed message before it goes to vector_exception
+QUEUE_RETRY_DELAY_S = float(os.getenv('ORACLE_QUEUE_RETRY_DELAY_S', '10'))  # Delay of the first retry, doubled on each further one
+QUEUE_MAX_RETRY_DELAY_S = float(os.getenv('ORACLE_QUEUE_MAX_RETRY_DELAY_S', '600'))  # Longest retry delay
+QUEUE_CONSUMER_GROUP = os.getenv('ORACLE_QUEUE_CONSUMER_GROUP', 'VECTOR_MAKER').upper()  # Consumer group of the sharded vector_pending_chunk, shared by the replicas
+QUEUE_BACKEND = os.getenv('QUEUE_BACKEND', 'aq').lower()  # aq, memory (in-process) or sqlite (a file shared by the services of one host)
+QUEUE_SQLITE_PATH = os.getenv('QUEUE_SQLITE_PATH', '../cache/queues.sqlite3')  # SQLite file of the sqlite backend, the same for every service
+QUEUE_VISIBILITY_TIMEOUT_S = float(os.getenv('QUEUE_VISIBILITY_TIMEOUT_S', '300'))  # Seconds leased memory/sqlite messages stay hidden before redelivery
@@ -1,10 +1,13 @@
-from .connection import init_database, get_db_pool, is_db_ready, cleanup_database
-from .operations import update_chunk_embedding
+from .connection import init_database, get_db_pool, is_db_ready, cleanup_database, connect_for_notifications
+from .operations import update_chunk_embedding, update_chunk_embeddings, get_chunk_texts
 
 __all__ = [
     'init_database',
     'get_db_pool', 
     'is_db_ready',
     'cleanup_database',
-    'update_chunk_embedding'
+    'connect_for_notifications',
+    'update_chunk_embedding',
+    'update_chunk_embeddings',
+    'get_chunk_texts'
 ]
\ No newline at end of file
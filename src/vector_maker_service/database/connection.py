@@ -3,7 +3,8 @@ import logging
 import oracledb
 from config import (
     ORACLE_USER, ORACLE_PASSWORD, ORACLE_DSN,
-    ORACLE_POOL_MIN, ORACLE_POOL_MAX, ORACLE_POOL_INCREMENT, ORACLE_POOL_PING_INTERVAL
+    ORACLE_POOL_MIN, ORACLE_POOL_MAX, ORACLE_POOL_INCREMENT, ORACLE_POOL_PING_INTERVAL,
+    QUEUE_BACKEND, QUEUE_CONSUMER, QUEUE_SHARDED, ORACLE_CLIENT_LIB_DIR
 )
 
 logger = logging.getLogger(__name__)
@@ -20,13 +21,19 @@ def init_database():
         logger.info("Initializing Oracle database connection pool...")
         logger.info(f"Connecting to: {ORACLE_DSN} as user: {ORACLE_USER}")
         
-        # Check for Oracle client environment variables that might interfere with thin mode
-        if 'ORACLE_HOME' in os.environ:
-            logger.warning("ORACLE_HOME detected, this might cause issues with thin mode")
-        if 'TNS_ADMIN' in os.environ:
-            logger.warning("TNS_ADMIN detected, this might cause issues with thin mode")
+        # Sharded queues and AQ notification subscriptions are only available in thick mode (Oracle Client libraries)
+        if QUEUE_BACKEND == 'aq' and (QUEUE_SHARDED or QUEUE_CONSUMER == 'notify'):
+            oracledb.init_oracle_client(lib_dir=ORACLE_CLIENT_LIB_DIR or None)
+            logger.info(f"Using thick mode for sharded queues or queue notifications "
+                        f"(Oracle Client {oracledb.clientversion()})")
+        else:
+            # Check for Oracle client environment variables that might interfere with thin mode
+            if 'ORACLE_HOME' in os.environ:
+                logger.warning("ORACLE_HOME detected, this might cause issues with thin mode")
+            if 'TNS_ADMIN' in os.environ:
+                logger.warning("TNS_ADMIN detected, this might cause issues with thin mode")
         
-        # Create connection pool using thin mode (no Oracle client installation required)
+        # Create connection pool, in thin mode (no Oracle client installation required) unless enabled above
         _db_pool = oracledb.create_pool(
             user=ORACLE_USER,
             password=ORACLE_PASSWORD,
@@ -55,6 +62,10 @@ def init_database():
         _db_ready = False
         raise SystemExit(f"Database initialization failed: {e}")
 
+def connect_for_notifications():
+    """Open a standalone connection with events enabled, for AQ notification subscriptions (thick mode)."""
+    return oracledb.connect(user=ORACLE_USER, password=ORACLE_PASSWORD, dsn=ORACLE_DSN, events=True)
+
 def get_db_pool():
     """Get the database connection pool."""
     return _db_pool
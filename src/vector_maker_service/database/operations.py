@@ -1,7 +1,9 @@
+import json
 import logging
 import oracledb
 import array
 from .connection import get_db_pool, is_db_ready
+from .vector_format import get_vector_storage
 
 logger = logging.getLogger(__name__)
 
@@ -49,15 +51,126 @@ def update_chunk_embedding(document_id, chunk_index, embedding):
         else:
             embedding_array = embedding
         
-        cursor.execute("""
+        # Reduce and quantize to the configured storage format
+        storage = get_vector_storage()
+        
+        cursor.execute(f"""
             UPDATE document_chunks 
-            SET embedding = :embedding 
+            SET embedding = {storage.sql(':embedding')}, embedding_normalized = :normalized 
             WHERE document_id = :doc_id AND chunk_index = :chunk_idx
         """, {
-            'embedding': embedding_array,
+            'embedding': storage.transform(embedding_array),
+            'normalized': int(storage.normalized),
             'doc_id': document_id,
             'chunk_idx': chunk_index
         })
         
         connection.commit()
-        logger.info(f"Updated embedding for chunk {chunk_index} of document {document_id}")
\ No newline at end of file
+        logger.info(f"Updated embedding for chunk {chunk_index} of document {document_id}")
+
+def update_chunk_embeddings(chunk_embeddings, connection=None):
+    """Update a batch of chunks with their embeddings in one array-DML round trip and one commit.
+    
+    Uses a pooled connection unless one is passed in, e.g. the connection the
+    worker's write-behind stage keeps for its group commits.
+    """
+    if not is_db_ready():
+        raise Exception("Database not ready")
+    
+    if not chunk_embeddings:
+        return 0
+    
+    if connection is None:
+        with get_db_pool().acquire() as connection:
+            return _write_chunk_embeddings(connection, chunk_embeddings)
+    return _write_chunk_embeddings(connection, chunk_embeddings)
+
+def _write_chunk_embeddings(connection, chunk_embeddings):
+    cursor = connection.cursor()
+    
+    # Convert embedding lists to proper format for Oracle VECTOR type,
+    # reduced and quantized to the configured storage format
+    storage = get_vector_storage()
+    rows = []
+    for document_id, chunk_index, embedding in chunk_embeddings:
+        if isinstance(embedding, list):
+            embedding = array.array('f', embedding)
+        rows.append({
+            'embedding': storage.transform(embedding),
+            'normalized': int(storage.normalized),
+            'doc_id': document_id,
+            'chunk_idx': chunk_index
+        })
+    
+    cursor.executemany(f"""
+        UPDATE document_chunks 
+        SET embedding = {storage.sql(':embedding')}, embedding_normalized = :normalized 
+        WHERE document_id = :doc_id AND chunk_index = :chunk_idx
+    """, rows)
+    
+    connection.commit()
+    logger.info(f"Updated embeddings for {len(rows)} chunks")
+    return len(rows)
+
+def get_chunk_texts(messages, connection=None):
+    """Resolve chunk queue messages to chunks with their text, reading document_chunks in one query.
+    
+    A message references chunks first_chunk_index..last_chunk_index of a
+    document; messages in the former format carry their chunk_text and are
+    passed through. Chunks no longer in document_chunks (the document was
+    reprocessed or deleted since) are skipped. Returns dicts of document_id,
+    chunk_index and chunk_text.
+    """
+    if not is_db_ready():
+        raise Exception("Database not ready")
+    
+    chunks = [message for message in messages if 'chunk_text' in message]
+    ranges = [
+        [message['document_id'], message['first_chunk_index'], message['last_chunk_index']]
+        for message in messages if 'chunk_text' not in message
+    ]
+    if not ranges:
+        return chunks
+    
+    if connection is None:
+        with get_db_pool().acquire() as connection:
+            return chunks + _read_chunk_texts(connection, ranges)
+    return chunks + _read_chunk_texts(connection, ranges)
+
+def _lobs_as_strings(cursor, metadata):
+    # Fetch CLOB text inline with the rows instead of one round trip per LOB
+    if metadata.type_code is oracledb.DB_TYPE_CLOB:
+        return cursor.var(oracledb.DB_TYPE_LONG, arraysize=cursor.arraysize)
+
+def _read_chunk_texts(connection, ranges):
+    cursor = connection.cursor()
+    cursor.outputtypehandler = _lobs_as_strings
+    cursor.arraysize = 500
+    
+    ranges_json = json.dumps(ranges, separators=(',', ':'))
+    if len(ranges_json) > 4000:
+        # Beyond a SQL VARCHAR2 bind
+        cursor.setinputsizes(ranges=oracledb.DB_TYPE_CLOB)
+    
+    cursor.execute("""
+        SELECT c.document_id, c.chunk_index, c.chunk_text
+        FROM JSON_TABLE(:ranges, '$[*]' COLUMNS (
+            document_id NUMBER PATH '$[0]',
+            first_index NUMBER PATH '$[1]',
+            last_index  NUMBER PATH '$[2]'
+        )) r
+        JOIN document_chunks c
+          ON c.document_id = r.document_id
+         AND c.chunk_index BETWEEN r.first_index AND r.last_index
+        ORDER BY c.document_id, c.chunk_index
+    """, ranges=ranges_json)
+    
+    chunks = [
+        {'document_id': document_id, 'chunk_index': chunk_index, 'chunk_text': chunk_text}
+        for document_id, chunk_index, chunk_text in cursor
+    ]
+    
+    expected = sum(last - first + 1 for _, first, last in ranges)
+    if len(chunks) < expected:
+        logger.warning(f"{expected - len(chunks)} queued chunks are no longer in document_chunks, skipping them")
+    return chunks
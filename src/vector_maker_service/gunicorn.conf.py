@@ -1,24 +1,27 @@
 # Gunicorn configuration for Vector Maker Service
 import os
+import sys
 
 # Server socket
 bind = "0.0.0.0:8001"
 backlog = 2048
 
-# Worker processes - single worker for GPU model
-workers = 1
-worker_class = "sync"
+# Worker processes - HTTP only, the GPU model lives in the model server process
+workers = int(os.getenv('VECTOR_GUNICORN_WORKERS', '1'))
+# Threaded worker so concurrent /embeddings requests can be coalesced by the scheduler
+worker_class = "gthread"
+threads = int(os.getenv('VECTOR_GUNICORN_THREADS', '16'))
 worker_connections = 1000
 keepalive = 2
 
-# Worker timeout - very important for model loading
-timeout = 600  # 10 minutes for model loading
+# Worker timeout - requests wait on the model server, which loads the model on its own
+timeout = 600
 graceful_timeout = 60
 
-# Memory management
-max_requests = 50  # Lower to prevent memory buildup with large models
+# Memory management - recycling only restarts HTTP workers, the model stays loaded
+max_requests = 50
 max_requests_jitter = 10
-preload_app = False  # Don't preload to avoid GPU conflicts
+preload_app = False
 
 # Logging
 accesslog = "-"
@@ -32,4 +35,21 @@ proc_name = "vector_maker_service"
 # Resource limits - cross-platform compatible
 if os.path.exists("/dev/shm"):
     worker_tmp_dir = "/dev/shm"  # Use memory-based tmp on Linux
-# On macOS/Windows, use default tmp directory
\ No newline at end of file
+# On macOS/Windows, use default tmp directory
+
+
+# Model server lifecycle - started once by the arbiter, outlives worker recycling
+_model_server_process = None
+
+def on_starting(server):
+    global _model_server_process
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from config import MODEL_SERVER_AUTOSTART
+    if not MODEL_SERVER_AUTOSTART:
+        return
+    from model_server import start_model_server_process
+    _model_server_process = start_model_server_process()
+
+def on_exit(server):
+    from model_server import stop_model_server_process
+    stop_model_server_process(_model_server_process)
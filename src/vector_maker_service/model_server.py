@@ -0,0 +1,195 @@
+"""
+Long-lived model server for the Vector Maker Service.
+
+Owns the embedding backend, scheduler, cache and the background embedding worker,
+and serves embedding requests to the HTTP workers over a local Unix socket. HTTP
+workers can be recycled, scaled or restarted without reloading the model.
+
+Run standalone with `python model_server.py`, or let gunicorn start it (see
+gunicorn.conf.py).
+"""
+
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener, Client
+
+from config import MODEL_SERVER_SOCKET, MODEL_SERVER_AUTHKEY, MODEL_SERVER_AUTHKEY_GENERATED
+from database import init_database, cleanup_database, is_db_ready
+from models import (
+    init_model, cleanup_model, get_model, is_model_ready,
+    init_scheduler, get_scheduler, cleanup_scheduler,
+    init_cache, get_cache, cleanup_cache, cached_embed, QUERY_LANE
+)
+from services import init_queue_consumer, get_queue_stats
+from worker import start_embedding_worker, stop_embedding_worker, get_worker_stats
+
+logger = logging.getLogger(__name__)
+
+# Server state
+_listener = None
+_running = False
+
+
+def handle_request(operation, payload):
+    """Execute one request from an HTTP worker and return its result."""
+    if operation == 'embed':
+        if not is_model_ready() or get_scheduler() is None:
+            raise RuntimeError("Model not ready")
+        return cached_embed(payload['texts'], lane=payload.get('lane', QUERY_LANE))
+
+    if operation == 'ping':
+        model = get_model()
+        return {
+            'model_ready': is_model_ready() and get_scheduler() is not None,
+            'backend': model.name if model else None,
+            'database_ready': is_db_ready(),
+            'pid': os.getpid()
+        }
+
+    if operation == 'stats':
+        scheduler = get_scheduler()
+        cache = get_cache()
+        return {
+            'scheduler': scheduler.get_stats() if scheduler else None,
+            'cache': cache.get_stats() if cache else None,
+            'worker': get_worker_stats(),
+            'queue': get_queue_stats()
+        }
+
+    raise ValueError(f"Unknown model server operation: {operation}")
+
+def serve_connection(connection):
+    """Serve requests from one client connection until it closes."""
+    with connection:
+        while _running:
+            try:
+                operation, payload = connection.recv()
+            except (EOFError, OSError):
+                return
+
+            try:
+                response = ('ok', handle_request(operation, payload))
+            except Exception as e:
+                logger.error(f"Model server request '{operation}' failed: {e}")
+                response = ('error', str(e))
+
+            try:
+                connection.send(response)
+            except (EOFError, OSError):
+                return
+
+def is_server_running(address=MODEL_SERVER_SOCKET):
+    """Check whether a model server is already accepting connections."""
+    try:
+        with Client(address, family='AF_UNIX', authkey=MODEL_SERVER_AUTHKEY):
+            return True
+    except (OSError, EOFError, AuthenticationError):
+        return False
+
+def ensure_private_directory(path):
+    """Create the socket's directory accessible to this user only, refusing one others can enter."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    status = os.stat(path)
+    if status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise SystemExit(f"Model server socket directory {path} must be owned by this user with mode 0700")
+
+def open_listener():
+    """Bind the model server socket, replacing a stale one left by a crashed server."""
+    global _listener, _running
+
+    ensure_private_directory(os.path.dirname(os.path.abspath(MODEL_SERVER_SOCKET)))
+    if os.path.exists(MODEL_SERVER_SOCKET):
+        if is_server_running():
+            raise SystemExit(f"Model server already running on {MODEL_SERVER_SOCKET}")
+        os.unlink(MODEL_SERVER_SOCKET)
+
+    _listener = Listener(MODEL_SERVER_SOCKET, family='AF_UNIX', authkey=MODEL_SERVER_AUTHKEY)
+    os.chmod(MODEL_SERVER_SOCKET, 0o600)
+    _running = True
+    logger.info(f"Model server listening on {MODEL_SERVER_SOCKET}")
+
+def serve_forever():
+    """Accept HTTP worker connections, one handler thread per connection."""
+    while _running:
+        try:
+            connection = _listener.accept()
+        except (OSError, AuthenticationError):
+            # Listener closed during shutdown, or a client failed authentication
+            if not _running:
+                break
+            continue
+        threading.Thread(target=serve_connection, args=(connection,), daemon=True).start()
+
+def initialize_model_server():
+    """Load the model and start everything that depends on it."""
+    logger.info("Initializing model server...")
+    init_database()
+    init_queue_consumer()
+    init_model()
+    init_scheduler()
+    init_cache()
+    start_embedding_worker()
+    logger.info("Model server initialization completed")
+
+def cleanup_model_server():
+    """Stop accepting requests and release the model."""
+    global _running
+
+    logger.info("Shutting down model server...")
+    _running = False
+    if _listener:
+        _listener.close()
+    stop_embedding_worker()
+    cleanup_scheduler()
+    cleanup_cache()
+    cleanup_database()
+    cleanup_model()
+    logger.info("Model server shutdown completed")
+
+def signal_handler(signum, frame):
+    """Handle shutdown signals."""
+    logger.info(f"Model server received signal {signum}, initiating graceful shutdown...")
+    cleanup_model_server()
+    sys.exit(0)
+
+def start_model_server_process():
+    """Launch the model server as a child process (used by gunicorn and `python app.py`)."""
+    if is_server_running():
+        logger.info(f"Model server already running on {MODEL_SERVER_SOCKET}")
+        return None
+
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_server.py')
+    process = subprocess.Popen([sys.executable, server_path], cwd=os.path.dirname(server_path))
+    logger.info(f"Started model server process {process.pid}")
+    return process
+
+def stop_model_server_process(process, timeout=60):
+    """Terminate a model server child process started by start_model_server_process."""
+    if process is None or process.poll() is not None:
+        return
+
+    logger.info(f"Stopping model server process {process.pid}...")
+    process.terminate()
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # A key generated here would be unknown to the HTTP workers; children of app.py or gunicorn inherit theirs
+    if MODEL_SERVER_AUTHKEY_GENERATED:
+        raise SystemExit("Set VECTOR_MODEL_SERVER_AUTHKEY to run the model server standalone (the same value for app.py)")
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+
+    # Listen before loading the model so readiness probes can report loading progress
+    open_listener()
+    threading.Thread(target=initialize_model_server, name='model-server-init', daemon=True).start()
+    serve_forever()
@@ -1,8 +1,20 @@
-from .embedding import init_model, get_model, is_model_ready, cleanup_model
+from .embedding import init_model, get_model, is_model_ready, cleanup_model, embed_texts
+from .scheduler import init_scheduler, get_scheduler, cleanup_scheduler, QUERY_LANE, BULK_LANE
+from .cache import init_cache, get_cache, cleanup_cache, cached_embed
 
 __all__ = [
     'init_model',
     'get_model',
     'is_model_ready', 
-    'cleanup_model'
+    'cleanup_model',
+    'embed_texts',
+    'init_scheduler',
+    'get_scheduler',
+    'cleanup_scheduler',
+    'QUERY_LANE',
+    'BULK_LANE',
+    'init_cache',
+    'get_cache',
+    'cleanup_cache',
+    'cached_embed'
 ]
\ No newline at end of file
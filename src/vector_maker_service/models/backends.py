@@ -0,0 +1,176 @@
+import array
+import hashlib
+import logging
+import math
+import os
+import time
+from config import (
+    MODEL_NAME, ENFORCE_EAGER,
+    CPU_RUNTIME, CPU_QUANTIZE, CPU_EXPORT_DIR, CPU_BATCH_SIZE,
+    FAKE_DIMENSION, FAKE_LATENCY_MS, FAKE_LATENCY_PER_TEXT_MS, FAKE_MAX_TOKENS
+)
+
+logger = logging.getLogger(__name__)
+
+
+def float32_vector(buffer):
+    """Copy a C-contiguous float32 buffer (e.g. a NumPy row) into an array.array('f')."""
+    vector = array.array('f')
+    vector.frombytes(memoryview(buffer).cast('B'))
+    return vector
+
+
+class EmbeddingBackend:
+    """Interface shared by all embedding backends.
+
+    embed() takes a list of texts and returns one embedding per text, in order,
+    as a contiguous float32 array.array('f'). That buffer is carried unchanged
+    through the scheduler, cache, model server socket and the Oracle VECTOR bind,
+    so no per-element Python floats are created after the model call.
+
+    count_tokens() and split_text() let the scheduler size batches by token
+    budget and split inputs longer than max_tokens before they reach the model.
+    The defaults use a Hugging Face tokenizer in self._tokenizer.
+    """
+
+    # Identifies the model producing the vectors, used to key cached embeddings
+    name = None
+    # Longest input the model accepts, in tokens including special tokens
+    max_tokens = None
+    _tokenizer = None
+
+    def embed(self, texts):
+        raise NotImplementedError
+
+    def count_tokens(self, texts):
+        """Token count of each text as the model will see it."""
+        return [len(ids) for ids in self._tokenizer(texts, add_special_tokens=True)['input_ids']]
+
+    def split_text(self, text, max_tokens):
+        """Split a text into consecutive pieces of at most max_tokens tokens each."""
+        # Leave room for the special tokens added around every input
+        step = max(1, max_tokens - self._tokenizer.num_special_tokens_to_add())
+        ids = self._tokenizer(text, add_special_tokens=False)['input_ids']
+        return [self._tokenizer.decode(ids[i:i + step]) for i in range(0, len(ids), step)]
+
+    def close(self):
+        pass
+
+
+class VllmBackend(EmbeddingBackend):
+    """GPU inference with a vLLM embedding model."""
+
+    def __init__(self, model_name=MODEL_NAME):
+        from vllm import LLM
+
+        self.name = f"vllm:{model_name}"
+        self._llm = LLM(
+            model=model_name,
+            task="embed",
+            enforce_eager=ENFORCE_EAGER,
+        )
+        self._tokenizer = self._llm.get_tokenizer()
+        self.max_tokens = self._llm.llm_engine.model_config.max_model_len
+
+    def embed(self, texts):
+        # encode() keeps the pooled tensors; embed() would convert them to Python lists
+        outputs = self._llm.encode(texts)
+        return [float32_vector(output.outputs.data.float().cpu().numpy()) for output in outputs]
+
+
+class CpuBackend(EmbeddingBackend):
+    """CPU inference with sentence-transformers on PyTorch or ONNX Runtime.
+
+    With CPU_QUANTIZE=int8 the model is exported once to a dynamically quantized
+    ONNX model in CPU_EXPORT_DIR and loaded from there.
+    """
+
+    def __init__(self, model_name=MODEL_NAME):
+        from sentence_transformers import SentenceTransformer
+
+        self.name = f"cpu-{CPU_RUNTIME}{'-int8' if CPU_QUANTIZE == 'int8' else ''}:{model_name}"
+
+        if CPU_RUNTIME == 'onnx' and CPU_QUANTIZE == 'int8':
+            self._model = self._load_quantized_onnx(model_name)
+        else:
+            self._model = SentenceTransformer(model_name, device='cpu', backend=CPU_RUNTIME)
+        
+        # sentence-transformers silently truncates past max_seq_length
+        self._tokenizer = self._model.tokenizer
+        self.max_tokens = self._model.max_seq_length
+
+    def _load_quantized_onnx(self, model_name):
+        from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+        export_path = os.path.join(CPU_EXPORT_DIR, model_name.replace('/', '__'))
+        quantized_file = 'onnx/model_qint8_avx512_vnni.onnx'
+
+        if not os.path.exists(os.path.join(export_path, quantized_file)):
+            logger.info(f"Exporting int8 quantized ONNX model to {export_path}...")
+            model = SentenceTransformer(model_name, device='cpu', backend='onnx')
+            model.save(export_path)
+            export_dynamic_quantized_onnx_model(model, 'avx512_vnni', export_path)
+
+        return SentenceTransformer(
+            export_path,
+            device='cpu',
+            backend='onnx',
+            model_kwargs={'file_name': quantized_file}
+        )
+
+    def embed(self, texts):
+        vectors = self._model.encode(texts, batch_size=CPU_BATCH_SIZE, convert_to_numpy=True)
+        return [float32_vector(vector) for vector in vectors.astype('float32', copy=False)]
+
+
+class FakeBackend(EmbeddingBackend):
+    """Deterministic hash-based vectors for exercising the pipeline without a model.
+
+    The same text always maps to the same unit vector of the configured dimension.
+    Latency is simulated per call and per text so load tests can model a real
+    backend's cost while the queue, database and search layers are measured.
+    """
+
+    def __init__(self, dimension=FAKE_DIMENSION, latency_ms=FAKE_LATENCY_MS,
+                 latency_per_text_ms=FAKE_LATENCY_PER_TEXT_MS, max_tokens=FAKE_MAX_TOKENS):
+        self.name = f"fake:{dimension}"
+        self.max_tokens = max_tokens
+        self._dimension = dimension
+        self._latency = latency_ms / 1000
+        self._latency_per_text = latency_per_text_ms / 1000
+
+    def embed(self, texts):
+        delay = self._latency + self._latency_per_text * len(texts)
+        if delay > 0:
+            time.sleep(delay)
+        return [self._vector(text) for text in texts]
+
+    def count_tokens(self, texts):
+        # Whitespace-separated words stand in for tokens
+        return [len(text.split()) + 2 for text in texts]
+
+    def split_text(self, text, max_tokens):
+        words = text.split()
+        step = max(1, max_tokens - 2)
+        return [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+
+    def _vector(self, text):
+        # One signed byte of SHAKE-256 output per dimension, scaled to unit length
+        digest = hashlib.shake_256(text.encode('utf-8')).digest(self._dimension)
+        values = [byte - 256 if byte > 127 else byte for byte in digest]
+        norm = math.sqrt(sum(value * value for value in values)) or 1.0
+        return array.array('f', [value / norm for value in values])
+
+
+BACKENDS = {
+    'vllm': VllmBackend,
+    'cpu': CpuBackend,
+    'fake': FakeBackend
+}
+
+def create_backend(backend_name):
+    """Create the embedding backend registered under backend_name."""
+    backend_class = BACKENDS.get(backend_name)
+    if backend_class is None:
+        raise ValueError(f"Unknown embedding backend '{backend_name}', expected one of: {', '.join(BACKENDS)}")
+    return backend_class()
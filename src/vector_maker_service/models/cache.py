@@ -0,0 +1,296 @@
+import array
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from config import CACHE_ENABLED, CACHE_MAX_BYTES, CACHE_PERSISTENT, CACHE_FILE_PATH
+from database import get_db_pool, is_db_ready
+from .embedding import get_model, is_model_ready
+from .scheduler import get_scheduler, QUERY_LANE
+
+logger = logging.getLogger(__name__)
+
+# Approximate per-entry bookkeeping cost (key tuple, hash string, dict slot)
+ENTRY_OVERHEAD_BYTES = 200
+
+# Hashes per persistent tier lookup query, below Oracle's 1000 IN list entries and SQLite's 999 variables
+LOOKUP_BATCH_SIZE = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Global state
+_cache = None
+
+
+def normalize_text(text):
+    """Normalize text so trivially different copies share a cache entry."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+def text_hash(text):
+    """Content hash of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+def lookup_batches(hashes):
+    """Split hashes into lists of at most LOOKUP_BATCH_SIZE, one IN list query each."""
+    hashes = list(hashes)
+    return [hashes[start:start + LOOKUP_BATCH_SIZE] for start in range(0, len(hashes), LOOKUP_BATCH_SIZE)]
+
+
+class FileCacheStore:
+    """Persistent cache tier in a local SQLite file."""
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    model_name TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    PRIMARY KEY (model_name, text_hash)
+                )
+            """)
+            self._connection.commit()
+
+    def get_many(self, model_name, hashes):
+        rows = []
+        with self._lock:
+            for batch in lookup_batches(hashes):
+                placeholders = ','.join('?' * len(batch))
+                rows.extend(self._connection.execute(f"""
+                    SELECT text_hash, embedding FROM embedding_cache
+                    WHERE model_name = ? AND text_hash IN ({placeholders})
+                """, [model_name, *batch]).fetchall())
+
+        found = {}
+        for hash_value, blob in rows:
+            embedding = array.array('f')
+            embedding.frombytes(blob)
+            found[hash_value] = embedding
+        return found
+
+    def put_many(self, model_name, entries):
+        with self._lock:
+            self._connection.executemany("""
+                INSERT OR REPLACE INTO embedding_cache (model_name, text_hash, embedding)
+                VALUES (?, ?, ?)
+            """, [(model_name, hash_value, embedding.tobytes()) for hash_value, embedding in entries])
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+class OracleCacheStore:
+    """Persistent cache tier in the embedding_cache table."""
+
+    def get_many(self, model_name, hashes):
+        if not is_db_ready():
+            return {}
+
+        found = {}
+        with get_db_pool().acquire() as connection:
+            cursor = connection.cursor()
+            for batch in lookup_batches(hashes):
+                binds = {f'h{i}': hash_value for i, hash_value in enumerate(batch)}
+                binds['model_name'] = model_name
+                placeholders = ', '.join(f':h{i}' for i in range(len(batch)))
+                cursor.execute(f"""
+                    SELECT text_hash, embedding FROM embedding_cache
+                    WHERE model_name = :model_name AND text_hash IN ({placeholders})
+                """, binds)
+                found.update(cursor.fetchall())
+        return found
+
+    def put_many(self, model_name, entries):
+        if not is_db_ready():
+            return
+
+        with get_db_pool().acquire() as connection:
+            cursor = connection.cursor()
+            cursor.executemany("""
+                MERGE INTO embedding_cache c
+                USING (SELECT :model_name AS model_name, :text_hash AS text_hash FROM DUAL) s
+                ON (c.model_name = s.model_name AND c.text_hash = s.text_hash)
+                WHEN NOT MATCHED THEN
+                    INSERT (model_name, text_hash, embedding)
+                    VALUES (s.model_name, s.text_hash, :embedding)
+            """, [{
+                'model_name': model_name,
+                'text_hash': hash_value,
+                'embedding': embedding
+            } for hash_value, embedding in entries])
+            connection.commit()
+
+    def close(self):
+        pass
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache keyed by (model name, normalized text hash).
+
+    The in-memory tier is an LRU bounded by the total size of the stored vectors.
+    An optional persistent tier (SQLite file or Oracle table) backs it, so entries
+    evicted from memory or lost on restart are not recomputed.
+    """
+
+    def __init__(self, model_name, max_bytes, store=None):
+        self._model_name = model_name
+        self._max_bytes = max_bytes
+        self._store = store
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'persistent_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get_many(self, hashes):
+        """Return {hash: embedding} for the hashes found in either tier."""
+        found = {}
+        missing = []
+        with self._lock:
+            for hash_value in hashes:
+                embedding = self._entries.get(hash_value)
+                if embedding is None:
+                    missing.append(hash_value)
+                    continue
+                self._entries.move_to_end(hash_value)
+                found[hash_value] = embedding
+            self._stats['hits'] += len(found)
+
+        if missing and self._store is not None:
+            try:
+                persisted = self._store.get_many(self._model_name, missing)
+            except Exception as e:
+                logger.warning(f"Persistent embedding cache lookup failed: {e}")
+                persisted = {}
+            if persisted:
+                with self._lock:
+                    self._stats['persistent_hits'] += len(persisted)
+                    for hash_value, embedding in persisted.items():
+                        self._insert(hash_value, embedding)
+                found.update(persisted)
+
+        with self._lock:
+            self._stats['misses'] += len(hashes) - len(found)
+        return found
+
+    def put_many(self, entries):
+        """Store (hash, embedding) pairs in memory and the persistent tier."""
+        with self._lock:
+            for hash_value, embedding in entries:
+                self._insert(hash_value, embedding)
+
+        if entries and self._store is not None:
+            try:
+                self._store.put_many(self._model_name, entries)
+            except Exception as e:
+                logger.warning(f"Persistent embedding cache write failed: {e}")
+
+    def get_stats(self):
+        """Return hit, miss and eviction counters."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        lookups = stats['hits'] + stats['persistent_hits'] + stats['misses']
+        stats['max_bytes'] = self._max_bytes
+        stats['hit_rate'] = round((stats['hits'] + stats['persistent_hits']) / lookups, 3) if lookups else 0
+        stats['persistent'] = CACHE_PERSISTENT
+        return stats
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+    def _insert(self, hash_value, embedding):
+        # Caller holds the lock
+        if hash_value in self._entries:
+            self._entries.move_to_end(hash_value)
+            return
+
+        size = len(embedding) * embedding.itemsize + ENTRY_OVERHEAD_BYTES
+        if size > self._max_bytes:
+            return
+        self._entries[hash_value] = embedding
+        self._bytes += size
+
+        while self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted) * evicted.itemsize + ENTRY_OVERHEAD_BYTES
+            self._stats['evictions'] += 1
+
+
+def init_cache():
+    """Initialize the embedding cache and its optional persistent tier."""
+    global _cache
+
+    if not CACHE_ENABLED:
+        logger.info("Embedding cache disabled")
+        return
+    
+    if not is_model_ready():
+        logger.warning("Model not ready, embedding cache not initialized")
+        return
+
+    store = None
+    try:
+        if CACHE_PERSISTENT == 'file':
+            store = FileCacheStore(CACHE_FILE_PATH)
+        elif CACHE_PERSISTENT == 'oracle':
+            store = OracleCacheStore()
+        elif CACHE_PERSISTENT != 'none':
+            logger.warning(f"Unknown persistent cache tier '{CACHE_PERSISTENT}', using memory only")
+    except Exception as e:
+        logger.error(f"Failed to initialize persistent embedding cache: {e}")
+        store = None
+
+    # Key entries by backend and model so vectors from different backends never mix
+    _cache = EmbeddingCache(get_model().name, CACHE_MAX_BYTES, store)
+    logger.info(f"Embedding cache initialized ({CACHE_MAX_BYTES} bytes in memory, persistent tier: {CACHE_PERSISTENT})")
+
+def get_cache():
+    """Get the embedding cache instance."""
+    return _cache
+
+def cleanup_cache():
+    """Close the embedding cache."""
+    global _cache
+
+    if _cache:
+        _cache.close()
+        _cache = None
+
+def cached_embed(texts, lane=QUERY_LANE):
+    """Embed texts through the scheduler, serving repeated texts from the cache.
+    
+    Returns float32 array.array('f') vectors; callers must not modify them.
+    """
+    scheduler = get_scheduler()
+    if _cache is None:
+        return scheduler.submit(texts, lane=lane)
+
+    hashes = [text_hash(text) for text in texts]
+    found = _cache.get_many(list(dict.fromkeys(hashes)))
+
+    # Embed each distinct missing text once
+    missing = {}
+    for text, hash_value in zip(texts, hashes):
+        if hash_value not in found and hash_value not in missing:
+            missing[hash_value] = text
+
+    if missing:
+        embeddings = scheduler.submit(list(missing.values()), lane=lane)
+        new_entries = list(zip(missing.keys(), embeddings))
+        _cache.put_many(new_entries)
+        found.update(new_entries)
+
+    # Repeated texts share the same read-only array
+    return [found[hash_value] for hash_value in hashes]
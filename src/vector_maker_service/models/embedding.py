@@ -1,6 +1,6 @@
 import logging
-from vllm import LLM
-from config import MODEL_NAME, ENFORCE_EAGER
+from config import MODEL_NAME, EMBEDDING_BACKEND, MAX_INPUT_TOKENS
+from .backends import create_backend
 
 logger = logging.getLogger(__name__)
 
@@ -9,27 +9,40 @@ _model = None
 _model_ready = False
 
 def init_model():
-    """Initialize the vLLM embedding model."""
+    """Initialize the configured embedding backend."""
     global _model, _model_ready
     
     try:
-        logger.info(f"Initializing vLLM model: {MODEL_NAME}")
-        _model = LLM(
-            model=MODEL_NAME,
-            task="embed",
-            enforce_eager=ENFORCE_EAGER,
-        )
+        logger.info(f"Initializing {EMBEDDING_BACKEND} embedding backend for model: {MODEL_NAME}")
+        _model = create_backend(EMBEDDING_BACKEND)
         _model_ready = True
-        logger.info("vLLM model initialized successfully")
+        logger.info(f"Embedding backend {_model.name} initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize model: {e}")
         _model = None
         _model_ready = False
 
 def get_model():
-    """Get the embedding model instance."""
+    """Get the embedding backend instance."""
     return _model
 
+def embed_texts(texts):
+    """Embed a list of texts with one backend call and return the embedding vectors."""
+    return _model.embed(texts)
+
+def count_tokens(texts):
+    """Token count of each text under the backend's tokenizer."""
+    return _model.count_tokens(texts)
+
+def split_text(text, max_tokens):
+    """Split a text into pieces the backend can embed within max_tokens."""
+    return _model.split_text(text, max_tokens)
+
+def max_input_tokens():
+    """Longest input sent to the model, VECTOR_MAX_INPUT_TOKENS or the model limit."""
+    limits = [limit for limit in (MAX_INPUT_TOKENS, _model.max_tokens) if limit]
+    return min(limits) if limits else None
+
 def is_model_ready():
     """Check if model is ready."""
     return _model_ready and _model is not None
@@ -39,6 +52,7 @@ def cleanup_model():
     global _model_ready
     
     if _model_ready:
-        logger.info("Shutting down vLLM model...")
+        logger.info("Shutting down embedding backend...")
         _model_ready = False
-        logger.info("vLLM model shutdown logged")
\ No newline at end of file
+        _model.close()
+        logger.info("Embedding backend shutdown logged")
\ No newline at end of file
@@ -0,0 +1,412 @@
+import logging
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import (
+    BATCH_WINDOW_MS, BATCH_MAX_SIZE, BATCH_REQUEST_TIMEOUT, BATCH_TOKEN_BUDGET,
+    SCHEDULER_BULK_MIN_SHARE, SCHEDULER_SHARE_WINDOW_S, SCHEDULER_METRICS_WINDOW
+)
+from .embedding import embed_texts, count_tokens, split_text, max_input_tokens, is_model_ready
+from .backends import float32_vector
+
+logger = logging.getLogger(__name__)
+
+QUERY_LANE = 'query'
+BULK_LANE = 'bulk'
+
+# Global state
+_scheduler = None
+
+
+class _PendingRequest:
+    """A single caller's texts waiting for model calls.
+
+    Texts of one request may be embedded in different model calls, and a text
+    longer than the model limit is split into pieces whose embeddings are
+    averaged back into one vector.
+    """
+
+    def __init__(self, size):
+        self.enqueued_at = time.perf_counter()
+        self.started = False
+        self.pieces = [[] for _ in range(size)]
+        self.remaining = 0
+        self.embeddings = None
+        self.error = None
+        self.done = threading.Event()
+
+    def complete(self, index, embedding, tokens):
+        """Store the embedding of one text or piece; finish once all have arrived."""
+        if self.error is not None:
+            return
+        self.pieces[index].append((embedding, tokens))
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.embeddings = [_combine(pieces) for pieces in self.pieces]
+            self.done.set()
+
+    def fail(self, error):
+        if self.error is None and not self.done.is_set():
+            self.error = error
+            self.done.set()
+
+
+class _PendingText:
+    """One text (or piece of an oversize text) waiting in a lane."""
+
+    __slots__ = ('request', 'index', 'text', 'tokens')
+
+    def __init__(self, request, index, text, tokens):
+        self.request = request
+        self.index = index
+        self.text = text
+        self.tokens = tokens
+
+
+def _combine(pieces):
+    """Token-weighted average of the piece embeddings of a split text, scaled to unit length."""
+    if len(pieces) == 1:
+        return pieces[0][0]
+
+    combined = np.average(
+        [np.frombuffer(embedding, dtype=np.float32) for embedding, _ in pieces],
+        axis=0, weights=[tokens for _, tokens in pieces]
+    )
+    norm = np.linalg.norm(combined) or 1.0
+    return float32_vector((combined / norm).astype(np.float32))
+
+
+class LatencyWindow:
+    """Keeps the most recent latency samples and summarizes them in milliseconds."""
+
+    def __init__(self, size=SCHEDULER_METRICS_WINDOW):
+        self._samples = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, seconds):
+        self._samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        samples = sorted(self._samples)
+        if not samples:
+            return {'count': self.count, 'avg_ms': 0, 'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0, 'max_ms': 0}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))] * 1000, 2)
+
+        return {
+            'count': self.count,
+            'avg_ms': round(sum(samples) / len(samples) * 1000, 2),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(samples[-1] * 1000, 2)
+        }
+
+
+class _Lane:
+    """Pending texts and metrics for one priority lane."""
+
+    def __init__(self, name, coalesce):
+        self.name = name
+        self.coalesce = coalesce
+        # Pending texts in arrival order
+        self.pending = []
+        self.pending_tokens = 0
+        self.queue_wait = LatencyWindow()
+        self.execution = LatencyWindow()
+        self.batches = 0
+        self.texts = 0
+        self.split_texts = 0
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.busy_seconds = 0.0
+
+    def stats(self):
+        return {
+            'queued_texts': len(self.pending),
+            'queued_tokens': self.pending_tokens,
+            'batches': self.batches,
+            'texts': self.texts,
+            'split_texts': self.split_texts,
+            'tokens': self.tokens,
+            # Share of the padded batch (texts x longest text) that is real tokens
+            'padding_efficiency': round(self.tokens / self.padded_tokens, 3) if self.padded_tokens else 0,
+            'tokens_per_s': round(self.tokens / self.busy_seconds, 1) if self.busy_seconds else 0,
+            'queue_wait': self.queue_wait.summary(),
+            'execution': self.execution.summary()
+        }
+
+
+class EmbeddingScheduler:
+    """Arbitrates a single model between interactive query and bulk embedding work.
+
+    One executor thread owns all model calls. Queued query texts always run
+    before queued bulk texts and are coalesced within a short window into a
+    single model call. Bulk work is still guaranteed bulk_min_share of model time
+    over the recent share window, so ingestion keeps moving under search load.
+
+    Model calls are sized by token budget rather than text count: each call
+    takes the oldest pending text of the lane plus the pending texts closest to
+    it in token length, as long as texts x longest text stays within
+    token_budget. Texts longer than max_input_tokens are split before queueing.
+    """
+
+    def __init__(self, embed_fn, window_ms, max_batch_size, bulk_min_share, share_window_s,
+                 token_budget, count_fn=None, split_fn=None, max_input_tokens=None):
+        self._embed_fn = embed_fn
+        self._count_fn = count_fn
+        self._split_fn = split_fn
+        self._max_input_tokens = max_input_tokens
+        # Any single text must fit in a call on its own
+        self._token_budget = max(token_budget, max_input_tokens or 0)
+        self._window = window_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._bulk_min_share = bulk_min_share
+        self._share_window = share_window_s
+        self._lanes = {
+            QUERY_LANE: _Lane(QUERY_LANE, coalesce=True),
+            BULK_LANE: _Lane(BULK_LANE, coalesce=False)
+        }
+        # (finished_at, lane name, busy seconds) of recent model calls
+        self._recent_calls = deque()
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Start the executor thread."""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='embedding-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10):
+        """Stop the executor thread and fail any requests still queued."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        with self._condition:
+            for lane in self._lanes.values():
+                for item in lane.pending:
+                    item.request.fail(RuntimeError("Embedding scheduler stopped"))
+                lane.pending = []
+                lane.pending_tokens = 0
+
+    def submit(self, texts, lane=QUERY_LANE, timeout=BATCH_REQUEST_TIMEOUT):
+        """Embed texts in the given lane and return their embeddings."""
+        if not texts:
+            return []
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown scheduler lane: {lane}")
+
+        # Tokenize in the caller's thread, keeping the executor free for model calls
+        request = _PendingRequest(len(texts))
+        items, split_texts = self._measure(request, texts)
+        request.remaining = len(items)
+
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Embedding scheduler not running")
+            target = self._lanes[lane]
+            target.pending.extend(items)
+            target.pending_tokens += sum(item.tokens for item in items)
+            target.split_texts += split_texts
+            self._condition.notify_all()
+
+        if not request.done.wait(timeout):
+            raise TimeoutError(f"Embedding request timed out after {timeout} seconds")
+        if request.error is not None:
+            raise request.error
+        return request.embeddings
+
+    def get_stats(self):
+        """Return per-lane queue-wait, execution latency and token efficiency metrics."""
+        with self._condition:
+            stats = {name: lane.stats() for name, lane in self._lanes.items()}
+            stats['bulk_share'] = round(self._bulk_share(time.perf_counter()), 3)
+        stats['bulk_min_share'] = self._bulk_min_share
+        stats['token_budget'] = self._token_budget
+        stats['max_input_tokens'] = self._max_input_tokens
+        return stats
+
+    def _measure(self, request, texts):
+        """Pending items for texts with their token counts, splitting oversize texts."""
+        if self._count_fn is None:
+            return [_PendingText(request, index, text, 1) for index, text in enumerate(texts)], 0
+
+        items = []
+        split_texts = 0
+        for index, (text, tokens) in enumerate(zip(texts, self._count_fn(texts))):
+            if not self._max_input_tokens or tokens <= self._max_input_tokens:
+                items.append(_PendingText(request, index, text, tokens))
+                continue
+
+            pieces = self._split_fn(text, self._max_input_tokens)
+            split_texts += 1
+            logger.info(f"Split a {tokens} token text into {len(pieces)} pieces of at most "
+                        f"{self._max_input_tokens} tokens")
+            for piece, piece_tokens in zip(pieces, self._count_fn(pieces)):
+                items.append(_PendingText(request, index, piece, piece_tokens))
+        return items, split_texts
+
+    def _bulk_share(self, now):
+        # Drop calls that fell out of the share window
+        while self._recent_calls and now - self._recent_calls[0][0] > self._share_window:
+            self._recent_calls.popleft()
+
+        total = sum(busy for _, _, busy in self._recent_calls)
+        if total == 0:
+            return 1.0
+        return sum(busy for _, name, busy in self._recent_calls if name == BULK_LANE) / total
+
+    def _select_lane(self):
+        query = self._lanes[QUERY_LANE]
+        bulk = self._lanes[BULK_LANE]
+        if not bulk.pending:
+            return query if query.pending else None
+        if not query.pending:
+            return bulk
+        # Both lanes have work: queries pre-empt bulk unless bulk is below its minimum share
+        if self._bulk_share(time.perf_counter()) < self._bulk_min_share:
+            return bulk
+        return query
+
+    def _take_batch(self, lane):
+        if lane.coalesce:
+            # Collect more texts until the window closes or the budget is reached
+            deadline = time.monotonic() + self._window
+            while lane.pending_tokens < self._token_budget and len(lane.pending) < self._max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    break
+                self._condition.wait(remaining)
+
+        chosen = self._bucket(lane.pending)
+        batch = [lane.pending[i] for i in sorted(chosen)]
+        lane.pending = [item for i, item in enumerate(lane.pending) if i not in chosen]
+        lane.pending_tokens -= sum(item.tokens for item in batch)
+        return batch
+
+    def _bucket(self, pending):
+        """Indexes of the oldest pending text and its closest neighbours in token length."""
+        anchor = pending[0].tokens
+        order = sorted(range(len(pending)), key=lambda i: pending[i].tokens)
+        low = high = order.index(0)
+        longest = anchor
+
+        while high - low + 1 < self._max_batch_size:
+            candidates = []
+            if low > 0:
+                candidates.append((anchor - pending[order[low - 1]].tokens, 'low'))
+            if high < len(order) - 1:
+                candidates.append((pending[order[high + 1]].tokens - anchor, 'high'))
+
+            grown = False
+            for _, side in sorted(candidates):
+                tokens = pending[order[low - 1 if side == 'low' else high + 1]].tokens
+                if (high - low + 2) * max(longest, tokens) > self._token_budget:
+                    continue
+                if side == 'low':
+                    low -= 1
+                else:
+                    high += 1
+                longest = max(longest, tokens)
+                grown = True
+                break
+            if not grown:
+                break
+
+        return set(order[low:high + 1])
+
+    def _run(self):
+        while True:
+            with self._condition:
+                lane = self._select_lane()
+                while lane is None and self._running:
+                    self._condition.wait()
+                    lane = self._select_lane()
+                if not self._running:
+                    return
+                batch = self._take_batch(lane)
+
+            self._execute(lane, batch)
+
+    def _execute(self, lane, batch):
+        texts = [item.text for item in batch]
+        started = time.perf_counter()
+
+        try:
+            embeddings = self._embed_fn(texts)
+            error = None
+        except Exception as e:
+            logger.error(f"Embedding of {len(texts)} texts in {lane.name} lane failed: {e}")
+            error = e
+
+        finished = time.perf_counter()
+        tokens = sum(item.tokens for item in batch)
+        with self._condition:
+            for item in batch:
+                if not item.request.started:
+                    item.request.started = True
+                    lane.queue_wait.add(started - item.request.enqueued_at)
+            lane.execution.add(finished - started)
+            lane.batches += 1
+            lane.texts += len(texts)
+            lane.tokens += tokens
+            lane.padded_tokens += len(batch) * max(item.tokens for item in batch)
+            lane.busy_seconds += finished - started
+            self._recent_calls.append((finished, lane.name, finished - started))
+
+            if error is not None:
+                # Fail the whole request and drop its other texts still queued
+                for item in batch:
+                    item.request.fail(error)
+                lane.pending = [item for item in lane.pending if item.request.error is None]
+                lane.pending_tokens = sum(item.tokens for item in lane.pending)
+                return
+
+        # Fan results back out to each request
+        for item, embedding in zip(batch, embeddings):
+            item.request.complete(item.index, embedding, item.tokens)
+
+
+def init_scheduler():
+    """Initialize and start the embedding scheduler."""
+    global _scheduler
+
+    if not is_model_ready():
+        logger.warning("Model not ready, embedding scheduler not started")
+        return
+
+    _scheduler = EmbeddingScheduler(
+        embed_texts,
+        window_ms=BATCH_WINDOW_MS,
+        max_batch_size=BATCH_MAX_SIZE,
+        bulk_min_share=SCHEDULER_BULK_MIN_SHARE,
+        share_window_s=SCHEDULER_SHARE_WINDOW_S,
+        token_budget=BATCH_TOKEN_BUDGET,
+        count_fn=count_tokens,
+        split_fn=split_text,
+        max_input_tokens=max_input_tokens()
+    )
+    _scheduler.start()
+    logger.info(f"Embedding scheduler started (query window {BATCH_WINDOW_MS} ms, "
+                f"bulk min share {SCHEDULER_BULK_MIN_SHARE:.0%}, token budget {BATCH_TOKEN_BUDGET}, "
+                f"max input {max_input_tokens()} tokens)")
+
+def get_scheduler():
+    """Get the embedding scheduler instance."""
+    return _scheduler
+
+def cleanup_scheduler():
+    """Stop the embedding scheduler."""
+    global _scheduler
+
+    if _scheduler:
+        logger.info("Stopping embedding scheduler...")
+        _scheduler.stop()
+        _scheduler = None
@@ -0,0 +1,146 @@
+"""
+Rewrite stored chunk embeddings in the configured storage format.
+
+After changing EMBEDDING_STORAGE_FORMAT / EMBEDDING_STORAGE_DIMENSION, run this
+to convert existing document_chunks rows. It also backfills rows written before
+normalize-on-write (embedding_normalized = 0), which keep search on COSINE;
+INT8 rows are never unit length and keep embedding_normalized = 0. Rows are
+converted from their stored vector, which works when moving to a smaller
+dimension or a coarser format. Going the other way (e.g. INT8 back to FLOAT32,
+or restoring dimensions) needs --reembed, which re-embeds the chunk text
+through the running model server.
+
+    python requantize.py --dry-run
+    python requantize.py --fit-pca --sample 5000   # before EMBEDDING_STORAGE_PROJECTION=pca
+    python requantize.py [--reembed] [--batch-size 256]
+"""
+
+import argparse
+import array
+import logging
+import sys
+
+from config import EMBEDDING_PCA_PATH, EMBEDDING_STORAGE_DIMENSION
+from database import init_database, get_db_pool, cleanup_database
+from database.vector_format import get_vector_storage, PcaProjection
+from services import init_model_client, get_model_client, cleanup_model_client
+
+logger = logging.getLogger(__name__)
+
+# Stored vectors are read back as FLOAT32 whatever their format
+SELECT_PENDING = """
+    SELECT id, TO_VECTOR(embedding, *, FLOAT32), chunk_text
+    FROM document_chunks
+    WHERE id > :last_id
+      AND embedding IS NOT NULL
+      AND (embedding_normalized != :normalized
+           OR VECTOR_DIMENSION_FORMAT(embedding) != :format
+           OR (:dimension > 0 AND VECTOR_DIMENSION_COUNT(embedding) != :dimension))
+    ORDER BY id
+    FETCH FIRST :batch_size ROWS ONLY
+"""
+
+
+def read_text(value):
+    return value.read() if hasattr(value, 'read') else value
+
+def model_dimension(reembed):
+    """Full model dimension, probed from the model server when re-embedding."""
+    if not reembed:
+        return 0
+    return len(get_model_client().embed(["dimension probe"], lane='bulk')[0])
+
+def fit_pca(dimension, sample_size):
+    """Fit the PCA projection on a sample of full-dimension FLOAT32 rows."""
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT embedding FROM document_chunks
+            WHERE embedding IS NOT NULL AND VECTOR_DIMENSION_FORMAT(embedding) = 'FLOAT32'
+              AND VECTOR_DIMENSION_COUNT(embedding) > :dimension
+            FETCH FIRST :sample_size ROWS ONLY
+        """, {'dimension': dimension, 'sample_size': sample_size})
+        vectors = [row[0] for row in cursor.fetchall()]
+
+    if len(vectors) < dimension:
+        raise SystemExit(f"Need at least {dimension} full-dimension FLOAT32 rows to fit the PCA, found {len(vectors)}")
+
+    PcaProjection.fit(vectors, dimension, EMBEDDING_PCA_PATH)
+    logger.info(f"Fitted {dimension}-dimension PCA on {len(vectors)} vectors, saved to {EMBEDDING_PCA_PATH}")
+
+def requantize(batch_size, reembed, dry_run):
+    """Convert every row whose normalized flag, format or dimension differs from the configured storage."""
+    storage = get_vector_storage()
+    dimension = storage.dimension or model_dimension(reembed)
+    binds = {'format': storage.format, 'normalized': int(storage.normalized), 'dimension': dimension, 'batch_size': batch_size}
+
+    converted = skipped = 0
+    last_id = 0
+    with get_db_pool().acquire() as connection:
+        cursor = connection.cursor()
+        while True:
+            cursor.execute(SELECT_PENDING, {**binds, 'last_id': last_id})
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            if dry_run:
+                converted += len(rows)
+                continue
+
+            if reembed:
+                sources = get_model_client().embed([read_text(row[2]) for row in rows], lane='bulk')
+            else:
+                sources = [array.array('f', row[1]) for row in rows]
+
+            updates = []
+            for (chunk_id, _, _), source in zip(rows, sources):
+                if storage.dimension and len(source) < storage.dimension:
+                    skipped += 1
+                    continue
+                updates.append({'embedding': storage.transform(source), 'normalized': int(storage.normalized), 'id': chunk_id})
+
+            if updates:
+                cursor.executemany(f"""
+                    UPDATE document_chunks SET embedding = {storage.sql(':embedding')}, embedding_normalized = :normalized WHERE id = :id
+                """, updates)
+                connection.commit()
+            converted += len(updates)
+            logger.info(f"Converted {converted} chunks to {storage.describe()} (up to id {last_id})")
+
+    if dry_run:
+        logger.info(f"{converted} chunks are not stored as {storage.describe()}")
+    else:
+        logger.info(f"Requantize completed: {converted} converted, {skipped} need --reembed")
+    return skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rewrite chunk embeddings in the configured storage format')
+    parser.add_argument('--batch-size', type=int, default=256, help='Rows converted per commit')
+    parser.add_argument('--reembed', action='store_true', help='Re-embed chunk text through the model server instead of converting stored vectors')
+    parser.add_argument('--dry-run', action='store_true', help='Only count the rows that would be converted')
+    parser.add_argument('--fit-pca', action='store_true', help='Fit the PCA projection for EMBEDDING_STORAGE_DIMENSION and exit')
+    parser.add_argument('--sample', type=int, default=5000, help='Rows sampled to fit the PCA')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_database()
+    if args.reembed:
+        init_model_client()
+
+    try:
+        if args.fit_pca:
+            if not EMBEDDING_STORAGE_DIMENSION:
+                raise SystemExit("Set EMBEDDING_STORAGE_DIMENSION to the PCA dimension first")
+            fit_pca(EMBEDDING_STORAGE_DIMENSION, args.sample)
+            return 0
+        return 1 if requantize(args.batch_size, args.reembed, args.dry_run) else 0
+    finally:
+        cleanup_model_client()
+        cleanup_database()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,15 @@
-from .queue import dequeue_chunk_for_embedding
+from .queue import (
+    init_queue_consumer, cleanup_queue_consumer, get_queue_stats, lease_chunks_for_embedding
+)
+from .model_client import init_model_client, get_model_client, cleanup_model_client, ModelServerError
 
 __all__ = [
-    'dequeue_chunk_for_embedding'
+    'init_queue_consumer',
+    'cleanup_queue_consumer',
+    'get_queue_stats',
+    'lease_chunks_for_embedding',
+    'init_model_client',
+    'get_model_client',
+    'cleanup_model_client',
+    'ModelServerError'
 ]
\ No newline at end of file
@@ -0,0 +1,106 @@
+import logging
+import queue
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from config import MODEL_SERVER_SOCKET, MODEL_SERVER_AUTHKEY, MODEL_SERVER_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+# Global state
+_client = None
+
+
+class ModelServerError(Exception):
+    """Raised when the model server is unreachable or rejects a request."""
+
+
+class ModelClient:
+    """Talks to the model server over its Unix socket.
+    
+    Keeps a small pool of connections so each request thread of an HTTP worker
+    has its own connection while the request is in flight.
+    """
+
+    def __init__(self, address, authkey, timeout):
+        self._address = address
+        self._authkey = authkey
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def embed(self, texts, lane='query'):
+        """Embed texts on the model server and return their embeddings."""
+        return self._call('embed', {'texts': texts, 'lane': lane})
+
+    def ping(self):
+        """Return the model server readiness information."""
+        return self._call('ping', None)
+
+    def get_stats(self):
+        """Return the model server scheduler, cache and worker pipeline metrics."""
+        return self._call('stats', None)
+
+    def close(self):
+        """Close all pooled connections."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return Client(self._address, family='AF_UNIX', authkey=self._authkey)
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise ModelServerError(f"Model server unavailable at {self._address}: {e}")
+
+    def _release(self, connection):
+        with self._lock:
+            if not self._closed:
+                self._idle.put(connection)
+                return
+        connection.close()
+
+    def _call(self, operation, payload):
+        connection = self._acquire()
+        try:
+            connection.send((operation, payload))
+            if not connection.poll(self._timeout):
+                raise TimeoutError(f"Model server did not answer '{operation}' within {self._timeout} seconds")
+            status, result = connection.recv()
+        except (OSError, EOFError, TimeoutError) as e:
+            # The connection is in an unknown state, never reuse it
+            connection.close()
+            raise ModelServerError(f"Model server request '{operation}' failed: {e}")
+        
+        self._release(connection)
+        if status != 'ok':
+            raise ModelServerError(result)
+        return result
+
+
+def init_model_client():
+    """Initialize the model server client."""
+    global _client
+    _client = ModelClient(MODEL_SERVER_SOCKET, MODEL_SERVER_AUTHKEY, MODEL_SERVER_TIMEOUT)
+    logger.info(f"Model server client configured for {MODEL_SERVER_SOCKET}")
+
+def get_model_client():
+    """Get the model server client."""
+    return _client
+
+def cleanup_model_client():
+    """Close the model server client connections."""
+    global _client
+    
+    if _client:
+        _client.close()
+        _client = None
\ No newline at end of file
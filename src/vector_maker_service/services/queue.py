@@ -1,100 +1,66 @@
-import json
 import logging
-from database import get_db_pool, is_db_ready
+import sys
+from pathlib import Path
+from config import (
+    QUEUE_PAYLOAD, QUEUE_CONSUMER, QUEUE_MAX_RETRIES, QUEUE_RETRY_DELAY_S, QUEUE_MAX_RETRY_DELAY_S, QUEUE_CONSUMER_GROUP,
+    QUEUE_SHARDED, WORKER_MAX_LEASES, QUEUE_BACKEND, QUEUE_SQLITE_PATH, QUEUE_VISIBILITY_TIMEOUT_S
+)
+from database import get_db_pool, is_db_ready, connect_for_notifications
+
+# Shared queue client (src/common)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent))
+from common.queues import create_queue, CHUNK_RANGE_MESSAGE
 
 logger = logging.getLogger(__name__)
 
-def enqueue_chunk_for_embedding(document_id, chunk_index, chunk_text):
-    """Enqueue a chunk for embedding processing."""
-    if not is_db_ready():
-        raise Exception("Database not ready")
-    
+# On the QUEUE_BACKEND (see common.queues.backends)
+chunk_queue = create_queue(
+    QUEUE_BACKEND, "vector_pending_chunk", CHUNK_RANGE_MESSAGE, get_db_pool, sqlite_path=QUEUE_SQLITE_PATH,
+    visibility_timeout_s=QUEUE_VISIBILITY_TIMEOUT_S, payload=QUEUE_PAYLOAD,
+    max_retries=QUEUE_MAX_RETRIES, retry_delay_s=QUEUE_RETRY_DELAY_S, max_retry_delay_s=QUEUE_MAX_RETRY_DELAY_S,
+    max_leases=WORKER_MAX_LEASES, consumer=QUEUE_CONSUMER_GROUP if QUEUE_SHARDED else None
+)
+
+def init_queue_consumer():
+    """Join the QUEUE_CONSUMER_GROUP of vector_pending_chunk, and subscribe to its notifications
+    when QUEUE_CONSUMER is notify.
+
+    The prefetch stage then waits for chunks without holding a pooled
+    connection. If the subscription fails, it keeps waiting in blocking dequeues.
+    """
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_chunk"
-            
-            # Create payload with chunk metadata
-            payload = {
-                'document_id': document_id,
-                'chunk_index': chunk_index,
-                'chunk_text': chunk_text
-            }
-            
-            # Enqueue message using Oracle AQ
-            cursor.execute("""
-                DECLARE
-                    enqueue_options    DBMS_AQ.ENQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                BEGIN
-                    message := SYS.AQ$_JMS_TEXT_MESSAGE.construct;
-                    message.set_text(:payload);
-                    
-                    DBMS_AQ.ENQUEUE(
-                        queue_name         => :queue_name,
-                        enqueue_options    => enqueue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    COMMIT;
-                END;
-            """, payload=json.dumps(payload), queue_name=queue_name)
-            
-            logger.info(f"Enqueued chunk {chunk_index} for document {document_id}")
-            
+        chunk_queue.join()
     except Exception as e:
-        logger.error(f"Failed to enqueue chunk: {e}")
-        raise
+        logger.error(f"Could not add consumer group {QUEUE_CONSUMER_GROUP} to vector_pending_chunk: {e}")
 
-def dequeue_chunk_for_embedding(timeout=30):
-    """Dequeue a chunk for embedding processing."""
-    if not is_db_ready():
-        raise Exception("Database not ready")
-    
+    if QUEUE_CONSUMER != 'notify':
+        return
     try:
-        db_pool = get_db_pool()
-        with db_pool.acquire() as connection:
-            cursor = connection.cursor()
-            
-            queue_name = "vector_pending_chunk"
-            
-            cursor.execute("""
-                DECLARE
-                    dequeue_options    DBMS_AQ.DEQUEUE_OPTIONS_T;
-                    message_properties DBMS_AQ.MESSAGE_PROPERTIES_T;
-                    message_handle     RAW(16);
-                    message            SYS.AQ$_JMS_TEXT_MESSAGE;
-                    text_content       VARCHAR2(4000);
-                BEGIN
-                    dequeue_options.wait := :timeout;
-                    
-                    DBMS_AQ.DEQUEUE(
-                        queue_name         => :queue_name,
-                        dequeue_options    => dequeue_options,
-                        message_properties => message_properties,
-                        payload            => message,
-                        msgid              => message_handle
-                    );
-                    
-                    message.get_text(text_content);
-                    :result := text_content;
-                    COMMIT;
-                EXCEPTION
-                    WHEN OTHERS THEN
-                        :result := NULL;
-                END;
-            """, timeout=timeout, queue_name=queue_name, result=cursor.var(str))
-            
-            result = cursor.bindvars['result'].getvalue()
-            if result:
-                return json.loads(result)
-            return None
-            
+        chunk_queue.listen(connect_for_notifications)
     except Exception as e:
-        logger.error(f"Failed to dequeue chunk: {e}")
-        return None
\ No newline at end of file
+        logger.error(f"Could not subscribe to queue notifications, polling instead: {e}")
+
+def cleanup_queue_consumer():
+    """Drop the notification subscription, waking the prefetch stage if it is waiting."""
+    chunk_queue.stop_listening()
+
+def get_queue_stats():
+    """How the prefetch stage waits for chunks (poll or notify), with notification and lease counters."""
+    return chunk_queue.get_consumer_stats()
+
+def lease_chunks_for_embedding(max_messages, timeout=30, linger_ms=0):
+    """Lease up to max_messages chunk messages for embedding, or None when none arrived.
+
+    Waits up to timeout seconds for the first message, then keeps collecting
+    messages until max_messages is reached or linger_ms has elapsed. Messages
+    reference a range of a document's chunks (see get_chunk_texts) and stay
+    on the queue until the lease is acked after their embeddings are
+    committed. A failed lease is retried with a growing delay, up to QUEUE_MAX_RETRIES
+    times, then moved to vector_exception. At most WORKER_MAX_LEASES leases
+    are held at once; this blocks until one ends.
+    """
+    if not is_db_ready():
+        raise Exception("Database not ready")
+
+    # Errors propagate, so the caller backs off instead of reading them as an empty queue
+    return chunk_queue.lease_many(max_messages, wait=timeout, linger_ms=linger_ms)
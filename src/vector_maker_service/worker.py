@@ -0,0 +1,327 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from config import (
+    WORKER_BATCH_SIZE, WORKER_BATCH_LINGER_MS, WORKER_DEQUEUE_TIMEOUT,
+    WORKER_PREFETCH_BATCHES, WORKER_WRITE_QUEUE_BATCHES, WORKER_WRITE_GROUP_MAX,
+    WORKER_STATS_WINDOW_S
+)
+from database import get_db_pool, update_chunk_embeddings, get_chunk_texts
+from models import is_model_ready, get_scheduler, cached_embed, BULK_LANE
+from services import lease_chunks_for_embedding, cleanup_queue_consumer
+
+logger = logging.getLogger(__name__)
+
+# Poll interval for stage threads waiting on their input queue
+_POLL_INTERVAL = 0.5
+
+# Worker state
+_worker_running = True
+_worker_thread = None
+_stages = {}
+_prefetch_queue = None
+_write_queue = None
+
+
+class StageStats:
+    """Busy, starved and blocked time of one pipeline stage over a sliding window.
+
+    busy: doing its own work (dequeue and chunk text round trips that returned
+    chunks, model calls, UPDATE + COMMIT). starved: waiting for input. blocked: waiting for
+    room in the next stage's queue. The stage with the highest busy share is
+    the bottleneck; the stages around it show up as starved or blocked.
+    """
+
+    def __init__(self, name, window_s=WORKER_STATS_WINDOW_S):
+        self.name = name
+        self._window = window_s
+        self._lock = threading.Lock()
+        # (finished_at, state, seconds)
+        self._intervals = deque()
+        self._started_at = time.monotonic()
+        self.batches = 0
+        self.chunks = 0
+        self.errors = 0
+
+    def record(self, state, seconds):
+        now = time.monotonic()
+        with self._lock:
+            self._intervals.append((now, state, seconds))
+            self._trim(now)
+
+    def completed(self, chunks):
+        with self._lock:
+            self.batches += 1
+            self.chunks += chunks
+
+    def failed(self):
+        with self._lock:
+            self.errors += 1
+
+    def stats(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            elapsed = min(self._window, now - self._started_at) or 1.0
+            totals = {'busy': 0.0, 'starved': 0.0, 'blocked': 0.0}
+            for _, state, seconds in self._intervals:
+                totals[state] += seconds
+            return {
+                'utilization': round(min(1.0, totals['busy'] / elapsed), 3),
+                'starved': round(min(1.0, totals['starved'] / elapsed), 3),
+                'blocked': round(min(1.0, totals['blocked'] / elapsed), 3),
+                'batches': self.batches,
+                'chunks': self.chunks,
+                'errors': self.errors
+            }
+
+    def _trim(self, now):
+        # Caller holds the lock
+        while self._intervals and now - self._intervals[0][0] > self._window:
+            self._intervals.popleft()
+
+
+def _put(target, item, stage):
+    """Hand an item to the next stage, recording back-pressure as blocked time."""
+    started = time.perf_counter()
+    target.put(item)
+    stage.record('blocked', time.perf_counter() - started)
+
+def _get(source, stage):
+    """Take the next item from the previous stage, recording the wait as starved time."""
+    started = time.perf_counter()
+    while True:
+        try:
+            item = source.get(timeout=_POLL_INTERVAL)
+            break
+        except queue.Empty:
+            continue
+    stage.record('starved', time.perf_counter() - started)
+    return item
+
+def _ack(leases):
+    """Remove the messages of written batches from the queue."""
+    for lease in leases:
+        try:
+            lease.ack()
+        except Exception as e:
+            # Their embeddings are committed, rewriting them on redelivery is harmless
+            logger.error(f"Could not ack {len(lease)} chunk messages, they will be redelivered: {e}")
+
+def _fail(leases, error):
+    """Retry the messages of batches that could not be embedded or written later."""
+    for lease in leases:
+        try:
+            lease.fail(error)
+        except Exception as e:
+            logger.error(f"Could not retry {len(lease)} chunk messages, they will be redelivered: {e}")
+
+def prefetch_stage(output, stage):
+    """Keep a bounded buffer of leased chunk batches ahead of the model.
+
+    Messages only reference chunks, so the texts of a whole batch are then read
+    from document_chunks in one query, on the lease's connection. Each batch
+    travels with its leases, acked by the write stage once the batch's
+    embeddings are committed.
+    """
+    while _worker_running:
+        lease = None
+        try:
+            started = time.perf_counter()
+            lease = lease_chunks_for_embedding(
+                WORKER_BATCH_SIZE,
+                timeout=WORKER_DEQUEUE_TIMEOUT,
+                linger_ms=WORKER_BATCH_LINGER_MS
+            )
+
+            if lease is None:
+                # Nothing on the queue, the whole wait was idle
+                stage.record('starved', time.perf_counter() - started)
+                continue
+
+            batch = get_chunk_texts(lease.messages, connection=lease.connection)
+            stage.record('busy', time.perf_counter() - started)
+            if not batch:
+                # The chunks are gone (document reprocessed or deleted), nothing to embed
+                _ack([lease])
+                continue
+
+            stage.completed(len(batch))
+            _put(output, (batch, [lease]), stage)
+
+        except Exception as e:
+            logger.error(f"Error dequeuing chunk batch: {e}")
+            stage.failed()
+            if lease is not None:
+                _fail([lease], e)
+            time.sleep(1)
+
+    # Let the model stage drain what was already dequeued
+    output.put(None)
+
+def embed_stage(source, output, stage):
+    """Embed prefetched batches back to back in the bulk lane."""
+    finished = False
+    while not finished:
+        item = _get(source, stage)
+        if item is None:
+            break
+        batch, leases = item
+
+        # Submit every batch already buffered together, so the scheduler can bucket
+        # their chunks by token length across batches
+        while True:
+            try:
+                more = source.get_nowait()
+            except queue.Empty:
+                break
+            if more is None:
+                finished = True
+                break
+            batch.extend(more[0])
+            leases.extend(more[1])
+
+        try:
+            # Bulk lane model calls sized by token budget, skipping boilerplate chunks that are already cached
+            started = time.perf_counter()
+            embeddings = cached_embed([chunk_data['chunk_text'] for chunk_data in batch], lane=BULK_LANE)
+            stage.record('busy', time.perf_counter() - started)
+            stage.completed(len(batch))
+        except Exception as e:
+            logger.error(f"Error embedding batch of {len(batch)} chunks: {e}")
+            stage.failed()
+            _fail(leases, e)
+            continue
+
+        _put(output, ([
+            (chunk_data['document_id'], chunk_data['chunk_index'], embedding)
+            for chunk_data, embedding in zip(batch, embeddings)
+        ], leases), stage)
+
+    output.put(None)
+
+def write_stage(source, stage):
+    """Group-commit embedded batches through a dedicated pooled connection, then ack their leases."""
+    connection = None
+    finished = False
+
+    while not finished:
+        item = _get(source, stage)
+        if item is None:
+            break
+        group, leases = item
+
+        # Fold in whatever else is already waiting, up to the group size
+        while len(group) < WORKER_WRITE_GROUP_MAX:
+            try:
+                more = source.get_nowait()
+            except queue.Empty:
+                break
+            if more is None:
+                finished = True
+                break
+            group.extend(more[0])
+            leases.extend(more[1])
+
+        try:
+            if connection is None:
+                connection = get_db_pool().acquire()
+            started = time.perf_counter()
+            update_chunk_embeddings(group, connection=connection)
+            stage.record('busy', time.perf_counter() - started)
+            stage.completed(len(group))
+        except Exception as e:
+            logger.error(f"Error writing embeddings for {len(group)} chunks: {e}")
+            stage.failed()
+            _fail(leases, e)
+            # The connection may be broken, take a fresh one for the next group
+            if connection is not None:
+                try:
+                    get_db_pool().release(connection)
+                except Exception:
+                    pass
+                connection = None
+            continue
+
+        _ack(leases)
+
+    if connection is not None:
+        get_db_pool().release(connection)
+
+def embedding_worker():
+    """Background worker to process embedding queue as a prefetch -> embed -> write pipeline."""
+    global _prefetch_queue, _write_queue
+    logger.info("Starting embedding worker thread...")
+
+    # Wait for model to be ready
+    while _worker_running and (not is_model_ready() or get_scheduler() is None):
+        logger.info("Embedding worker waiting for model to be ready...")
+        time.sleep(5)
+
+    if not _worker_running:
+        return
+
+    logger.info(f"Embedding worker ready, processing queue in batches of up to {WORKER_BATCH_SIZE} "
+                f"chunks (linger {WORKER_BATCH_LINGER_MS} ms, prefetch {WORKER_PREFETCH_BATCHES} batches, "
+                f"write groups of up to {WORKER_WRITE_GROUP_MAX} chunks)...")
+
+    _prefetch_queue = queue.Queue(maxsize=WORKER_PREFETCH_BATCHES)
+    _write_queue = queue.Queue(maxsize=WORKER_WRITE_QUEUE_BATCHES)
+    for name in ('prefetch', 'embed', 'write'):
+        _stages[name] = StageStats(name)
+
+    threads = [
+        threading.Thread(target=prefetch_stage, args=(_prefetch_queue, _stages['prefetch']),
+                         name='embedding-prefetch', daemon=True),
+        threading.Thread(target=embed_stage, args=(_prefetch_queue, _write_queue, _stages['embed']),
+                         name='embedding-embed', daemon=True),
+        threading.Thread(target=write_stage, args=(_write_queue, _stages['write']),
+                         name='embedding-write', daemon=True)
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Stages exit in order once prefetch stops: buffered batches are still embedded and written
+    for thread in threads:
+        thread.join()
+
+    logger.info("Embedding worker thread stopped")
+
+def get_worker_stats():
+    """Return queue depths and per-stage utilization of the worker pipeline."""
+    if not _stages:
+        return None
+
+    stages = {name: stage.stats() for name, stage in _stages.items()}
+    return {
+        'stages': stages,
+        'queues': {
+            'prefetch': {'depth': _prefetch_queue.qsize(), 'capacity': WORKER_PREFETCH_BATCHES},
+            'write': {'depth': _write_queue.qsize(), 'capacity': WORKER_WRITE_QUEUE_BATCHES}
+        },
+        'bottleneck': max(stages, key=lambda name: stages[name]['utilization']),
+        'window_s': WORKER_STATS_WINDOW_S
+    }
+
+def start_embedding_worker():
+    """Start the embedding worker in a background thread."""
+    global _worker_thread
+    if _worker_thread is None or not _worker_thread.is_alive():
+        _worker_thread = threading.Thread(target=embedding_worker, daemon=True)
+        _worker_thread.start()
+        logger.info("Embedding worker thread started")
+
+def stop_embedding_worker():
+    """Stop dequeuing and wait for buffered batches to be embedded and written."""
+    global _worker_running
+
+    _worker_running = False
+    # Wakes the prefetch stage if it is waiting for a queue notification
+    cleanup_queue_consumer()
+    if _worker_thread and _worker_thread.is_alive():
+        logger.info("Waiting for embedding worker to drain its pipeline...")
+        # Prefetch may be blocked in a dequeue for up to the dequeue timeout (when polling)
+        _worker_thread.join(timeout=WORKER_DEQUEUE_TIMEOUT + 30)